@@ -3,14 +3,273 @@ TRANSLATOR PRO - Application de Traduction Multilingue
 Interface Streamlit avec traduction de texte, images, fichiers et audio
 """
 import streamlit as st
-from PIL import Image
-import io
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from utils.job_queue import BATCH, DONE, FAILED, INTERACTIVE, QUEUED, RUNNING, Job, job_queue
+from utils.uploads import spool_upload
+
+logger = logging.getLogger(__name__)
+
+
+# Import différé des modules : torch, transformers, Tesseract, PyPDF2,
+# python-docx et pydub ne sont chargés qu'à la première utilisation d'un onglet
+def get_text_translator():
+    from utils.text_translator import text_translator
+    return text_translator
+
+
+def get_image_translator():
+    from utils.image_translator import image_translator
+    return image_translator
+
+
+def get_file_translator():
+    from utils.file_translator import file_translator
+    return file_translator
+
+
+def get_audio_translator():
+    from utils.audio_translator import audio_translator
+    return audio_translator
+
+
+@st.cache_resource
+def start_model_warmup() -> bool:
+    """Préchauffe les paires de TRANSLATOR_WARMUP_PAIRS, une fois par processus"""
+    if not os.environ.get("TRANSLATOR_WARMUP_PAIRS", "").strip():
+        return False
+    
+    def warmup():
+        # torch et transformers sont importés dans le thread, pas au démarrage du script
+        from models.model_cache import model_cache
+        model_cache.warmup()
+    
+    threading.Thread(target=warmup, name="model-warmup", daemon=True).start()
+    return True
+
+
+# Intervalle de rafraîchissement de l'interface pendant un travail
+JOB_POLL_SECONDS = 0.5
+# Taille des aperçus publiés pendant un travail
+PREVIEW_CHARS = 5000
+
+
+# ========== TRAVAUX EN ARRIÈRE-PLAN ==========
+# Exécutés par la file de travaux, hors du script : aucun appel à st.* ici
+
+class LinePreview:
+    """Aperçu d'un texte produit ligne par ligne : construit au fil de l'eau, borné"""
+    
+    def __init__(self, max_chars: int = PREVIEW_CHARS):
+        self.max_chars = max_chars
+        self.text = ""
+        self.lines = 0
+    
+    def extend(self, lines: List[str]) -> str:
+        """Ajoute des lignes tant que l'aperçu n'est pas plein ; renvoie l'aperçu"""
+        for line in lines:
+            if len(self.text) >= self.max_chars:
+                break
+            self.text = (self.text + ("\n" if self.lines else "") + line)[:self.max_chars]
+            self.lines += 1
+        return self.text
+
+
+def run_text_job(job: Job, text: str, source_lang: str, target_langs: List[str],
+                 profile: str) -> Dict[str, str]:
+    """Traduction d'un texte, publiée fenêtre par fenêtre s'il n'y a qu'une langue cible"""
+    progress_callback = lambda done, total: job.progress(done, total, "Traduction")
+    if len(target_langs) > 1:
+        return get_text_translator().translate_multi(
+            text, source_lang, target_langs, profile=profile,
+            progress_callback=progress_callback
+        )
+    
+    target_lang = target_langs[0]
+    lines = []
+    preview = LinePreview()
+    for window in get_text_translator().translate_stream(
+        text, source_lang, target_lang, profile=profile,
+        progress_callback=progress_callback
+    ):
+        lines.extend(window)
+        job.partial = preview.extend(window)
+    return {target_lang: "\n".join(lines)}
+
+
+def run_image_job(job: Job, images, source_lang: str, target_langs: List[str],
+                  profile: str) -> Dict[str, str]:
+    """OCR une seule fois puis traduction des images vers chaque langue cible"""
+    # Une étape de plus que de pages : la traduction qui suit l'OCR
+    return get_image_translator().translate_images_multi(
+        images, source_lang, target_langs,
+        progress_callback=lambda done, total: job.progress(done, total + 1, "OCR"),
+        profile=profile
+    )
+
+
+def run_file_job(job: Job, file_source, file_name: str, source_lang: str,
+                 target_langs: List[str], profile: str, page_range) -> dict:
+    """Extraction et traduction d'un document ; ferme le fichier temporaire à la fin"""
+    progress_callback = lambda done, total: job.progress(done, total, "Traduction")
+    try:
+        file_ext = file_name.split('.')[-1].lower()
+        if file_ext == "docx":
+            # DOCX : un seul travail par lots, réécrit dans une copie par langue
+            original, results = get_file_translator().translate_docx_multi(
+                file_source, source_lang, target_langs, profile=profile,
+                progress_callback=progress_callback
+            )
+            return {"original": original,
+                    "translated": {lang: text for lang, (text, _) in results.items()},
+                    "docx": {lang: docx for lang, (_, docx) in results.items()}}
+        
+        if len(target_langs) > 1:
+            # Extraction une seule fois, puis traduction vers toutes les langues
+            original, translated = get_file_translator().translate_file_multi(
+                file_source, file_ext, source_lang, target_langs,
+                page_range=page_range, profile=profile, progress_callback=progress_callback
+            )
+            return {"original": original[:PREVIEW_CHARS], "translated": translated, "docx": None}
+        
+        # Page par page pour les PDF (seul l'aperçu du texte original est conservé)
+        target_lang = target_langs[0]
+        original = ""
+        has_text = False
+        translated_lines = []
+        preview = LinePreview()
+        for original_part, lines in get_file_translator().translate_file_stream(
+            file_source, file_ext, source_lang, target_lang,
+            page_range=page_range, profile=profile, progress_callback=progress_callback
+        ):
+            has_text = has_text or bool(original_part.strip())
+            if len(original) < PREVIEW_CHARS:
+                original = (original + original_part)[:PREVIEW_CHARS]
+            translated_lines.extend(lines)
+            job.partial = {"original": original,
+                           "translated": {target_lang: preview.extend(lines)}}
+        translated = "\n".join(translated_lines)
+        
+        if not has_text:
+            translated = "⚠️ Aucun texte trouvé dans le fichier"
+        return {"original": original, "translated": {target_lang: translated}, "docx": None}
+    finally:
+        file_source.close()
+
+
+def run_audio_job(job: Job, audio_source, audio_format: str, source_lang: str,
+                  target_langs: List[str], profile: str) -> dict:
+    """Transcription une seule fois puis traduction ; ferme le fichier temporaire à la fin"""
+    try:
+        transcribed = get_audio_translator().transcribe_audio(
+            audio_source, audio_format, source_lang,
+            progress_callback=lambda done, total: job.progress(done, total, "Transcription")
+        )
+    finally:
+        audio_source.close()
+    
+    translated = get_text_translator().translate_multi(
+        transcribed, source_lang, target_langs, profile=profile,
+        progress_callback=lambda done, total: job.progress(done, total, "Traduction")
+    )
+    return {"transcribed": transcribed, "translated": translated}
+
+
+def current_job(tab: str) -> Optional[Job]:
+    """Dernier travail soumis depuis un onglet"""
+    return st.session_state.jobs.get(st.session_state.tab_jobs.get(tab))
+
+
+def submit_job(tab: str, fn, name: str, lane: str) -> Job:
+    """Soumet un travail pour un onglet ; le précédent est annulé s'il tourne encore"""
+    previous = current_job(tab)
+    if previous is not None:
+        previous.cancel()
+        st.session_state.jobs.pop(previous.id, None)
+    job = job_queue.submit(fn, name, lane=lane)
+    st.session_state.jobs[job.id] = job
+    st.session_state.tab_jobs[tab] = job.id
+    return job
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes} min {seconds:02d} s" if minutes else f"{seconds} s"
+
+
+def render_job_status(tab: str) -> Optional[Job]:
+    """
+    Affiche l'état du travail d'un onglet : attente, progression, ETA, erreur
+    
+    Args:
+        tab: Nom de l'onglet
+    
+    Returns:
+        Le travail (None si aucun n'a été soumis)
+    """
+    job = current_job(tab)
+    if job is None:
+        return None
+    
+    if job.status in (QUEUED, RUNNING):
+        status_col, cancel_col = st.columns([4, 1])
+        with status_col:
+            if job.status == QUEUED:
+                st.info("⏳ En attente d'un emplacement de traitement...")
+            else:
+                text = f"🔄 {job.message or 'Traitement'} : {job.fraction:.0%}"
+                if job.eta_seconds is not None:
+                    text += f" — reste environ {format_duration(job.eta_seconds)}"
+                st.progress(job.fraction, text=text)
+        with cancel_col:
+            if st.button("⏹️ Annuler", key=f"cancel_{tab}", use_container_width=True,
+                         disabled=job.cancel_requested):
+                job.cancel()
+                st.rerun()
+    elif job.status == FAILED:
+        st.error(f"❌ Erreur: {job.error}")
+    elif job.status != DONE:
+        st.warning("⏹️ Traitement annulé")
+    return job
+
+
+def check_languages(source_lang: str, target_langs: List[str]) -> bool:
+    """Vérifie le choix des langues avant de soumettre un travail"""
+    if not target_langs:
+        st.warning("⚠️ Choisissez au moins une langue cible")
+        return False
+    if source_lang in target_langs:
+        st.warning("⚠️ Les langues source et cible doivent être différentes")
+        return False
+    return True
+
+
+def render_translations(translations: Dict[str, str], key: str, height: int = 300,
+                        max_chars: Optional[int] = None):
+    """Une zone de texte par langue cible, dans des onglets s'il y en a plusieurs"""
+    if len(translations) == 1:
+        containers = [st.container()]
+    else:
+        containers = st.tabs([LANGUAGE_NAMES.get(lang, lang) for lang in translations])
+    for container, (lang, text) in zip(containers, translations.items()):
+        with container:
+            st.text_area(
+                "Résultat",
+                value=text[:max_chars] if max_chars else text,
+                height=height,
+                key=f"{key}_result_{lang}",
+                label_visibility="collapsed"
+            )
+
+
+def file_suffix(lang: str, translations: Dict) -> str:
+    """Suffixe de langue des fichiers téléchargés, s'il y a plusieurs langues cibles"""
+    return f"_{lang}" if len(translations) > 1 else ""
 
-# Import des modules
-from utils.text_translator import text_translator
-from utils.image_translator import image_translator
-from utils.file_translator import file_translator
-from utils.audio_translator import audio_translator
 
 # Configuration de la page
 st.set_page_config(
@@ -29,6 +288,14 @@ def load_css():
         st.warning("⚠️ Fichier CSS non trouvé. Utilisation du style par défaut.")
 
 load_css()
+start_model_warmup()
+
+# Travaux de la session : id -> Job, conservés entre les réexécutions du script
+if "jobs" not in st.session_state:
+    st.session_state.jobs = {}
+# Dernier travail de chaque onglet
+if "tab_jobs" not in st.session_state:
+    st.session_state.tab_jobs = {}
 
 # Langues supportées
 LANGUAGES = {
@@ -39,6 +306,20 @@ LANGUAGES = {
     "🇩🇪 Deutsch": "de",
     "🇮🇹 Italiano": "it",
 }
+LANGUAGE_NAMES = {code: name for name, code in LANGUAGES.items()}
+
+# Profils de décodage (voir utils/text_translator.py)
+DECODING_PROFILES = {
+    "⚡ Rapide": "fast",
+    "⚖️ Équilibré": "balanced",
+    "🎯 Qualité": "quality",
+}
+# Profil présélectionné : le même défaut que le traducteur
+DEFAULT_DECODING_PROFILE = os.environ.get("TRANSLATOR_DECODING_PROFILE", "quality")
+if DEFAULT_DECODING_PROFILE not in DECODING_PROFILES.values():
+    logger.warning(f"⚠️ Profil de décodage inconnu: {DEFAULT_DECODING_PROFILE}, "
+                   f"« quality » présélectionné")
+    DEFAULT_DECODING_PROFILE = "quality"
 
 # En-tête de l'application
 def render_header():
@@ -62,12 +343,22 @@ with st.sidebar:
     )
     source_lang = LANGUAGES[source_lang_name]
     
-    target_lang_name = st.selectbox(
-        " Langue cible",
+    target_lang_names = st.multiselect(
+        " Langues cibles",
         options=list(LANGUAGES.keys()),
-        index=1
+        default=[list(LANGUAGES.keys())[1]],
+        help="Plusieurs langues : le contenu est extrait et découpé une seule fois, "
+             "puis traduit vers chacune."
+    )
+    target_langs = [LANGUAGES[name] for name in target_lang_names]
+    
+    profile_name = st.selectbox(
+        " Profil de décodage",
+        options=list(DECODING_PROFILES.keys()),
+        index=list(DECODING_PROFILES.values()).index(DEFAULT_DECODING_PROFILE),
+        help="Rapide : décodage glouton. Qualité : recherche en faisceau, plus lente."
     )
-    target_lang = LANGUAGES[target_lang_name]
+    decoding_profile = DECODING_PROFILES[profile_name]
     
     st.divider()
     
@@ -125,74 +416,71 @@ with tab1:
     if st.button("🚀 Traduire le texte", use_container_width=True):
         if not input_text.strip():
             st.error("⚠️ Veuillez entrer du texte à traduire")
-        elif source_lang == target_lang:
-            st.warning("⚠️ Les langues source et cible doivent être différentes")
-        else:
-            try:
-                with st.spinner("🔄 Traduction en cours..."):
-                    translated = text_translator.translate(
-                        input_text, source_lang, target_lang
-                    )
-                    translation_placeholder.text_area(
-                        "Résultat",
-                        value=translated,
-                        height=300,
-                        label_visibility="collapsed"
-                    )
-                st.success("✅ Traduction réussie!")
-            except Exception as e:
-                st.error(f"❌ Erreur: {str(e)}")
+        elif check_languages(source_lang, target_langs):
+            # Voie interactive : jamais bloquée derrière les documents des autres sessions
+            submit_job("text", functools.partial(
+                run_text_job, text=input_text, source_lang=source_lang,
+                target_langs=target_langs, profile=decoding_profile
+            ), name="texte", lane=INTERACTIVE)
+    
+    text_job = render_job_status("text")
+    if text_job is not None:
+        if text_job.status == DONE:
+            with translation_placeholder.container():
+                render_translations(text_job.result, "text")
+            st.success("✅ Traduction réussie!")
+        elif text_job.partial:
+            # Affichage progressif, fenêtre par fenêtre
+            translation_placeholder.text(text_job.partial)
 
 # ========== ONGLET IMAGE ==========
 with tab2:
     st.markdown("### 🖼️ Traduction depuis Image (OCR)")
-    st.markdown("Uploadez une image contenant du texte. Le texte sera extrait et traduit.")
+    st.markdown("Uploadez une ou plusieurs images contenant du texte (les TIFF multi-pages sont acceptés). Le texte sera extrait et traduit.")
     
-    uploaded_image = st.file_uploader(
-        "Choisir une image",
+    uploaded_images = st.file_uploader(
+        "Choisir des images",
         type=['png', 'jpg', 'jpeg', 'bmp', 'tiff'],
+        accept_multiple_files=True,
         help="Formats supportés: PNG, JPG, JPEG, BMP, TIFF"
     )
     
-    if uploaded_image:
+    if uploaded_images:
+        from PIL import Image
+        
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("#### 🖼️ Image Uploadée")
-            try:
-                image = Image.open(uploaded_image)
-                # استخدام use_column_width للتوافق مع جميع الإصدارات
+            st.markdown("#### 🖼️ Images Uploadées")
+            images = []
+            for uploaded_image in uploaded_images:
                 try:
-                    st.image(image, use_container_width=True)
-                except TypeError:
-                    st.image(image, use_column_width=True)
-            except Exception as e:
-                st.error(f"❌ Erreur lors du chargement de l'image: {str(e)}")
-                image = None
+                    image = Image.open(uploaded_image)
+                    # استخدام use_column_width للتوافق مع جميع الإصدارات
+                    try:
+                        st.image(image, caption=uploaded_image.name, use_container_width=True)
+                    except TypeError:
+                        st.image(image, caption=uploaded_image.name, use_column_width=True)
+                    images.append(image)
+                except Exception as e:
+                    st.error(f"❌ Erreur lors du chargement de l'image {uploaded_image.name}: {str(e)}")
         
         with col2:
             st.markdown("#### 📤 Texte Traduit")
             result_placeholder = st.empty()
         
-        if image and st.button("🔍 Extraire et Traduire", use_container_width=True):
-            if source_lang == target_lang:
-                st.warning("⚠️ Les langues source et cible doivent être différentes")
-            else:
-                try:
-                    with st.spinner("🔄 Extraction et traduction en cours..."):
-                        translated = image_translator.translate_image(
-                            image, source_lang, target_lang
-                        )
-                        result_placeholder.text_area(
-                            "Résultat",
-                            value=translated,
-                            height=300,
-                            label_visibility="collapsed"
-                        )
-                    st.success("✅ Image traduite avec succès!")
-                except Exception as e:
-                    st.error(f"❌ Erreur: {str(e)}")
-                    logger.error(f"Erreur détaillée: {str(e)}")
+        if images and st.button("🔍 Extraire et Traduire", use_container_width=True):
+            if check_languages(source_lang, target_langs):
+                submit_job("image", functools.partial(
+                    run_image_job, images=images, source_lang=source_lang,
+                    target_langs=target_langs, profile=decoding_profile
+                ), name=f"images ({len(images)})", lane=BATCH)
+        
+        image_job = render_job_status("image")
+        if image_job is not None and image_job.status == DONE:
+            with result_placeholder.container():
+                render_translations(image_job.result, "image")
+            st.success("✅ Images traduites avec succès!")
         
 # ========== ONGLET FICHIER ==========
 with tab3:
@@ -216,52 +504,71 @@ with tab3:
             for key, value in file_details.items():
                 st.write(f"**{key}:** {value}")
         
+        # Plage de pages (PDF uniquement, 0 = jusqu'à la fin)
+        page_range = None
+        if uploaded_file.name.lower().endswith(".pdf"):
+            page_col1, page_col2 = st.columns(2)
+            with page_col1:
+                first_page = st.number_input("Première page", min_value=1, value=1)
+            with page_col2:
+                last_page = st.number_input("Dernière page (0 = fin)", min_value=0, value=0)
+            page_range = (int(first_page), int(last_page))
+        
         if st.button("📖 Traduire le fichier", use_container_width=True):
-            if source_lang == target_lang:
-                st.warning("⚠️ Les langues source et cible doivent être différentes")
-            else:
-                try:
-                    with st.spinner("🔄 Extraction et traduction en cours..."):
-                        file_bytes = uploaded_file.read()
-                        file_ext = uploaded_file.name.split('.')[-1]
-                        
-                        original, translated = file_translator.translate_file(
-                            file_bytes, file_ext, source_lang, target_lang
-                        )
-                    
-                    st.success("✅ Fichier traduit avec succès!")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("#### 📥 Texte Original")
-                        st.text_area(
-                            "Original",
-                            value=original[:5000],  # Limiter l'affichage
-                            height=300,
-                            label_visibility="collapsed"
-                        )
-                    
-                    with col2:
-                        st.markdown("#### 📤 Traduction")
-                        st.text_area(
-                            "Traduit",
-                            value=translated[:5000],
-                            height=300,
-                            label_visibility="collapsed"
-                        )
-                    
-                    # Bouton de téléchargement
+            if check_languages(source_lang, target_langs):
+                # Copie par blocs, sur disque au-delà du seuil (pas de .read() complet) ;
+                # le fichier temporaire appartient au travail, qui le ferme
+                submit_job("file", functools.partial(
+                    run_file_job, file_source=spool_upload(uploaded_file),
+                    file_name=uploaded_file.name, source_lang=source_lang,
+                    target_langs=target_langs, profile=decoding_profile, page_range=page_range
+                ), name=uploaded_file.name, lane=BATCH)
+        
+        file_job = render_job_status("file")
+        if file_job is not None and (file_job.status == DONE or file_job.partial):
+            file_result = file_job.result if file_job.status == DONE else file_job.partial
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("#### 📥 Texte Original")
+                st.text_area(
+                    "Original",
+                    value=file_result["original"][:5000],  # Limiter l'affichage
+                    height=300,
+                    label_visibility="collapsed"
+                )
+            
+            with col2:
+                st.markdown("#### 📤 Traduction")
+                render_translations(file_result["translated"], "file", max_chars=5000)
+        
+        if file_job is not None and file_job.status == DONE:
+            st.success("✅ Fichier traduit avec succès!")
+            
+            # Boutons de téléchargement, par langue cible
+            translations = file_job.result["translated"]
+            base_name = file_job.name.split('.')[0]
+            for lang, translated in translations.items():
+                suffix = file_suffix(lang, translations)
+                label = f" ({LANGUAGE_NAMES.get(lang, lang)})" if suffix else ""
+                if file_job.result["docx"] is not None:
                     st.download_button(
-                        label="💾 Télécharger la traduction",
-                        data=translated,
-                        file_name=f"translated_{uploaded_file.name.split('.')[0]}.txt",
-                        mime="text/plain",
+                        label=f"💾 Télécharger le DOCX traduit{label}",
+                        data=file_job.result["docx"][lang],
+                        file_name=f"translated_{base_name}{suffix}.docx",
+                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                        key=f"download_docx_{lang}",
                         use_container_width=True
                     )
-                    
-                except Exception as e:
-                    st.error(f"❌ Erreur: {str(e)}")
+                st.download_button(
+                    label=f"💾 Télécharger la traduction (texte){label}",
+                    data=translated,
+                    file_name=f"translated_{base_name}{suffix}.txt",
+                    mime="text/plain",
+                    key=f"download_file_{lang}",
+                    use_container_width=True
+                )
 
 # ========== ONGLET AUDIO ==========
 with tab4:
@@ -288,57 +595,45 @@ with tab4:
                 st.write(f"**{key}:** {value}")
         
         if st.button("🎧 Transcrire et Traduire", use_container_width=True):
-            if source_lang == target_lang:
-                st.warning("⚠️ Les langues source et cible doivent être différentes")
-            else:
-                try:
-                    with st.spinner("🔄 Transcription et traduction en cours... (peut prendre quelques instants)"):
-                        audio_bytes = uploaded_audio.read()
-                        audio_format = uploaded_audio.name.split('.')[-1]
-                        
-                        # Transcription
-                        transcribed = audio_translator.transcribe_audio(
-                            audio_bytes, audio_format, source_lang
-                        )
-                        
-                        # Traduction
-                        translated = text_translator.translate(
-                            transcribed, source_lang, target_lang
-                        )
-                    
-                    st.success("✅ Audio transcrit et traduit avec succès!")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("#### 🎤 Transcription")
-                        st.text_area(
-                            "Transcrit",
-                            value=transcribed,
-                            height=200,
-                            label_visibility="collapsed"
-                        )
-                    
-                    with col2:
-                        st.markdown("#### 📤 Traduction")
-                        st.text_area(
-                            "Traduit",
-                            value=translated,
-                            height=200,
-                            label_visibility="collapsed"
-                        )
-                    
-                    # Bouton de téléchargement
-                    st.download_button(
-                        label="💾 Télécharger la traduction",
-                        data=translated,
-                        file_name=f"translated_{uploaded_audio.name.split('.')[0]}.txt",
-                        mime="text/plain",
-                        use_container_width=True
-                    )
-                    
-                except Exception as e:
-                    st.error(f"❌ Erreur: {str(e)}")
+            if check_languages(source_lang, target_langs):
+                submit_job("audio", functools.partial(
+                    run_audio_job, audio_source=spool_upload(uploaded_audio),
+                    audio_format=uploaded_audio.name.split('.')[-1], source_lang=source_lang,
+                    target_langs=target_langs, profile=decoding_profile
+                ), name=uploaded_audio.name, lane=BATCH)
+        
+        audio_job = render_job_status("audio")
+        if audio_job is not None and audio_job.status == DONE:
+            st.success("✅ Audio transcrit et traduit avec succès!")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("#### 🎤 Transcription")
+                st.text_area(
+                    "Transcrit",
+                    value=audio_job.result["transcribed"],
+                    height=200,
+                    label_visibility="collapsed"
+                )
+            
+            with col2:
+                st.markdown("#### 📤 Traduction")
+                render_translations(audio_job.result["translated"], "audio", height=200)
+            
+            # Boutons de téléchargement, par langue cible
+            translations = audio_job.result["translated"]
+            for lang, translated in translations.items():
+                suffix = file_suffix(lang, translations)
+                label = f" ({LANGUAGE_NAMES.get(lang, lang)})" if suffix else ""
+                st.download_button(
+                    label=f"💾 Télécharger la traduction{label}",
+                    data=translated,
+                    file_name=f"translated_{audio_job.name.split('.')[0]}{suffix}.txt",
+                    mime="text/plain",
+                    key=f"download_audio_{lang}",
+                    use_container_width=True
+                )
 
 # Footer
 st.markdown("---")
@@ -347,3 +642,8 @@ st.markdown("""
     <p><strong>🌍 Translator AH</strong> - Traduction multilingue intelligente</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Rafraîchissement de la page tant qu'un travail de la session est en cours
+if any(not job.finished for job in st.session_state.jobs.values()):
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
\ No newline at end of file
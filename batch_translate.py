@@ -0,0 +1,208 @@
+"""
+TRANSLATOR PRO - Traduction par lots en ligne de commande
+
+Parcourt un répertoire de documents (TXT, PDF, DOCX), les traduit avec
+plusieurs processus (chacun avec son propre cache de modèles) et écrit les
+traductions dans une arborescence miroir. Un manifeste permet de reprendre
+un traitement interrompu sans refaire les fichiers terminés.
+
+Usage:
+    python batch_translate.py documents/ traductions/ --source fr --target en --workers 4
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger("batch_translate")
+
+SUPPORTED_EXTENSIONS = ("txt", "pdf", "docx")
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def _init_worker(threads: int, log_level: int):
+    """Initialise un processus : threads de calcul partagés entre les workers"""
+    logging.basicConfig(level=log_level)
+    # Lu par l'ordonnanceur d'inférence à son import : un generate à la fois
+    # par processus, avec la part de cœurs du processus
+    os.environ["TRANSLATOR_INFERENCE_CONCURRENCY"] = "1"
+    os.environ["TRANSLATOR_INFERENCE_THREADS"] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+
+def _translate_one(input_path: str, output_path: str,
+                   source_lang: str, target_lang: str, profile: str) -> Dict:
+    """Traduit un fichier dans un processus worker"""
+    from utils.file_translator import file_translator
+
+    start = time.perf_counter()
+    file_type = os.path.splitext(input_path)[1]
+
+    # Lecture en flux depuis le disque et écriture atomique au fil de l'eau :
+    # la mémoire ne dépend pas de la taille du fichier
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = output_path + ".part"
+    sentences = 0
+    first_line = True
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for original, lines in file_translator.translate_file_stream(
+            input_path, file_type, source_lang, target_lang, profile=profile
+        ):
+            sentences += sum(1 for s in file_translator.translator.split_into_sentences(original)
+                             if s.strip())
+            for line in lines:
+                if not first_line:
+                    f.write("\n")
+                f.write(line)
+                first_line = False
+    os.replace(tmp_path, output_path)
+
+    return {"sentences": sentences, "seconds": time.perf_counter() - start}
+
+
+def find_documents(input_dir: str, extensions=SUPPORTED_EXTENSIONS,
+                   exclude_dir: str = None) -> List[str]:
+    """Chemins relatifs des documents à traduire, triés"""
+    exclude_dir = os.path.abspath(exclude_dir) if exclude_dir else None
+    documents = []
+    for root, dirs, files in os.walk(input_dir):
+        # La sortie peut être placée dans l'entrée : on ne retraduit pas les traductions
+        dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != exclude_dir]
+        for name in files:
+            if name.rsplit(".", 1)[-1].lower() in extensions:
+                documents.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return sorted(documents)
+
+
+def load_manifest(path: str) -> Dict[str, Dict]:
+    """Dernier état connu de chaque fichier (le manifeste est en ajout seul)"""
+    entries: Dict[str, Dict] = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Dernière ligne tronquée par une interruption
+                continue
+            entries[entry["path"]] = entry
+    return entries
+
+
+def file_signature(path: str) -> Tuple[int, float]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime
+
+
+def output_path_for(output_dir: str, rel_path: str, target_lang: str) -> str:
+    """rapport/annuel.pdf → <sortie>/rapport/annuel.pdf.en.txt"""
+    return os.path.join(output_dir, f"{rel_path}.{target_lang}.txt")
+
+
+def run(args) -> Dict:
+    """Traduit le répertoire et renvoie le résumé"""
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+
+    pending, skipped = [], 0
+    for rel_path in find_documents(args.input_dir, exclude_dir=args.output_dir):
+        input_path = os.path.join(args.input_dir, rel_path)
+        output_path = output_path_for(args.output_dir, rel_path, args.target)
+        size, mtime = file_signature(input_path)
+        entry = manifest.get(rel_path)
+        if (entry and entry.get("status") == "done" and entry.get("size") == size
+                and entry.get("mtime") == mtime and entry.get("target") == args.target
+                and entry.get("profile") == args.profile
+                and os.path.exists(output_path)):
+            skipped += 1
+            continue
+        pending.append((rel_path, input_path, output_path, size, mtime))
+
+    logger.info(f"📂 {len(pending)} fichiers à traduire, {skipped} déjà traduits")
+
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    summary = {"done": 0, "failed": 0, "skipped": skipped, "sentences": 0, "failures": []}
+    start = time.perf_counter()
+
+    with open(manifest_path, "a", encoding="utf-8") as manifest_file, \
+            ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                initargs=(threads, logging.getLogger().level)) as executor:
+        futures = {
+            executor.submit(_translate_one, input_path, output_path,
+                            args.source, args.target, args.profile): (rel_path, size, mtime)
+            for rel_path, input_path, output_path, size, mtime in pending
+        }
+        try:
+            for future in as_completed(futures):
+                rel_path, size, mtime = futures[future]
+                entry = {"path": rel_path, "size": size, "mtime": mtime,
+                         "source": args.source, "target": args.target,
+                         "profile": args.profile}
+                try:
+                    entry.update(status="done", **future.result())
+                    summary["done"] += 1
+                    summary["sentences"] += entry["sentences"]
+                    logger.info(f"✅ {rel_path} ({entry['seconds']:.1f}s)")
+                except Exception as e:
+                    entry.update(status="failed", error=str(e))
+                    summary["failed"] += 1
+                    summary["failures"].append(rel_path)
+                    logger.error(f"❌ {rel_path}: {str(e)}")
+
+                manifest_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                manifest_file.flush()
+        except KeyboardInterrupt:
+            logger.warning("⏹️ Interruption : les fichiers terminés sont conservés")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    elapsed = time.perf_counter() - start
+    summary["seconds"] = elapsed
+    summary["files_per_minute"] = summary["done"] * 60 / elapsed if elapsed else 0.0
+    summary["sentences_per_second"] = summary["sentences"] / elapsed if elapsed else 0.0
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traduction par lots de documents TXT, PDF et DOCX")
+    parser.add_argument("input_dir", help="Répertoire des documents à traduire")
+    parser.add_argument("output_dir", help="Répertoire des traductions (arborescence miroir)")
+    parser.add_argument("--source", required=True, help="Langue source (fr, en, ar, es, de, it)")
+    parser.add_argument("--target", required=True, help="Langue cible")
+    parser.add_argument("--profile", default=None,
+                        help="Profil de décodage (fast, balanced, quality)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Nombre de processus de traduction")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    if args.source == args.target:
+        parser.error("Les langues source et cible doivent être différentes")
+
+    summary = run(args)
+
+    print(f"📊 Fichiers traduits : {summary['done']} "
+          f"(déjà faits : {summary['skipped']}, échecs : {summary['failed']})")
+    print(f"⏱️ Durée : {summary['seconds']:.1f}s — "
+          f"{summary['files_per_minute']:.1f} fichiers/min, "
+          f"{summary['sentences_per_second']:.1f} phrases/s")
+    for path in summary["failures"]:
+        print(f"❌ {path}")
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Outils de mesure de performance de Translator Pro
+"""
@@ -0,0 +1,141 @@
+"""
+Mémoire et temps du décodage audio : ancien chemin (fichier temporaire)
+contre chemin en mémoire
+
+Un WAV synthétique (bips et silences) est généré, puis chaque variante
+est exécutée dans un sous-processus pour mesurer son pic de RSS. La
+reconnaissance est remplacée par un moteur local.
+
+Usage:
+    python -m benchmarks.audio_memory --minutes 30
+"""
+import argparse
+import array
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+from benchmarks.common import peak_rss_mb
+
+FRAME_RATE = 16000
+
+
+def write_synthetic_wav(path: str, minutes: float, frame_rate: int = FRAME_RATE,
+                        channels: int = 1):
+    """Écrit un WAV 16 bits : 4 s de tonalité puis 1 s de silence, en boucle"""
+    tone = array.array("h", (
+        int(8000 * math.sin(2 * math.pi * 440 * i / frame_rate))
+        for i in range(frame_rate * 4) for _ in range(channels)
+    )).tobytes()
+    silence = bytes(2 * channels * frame_rate)
+    cycles = int(minutes * 60 / 5)
+
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(frame_rate)
+        for _ in range(cycles):
+            wav_file.writeframes(tone)
+            wav_file.writeframes(silence)
+
+
+def run_legacy(audio_bytes: bytes, audio_format: str) -> int:
+    """Ancien chemin : décodage, export WAV, copie, fichier temporaire, relecture"""
+    import speech_recognition as sr
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format=audio_format)
+    audio = audio.set_channels(1).set_frame_rate(16000)
+    wav_io = io.BytesIO()
+    audio.export(wav_io, format="wav")
+    wav_io.seek(0)
+    wav_bytes = wav_io.read()
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+        tmp_file.write(wav_bytes)
+        tmp_path = tmp_file.name
+    try:
+        with sr.AudioFile(tmp_path) as source:
+            recorded = sr.Recognizer().record(source)
+    finally:
+        os.unlink(tmp_path)
+    return len(recorded.frame_data)
+
+
+def run_inmemory(audio_bytes: bytes, audio_format: str) -> int:
+    """Nouveau chemin : AudioData construits sur les trames PCM en mémoire"""
+    from utils.audio_translator import AudioTranslator
+    from utils.speech_recognizers import StubSpeechRecognizer
+
+    translator = AudioTranslator(recognizer=StubSpeechRecognizer())
+    audio = translator.load_audio(audio_bytes, audio_format)
+    chunks = [translator.to_audio_data(audio, start, end)
+              for start, end in translator.split_on_silence(audio)]
+    return sum(len(chunk.frame_data) for chunk in chunks)
+
+
+VARIANTS = {"legacy": run_legacy, "inmemory": run_inmemory}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--stereo-44k", action="store_true",
+                        help="Entrée stéréo 44,1 kHz (force le ré-encodage)")
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        with open(args.input, "rb") as f:
+            audio_bytes = f.read()
+        baseline_rss = peak_rss_mb()
+        start = time.perf_counter()
+        pcm_bytes = VARIANTS[args.worker](audio_bytes, "wav")
+        print(json.dumps({
+            "variant": args.worker,
+            "wall_seconds": time.perf_counter() - start,
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_over_input_mb": peak_rss_mb() - baseline_rss,
+            "pcm_bytes": pcm_bytes,
+        }))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "synthetic.wav")
+        if args.stereo_44k:
+            write_synthetic_wav(path, args.minutes, frame_rate=44100, channels=2)
+        else:
+            write_synthetic_wav(path, args.minutes)
+        input_mb = os.path.getsize(path) / (1024 * 1024)
+
+        results = {}
+        for variant in VARIANTS:
+            cmd = [sys.executable, "-m", "benchmarks.audio_memory",
+                   "--worker", variant, "--input", path]
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"❌ Variante {variant} en échec:\n{proc.stderr}", file=sys.stderr)
+                continue
+            results[variant] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    report = json.dumps({
+        "minutes": args.minutes,
+        "input_mb": input_mb,
+        "results": results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Fonctions communes aux benchmarks (corpus, mémoire, latences, BLEU)
+"""
+from collections import Counter
+from typing import Dict, List
+import math
+import os
+import resource
+import sys
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def load_corpus(name: str = "fr.txt") -> List[str]:
+    """Charge un corpus de référence (une phrase par ligne)"""
+    with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus courant (Mo)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sur macOS, en kilo-octets sur Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentiles(values: List[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """Percentiles (méthode du rang le plus proche)"""
+    if not values:
+        return {f"p{p}": 0.0 for p in points}
+    ordered = sorted(values)
+    result = {}
+    for p in points:
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        result[f"p{p}"] = ordered[rank - 1]
+    return result
+
+
+def _ngrams(tokens: List[str], n: int) -> Counter:
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def corpus_bleu(hypotheses: List[str], references: List[str], max_n: int = 4) -> float:
+    """BLEU de corpus (0-100), tokenisation par espaces, une référence par phrase"""
+    matches = [0] * max_n
+    totals = [0] * max_n
+    hyp_len = ref_len = 0
+
+    for hyp, ref in zip(hypotheses, references):
+        hyp_tokens, ref_tokens = hyp.split(), ref.split()
+        hyp_len += len(hyp_tokens)
+        ref_len += len(ref_tokens)
+        for n in range(1, max_n + 1):
+            hyp_ngrams = _ngrams(hyp_tokens, n)
+            ref_ngrams = _ngrams(ref_tokens, n)
+            matches[n - 1] += sum((hyp_ngrams & ref_ngrams).values())
+            totals[n - 1] += max(len(hyp_tokens) - n + 1, 0)
+
+    if hyp_len == 0 or min(matches) == 0:
+        return 0.0
+
+    log_precision = sum(math.log(m / t) for m, t in zip(matches, totals)) / max_n
+    brevity = 1.0 if hyp_len > ref_len else math.exp(1 - ref_len / hyp_len)
+    return 100 * brevity * math.exp(log_precision)
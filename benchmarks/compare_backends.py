@@ -0,0 +1,103 @@
+"""
+Comparaison des backends d'inférence (torch fp32, int8, ONNX Runtime)
+
+Chaque backend est mesuré dans un sous-processus séparé pour isoler la
+mémoire résidente : latence par phrase, débit par lots, pic de RSS et
+dérive BLEU par rapport aux traductions fp32 sur un corpus fixe.
+
+Usage:
+    python -m benchmarks.compare_backends --pair fr-en --backends torch int8 onnx
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.common import corpus_bleu, load_corpus, peak_rss_mb, percentiles
+
+
+def run_worker(backend: str, pair: str, corpus: str, runs: int) -> Dict:
+    """Mesure un backend dans le processus courant"""
+    from models.model_cache import ModelCache
+    from models.translation_memory import TranslationMemory
+    from utils.text_translator import TextTranslator
+
+    source_lang, target_lang = pair.split("-")
+    sentences = load_corpus(corpus)
+
+    translator = TextTranslator()
+    translator.cache = ModelCache(backend_mapping={pair: backend})
+    translator.memory = TranslationMemory(enabled=False)
+
+    start = time.perf_counter()
+    translator.cache.load_model(source_lang, target_lang)
+    load_seconds = time.perf_counter() - start
+
+    # Latence : une phrase par appel
+    latencies: List[float] = []
+    for _ in range(runs):
+        for sentence in sentences:
+            start = time.perf_counter()
+            translator.translate_segments([sentence], source_lang, target_lang)
+            latencies.append(time.perf_counter() - start)
+
+    # Débit : tout le corpus en lots
+    start = time.perf_counter()
+    for _ in range(runs):
+        translations = translator.translate_segments(sentences, source_lang, target_lang)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "latency_seconds": percentiles(latencies),
+        "sentences_per_second": len(sentences) * runs / batch_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "translations": translations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pair", default="fr-en")
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--corpus", default="fr.txt")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.pair, args.corpus, args.runs)))
+        return
+
+    env = dict(os.environ, TRANSLATOR_TM_ENABLED="0")
+    results = {}
+    for backend in args.backends:
+        cmd = [sys.executable, "-m", "benchmarks.compare_backends", "--worker", backend,
+               "--pair", args.pair, "--corpus", args.corpus, "--runs", str(args.runs)]
+        proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+        if proc.returncode != 0:
+            print(f"❌ Backend {backend} en échec:\n{proc.stderr}", file=sys.stderr)
+            continue
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # Dérive BLEU par rapport à la référence fp32
+    reference = results.get("torch", {}).get("translations")
+    for result in results.values():
+        translations = result.pop("translations")
+        if reference is not None:
+            result["bleu_vs_fp32"] = corpus_bleu(translations, reference)
+
+    report = json.dumps({"pair": args.pair, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
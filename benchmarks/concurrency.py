@@ -0,0 +1,147 @@
+"""
+Utilisateurs simultanés : débit agrégé et latence p95, avec ou sans
+ordonnanceur d'inférence
+
+Chaque utilisateur simulé est un thread qui enchaîne de courtes traductions
+(un paragraphe du corpus). La variante « unscheduled » reproduit l'ancien
+comportement : generate sans limite de concurrence, avec tous les threads
+de calcul et sans mode inférence. « scheduled » passe par l'ordonnanceur
+configuré par l'environnement (TRANSLATOR_INFERENCE_CONCURRENCY,
+TRANSLATOR_INFERENCE_THREADS). Chaque mesure s'exécute dans un processus neuf.
+
+Usage:
+    python -m benchmarks.concurrency --tiny
+    python -m benchmarks.concurrency --users 1 4 16 --requests 8
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.common import load_corpus, percentiles
+
+DEFAULT_MODEL_DIR = os.path.join(tempfile.gettempdir(), "translator-pro-tiny-marian")
+
+VARIANTS = ("unscheduled", "scheduled")
+SENTENCES_PER_REQUEST = 5
+
+
+class _Unscheduled:
+    """Ancien comportement : ni file d'attente, ni part de cœurs, ni mode inférence"""
+
+    def slot(self):
+        return contextlib.nullcontext()
+
+
+def run_worker(variant: str, users: int, requests: int, pair: str, tiny_dir: str) -> Dict:
+    """Lance les utilisateurs simulés dans le processus courant"""
+    import torch
+    from models.inference_scheduler import available_cores, inference_scheduler
+    from models.model_cache import model_cache
+    from utils.text_translator import text_translator
+
+    if tiny_dir:
+        from benchmarks.tiny_model import install_tiny_model
+        install_tiny_model(model_cache, tiny_dir)
+    if variant == "unscheduled":
+        text_translator.scheduler = _Unscheduled()
+        torch.set_num_threads(available_cores())
+
+    sentences = load_corpus("fr.txt")
+    paragraphs = [" ".join(sentences[i:i + SENTENCES_PER_REQUEST])
+                  for i in range(0, len(sentences), SENTENCES_PER_REQUEST)]
+    source_lang, target_lang = pair.split("-")
+    # Chauffe : chargement du modèle hors mesure
+    text_translator.translate(paragraphs[0], source_lang, target_lang, profile="fast")
+
+    latencies: List[float] = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(users)
+
+    def user(index: int):
+        start_barrier.wait()
+        for request in range(requests):
+            text = paragraphs[(index * requests + request) % len(paragraphs)]
+            start = time.perf_counter()
+            text_translator.translate(text, source_lang, target_lang, profile="fast")
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=user, args=(index,)) for index in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    return {
+        "variant": variant,
+        "users": users,
+        "requests": len(latencies),
+        "wall_seconds": wall,
+        "requests_per_second": len(latencies) / wall,
+        "sentences_per_second": len(latencies) * SENTENCES_PER_REQUEST / wall,
+        "latency_seconds": percentiles(latencies),
+        "scheduler": inference_scheduler.stats() if variant == "scheduled" else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=4,
+                        help="Traductions enchaînées par utilisateur")
+    parser.add_argument("--pair", default="fr-en")
+    parser.add_argument("--tiny", action="store_true",
+                        help="Petit modèle local au lieu des modèles Hugging Face")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--worker", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-users", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    tiny_dir = args.model_dir if args.tiny else ""
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.worker_users, args.requests,
+                                    args.pair, tiny_dir)))
+        return
+
+    env = dict(os.environ, TRANSLATOR_TM_ENABLED="0")
+    if args.tiny:
+        from benchmarks.tiny_model import build_tiny_model
+        build_tiny_model(args.model_dir)
+        env.update(HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1",
+                   TRANSLATOR_MODEL_STORE_ENABLED="0")
+
+    results: Dict[str, Dict] = {}
+    for users in args.users:
+        entry = results.setdefault(str(users), {})
+        for variant in VARIANTS:
+            cmd = [sys.executable, "-m", "benchmarks.concurrency", "--worker", variant,
+                   "--worker-users", str(users), "--requests", str(args.requests),
+                   "--pair", args.pair, "--model-dir", args.model_dir]
+            if args.tiny:
+                cmd.append("--tiny")
+            proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+            if proc.returncode != 0:
+                print(f"❌ Variante {variant} ({users} utilisateurs) en échec:\n{proc.stderr}",
+                      file=sys.stderr)
+                continue
+            entry[variant] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    report = json.dumps({"cpu_count": os.cpu_count(), "users": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
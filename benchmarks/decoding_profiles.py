@@ -0,0 +1,94 @@
+"""
+Compromis latence / qualité des profils de décodage (fast, balanced, quality)
+
+Chaque profil traduit le même corpus : latence par phrase, débit par lots,
+longueur moyenne générée et BLEU. Sans traductions de référence, le BLEU
+est calculé par rapport au profil « quality ».
+
+Usage:
+    python -m benchmarks.decoding_profiles --pair fr-en
+    python -m benchmarks.decoding_profiles --references en.txt
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+
+from benchmarks.common import corpus_bleu, load_corpus, percentiles
+
+
+def run_profile(translator, profile: str, sentences: List[str],
+                source_lang: str, target_lang: str, runs: int) -> Dict:
+    """Mesure un profil sur le corpus"""
+    # Chauffe : chargement du modèle hors mesure
+    translator.translate_segments(sentences[:1], source_lang, target_lang, profile=profile)
+
+    latencies: List[float] = []
+    for _ in range(runs):
+        for sentence in sentences:
+            start = time.perf_counter()
+            translator.translate_segments([sentence], source_lang, target_lang,
+                                          profile=profile)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        translations = translator.translate_segments(sentences, source_lang, target_lang,
+                                                     profile=profile)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "latency_seconds": percentiles(latencies),
+        "sentences_per_second": len(sentences) * runs / batch_seconds,
+        "avg_output_words": sum(len(t.split()) for t in translations) / len(translations),
+        "translations": translations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pair", default="fr-en")
+    parser.add_argument("--profiles", nargs="+", default=["fast", "balanced", "quality"])
+    parser.add_argument("--corpus", default="fr.txt")
+    parser.add_argument("--references", help="Traductions de référence (une par ligne)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    # Chaque mesure doit passer par le modèle
+    os.environ["TRANSLATOR_TM_ENABLED"] = "0"
+    from utils.text_translator import text_translator
+
+    source_lang, target_lang = args.pair.split("-")
+    sentences = load_corpus(args.corpus)
+
+    results = {
+        profile: run_profile(text_translator, profile, sentences,
+                             source_lang, target_lang, args.runs)
+        for profile in args.profiles
+    }
+
+    if args.references:
+        with open(args.references, encoding="utf-8") as f:
+            references = [line.strip() for line in f if line.strip()]
+        bleu_key = "bleu"
+    else:
+        references = results.get("quality", {}).get("translations")
+        bleu_key = "bleu_vs_quality"
+
+    for result in results.values():
+        translations = result.pop("translations")
+        if references is not None:
+            result[bleu_key] = corpus_bleu(translations, references)
+
+    report = json.dumps({"pair": args.pair, "sentences": len(sentences),
+                         "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
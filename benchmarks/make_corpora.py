@@ -0,0 +1,180 @@
+"""
+Génération déterministe des corpus synthétiques des benchmarks
+
+Les fichiers TXT, PDF, DOCX et WAV sont écrits sans dépendance externe et
+versionnés dans benchmarks/corpus ; l'image est rendue avec Pillow.
+Un fichier existant n'est jamais réécrit.
+
+Usage:
+    python -m benchmarks.make_corpora
+"""
+import array
+import math
+import os
+import wave
+import zipfile
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+from benchmarks.common import CORPUS_DIR, load_corpus
+
+# Le document de référence : le corpus fixe répété sur plusieurs pages
+PAGES = 6
+SENTENCES_PER_PAGE = 10
+
+
+def document_pages() -> List[List[str]]:
+    """Pages du document synthétique (avec en-tête et numéro de page)"""
+    sentences = load_corpus("fr.txt")
+    pages = []
+    for page in range(PAGES):
+        body = [sentences[(page * SENTENCES_PER_PAGE + i) % len(sentences)]
+                for i in range(SENTENCES_PER_PAGE)]
+        pages.append(["Rapport annuel - Document confidentiel", *body, f"Page {page + 1}"])
+    return pages
+
+
+def write_txt(path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join("\n".join(lines) for lines in document_pages()))
+
+
+def _pdf_string(text: str) -> str:
+    encoded = text.encode("cp1252", errors="replace").decode("latin-1")
+    return "(" + encoded.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def write_pdf(path: str):
+    """PDF texte minimal (Helvetica, WinAnsiEncoding), une page par page du document"""
+    pages = document_pages()
+    objects: Dict[int, bytes] = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    kids = []
+    for index, lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * index, 5 + 2 * index
+        kids.append(f"{page_id} 0 R")
+        stream = "BT /F1 11 Tf 14 TL 50 780 Td " + " ".join(
+            f"{_pdf_string(line)} Tj T*" for line in lines
+        ) + " ET"
+        data = stream.encode("latin-1")
+        objects[content_id] = (f"<< /Length {len(data)} >>\nstream\n".encode()
+                               + data + b"\nendstream")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> "
+                            f"/Contents {content_id} 0 R >>").encode()
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n".encode() + objects[obj_id] + b"\nendobj\n"
+    xref = len(out)
+    count = max(objects) + 1
+    out += f"xref\n0 {count}\n0000000000 65535 f \n".encode()
+    for obj_id in range(1, count):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+_DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+_DOCX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+
+def _docx_paragraph(text: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def write_docx(path: str):
+    """DOCX minimal : paragraphes du document et un tableau de synthèse"""
+    body = []
+    for lines in document_pages():
+        body.extend(_docx_paragraph(line) for line in lines)
+    sentences = load_corpus("fr.txt")
+    rows = "".join(
+        "<w:tr>" + "".join(f"<w:tc>{_docx_paragraph(cell)}</w:tc>" for cell in row) + "</w:tr>"
+        for row in zip(sentences[:4], sentences[4:8])
+    )
+    # Propriétés et grille de colonnes : obligatoires en OOXML
+    grid = '<w:gridCol w:w="4500"/>' * 2
+    body.append('<w:tbl><w:tblPr><w:tblW w:w="0" w:type="auto"/></w:tblPr>'
+                f'<w:tblGrid>{grid}</w:tblGrid>{rows}</w:tbl>')
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(body)}</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        docx.writestr("_rels/.rels", _DOCX_RELS)
+        docx.writestr("word/document.xml", document)
+
+
+def write_wav(path: str, seconds: int = 6, frame_rate: int = 16000):
+    """Audio mono 16 kHz : 1,5 s de tonalité puis 0,5 s de silence, en boucle"""
+    tone = array.array("h", (
+        int(6000 * math.sin(2 * math.pi * 330 * i / frame_rate))
+        for i in range(int(frame_rate * 1.5))
+    )).tobytes()
+    silence = bytes(2 * frame_rate // 2)
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(frame_rate)
+        for _ in range(seconds // 2):
+            wav_file.writeframes(tone + silence)
+
+
+def write_png(path: str):
+    """Page de texte rendue en noir sur blanc (nécessite Pillow)"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    lines = document_pages()[0]
+    try:
+        font = ImageFont.load_default(size=28)
+    except TypeError:
+        font = ImageFont.load_default()
+    image = Image.new("L", (1600, 60 + 44 * len(lines)), color=255)
+    draw = ImageDraw.Draw(image)
+    for index, line in enumerate(lines):
+        draw.text((40, 30 + 44 * index), line, fill=0, font=font)
+    image.save(path)
+
+
+WRITERS = {
+    "sample.txt": write_txt,
+    "sample.pdf": write_pdf,
+    "sample.docx": write_docx,
+    "sample.wav": write_wav,
+    "sample.png": write_png,
+}
+
+
+def ensure_corpora() -> Dict[str, str]:
+    """Génère les fichiers manquants et renvoie leurs chemins"""
+    paths = {}
+    for name, writer in WRITERS.items():
+        path = os.path.join(CORPUS_DIR, name)
+        if not os.path.exists(path):
+            writer(path)
+        paths[name] = path
+    return paths
+
+
+if __name__ == "__main__":
+    for name, path in ensure_corpora().items():
+        print(f"{name}: {os.path.getsize(path)} octets")
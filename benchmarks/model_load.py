@@ -0,0 +1,122 @@
+"""
+Chargement à froid et à chaud des modèles : Hugging Face contre magasin local
+
+Chaque variante s'exécute dans un processus neuf : chargement direct par
+from_pretrained (comportement historique) ou depuis un instantané du
+magasin, poids projetés en mémoire. Pour chaque paire : durée du
+chargement à froid, premier generate, generate à chaud, rechargement
+depuis le cache, pic de RSS et, sous Linux, RSS anonyme (poids copiés)
+contre RSS de fichiers (poids projetés). --backend int8 mesure la
+quantification, qui doit laisser les embeddings projetés.
+
+Usage:
+    python -m benchmarks.model_load --tiny
+    python -m benchmarks.model_load --pairs fr-en en-fr
+    python -m benchmarks.model_load --tiny --backend int8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import peak_rss_mb
+
+DEFAULT_MODEL_DIR = os.path.join(tempfile.gettempdir(), "translator-pro-tiny-marian")
+
+VARIANTS = ("hub", "store")
+
+
+def rss_breakdown_mb() -> dict:
+    """RSS anonyme et RSS de fichiers projetés du processus courant (Mo, Linux)"""
+    breakdown = {}
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(("RssAnon:", "RssFile:")):
+                    name, value = line.split(":", 1)
+                    breakdown[f"{name.lower()}_mb"] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return breakdown
+
+
+def run_worker(variant: str, pair: str, tiny_dir: str) -> dict:
+    """Chargement et préchauffage d'une paire dans le processus courant"""
+    from models.model_cache import ModelCache
+
+    cache = ModelCache()
+    if tiny_dir:
+        from benchmarks.tiny_model import install_tiny_model
+        install_tiny_model(cache, tiny_dir)
+
+    report = cache.warmup([pair]).get(pair)
+    if report is None:
+        raise SystemExit(f"❌ Chargement de {pair} impossible")
+    source_lang, target_lang = pair.split("-")
+    start = time.perf_counter()
+    cache.load_model(source_lang, target_lang)
+    report["cached_load_seconds"] = time.perf_counter() - start
+    report["peak_rss_mb"] = peak_rss_mb()
+    report.update(rss_breakdown_mb())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pairs", nargs="+", default=["fr-en"])
+    parser.add_argument("--tiny", action="store_true",
+                        help="Petit modèle local aléatoire (hors ligne)")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--store-dir", help="Magasin à utiliser (défaut : temporaire)")
+    parser.add_argument("--backend", default="torch", help="Backend d'inférence (torch, int8)")
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--worker", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--pair", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    tiny_dir = args.model_dir if args.tiny else ""
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.pair, tiny_dir)))
+        return
+
+    if args.tiny:
+        from benchmarks.tiny_model import build_tiny_model
+        build_tiny_model(args.model_dir)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store_dir = args.store_dir or tmp_dir
+        base_env = dict(os.environ, TRANSLATOR_MODEL_STORE_DIR=store_dir,
+                        TRANSLATOR_TM_ENABLED="0", TRANSLATOR_BACKEND=args.backend)
+        if args.tiny:
+            base_env.update(HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1")
+
+        results = {}
+        for pair in args.pairs:
+            results[pair] = {}
+            # Le magasin est rempli avant la mesure : seul le chargement est comparé
+            runs = [("snapshot", "store"), ("hub", "hub"), ("store", "store")]
+            for label, variant in runs:
+                env = dict(base_env, TRANSLATOR_MODEL_STORE_ENABLED="1" if variant == "store" else "0")
+                cmd = [sys.executable, "-m", "benchmarks.model_load", "--worker", variant,
+                       "--pair", pair, "--model-dir", args.model_dir]
+                if args.tiny:
+                    cmd.append("--tiny")
+                proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+                if proc.returncode != 0:
+                    print(f"❌ Variante {label} ({pair}) en échec:\n{proc.stderr}", file=sys.stderr)
+                    continue
+                if label != "snapshot":
+                    results[pair][label] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    report = json.dumps({"backend": args.backend, "pairs": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
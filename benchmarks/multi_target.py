@@ -0,0 +1,107 @@
+"""
+Traduction d'un document vers plusieurs langues : une exécution par langue
+contre un seul travail multi-cibles
+
+La variante « sequential » appelle translate_file une fois par langue cible
+(extraction, découpage et passage vers le pivot refaits à chaque fois) ;
+« fanout » appelle translate_file_multi. Le cache d'extraction et la mémoire
+de traduction sont désactivés pour que chaque itération refasse tout le
+travail.
+
+Usage:
+    python -m benchmarks.multi_target --tiny
+    python -m benchmarks.multi_target --targets en es de --file rapport.pdf
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.common import percentiles
+
+DEFAULT_MODEL_DIR = os.path.join(tempfile.gettempdir(), "translator-pro-tiny-marian")
+
+
+def measure(run: Callable[[], object], iterations: int) -> Dict:
+    """Durées d'exécution (une exécution de chauffe, puis iterations)"""
+    run()
+    latencies: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+    return {"mean_seconds": sum(latencies) / len(latencies),
+            "latency_seconds": percentiles(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", default="fr")
+    parser.add_argument("--targets", nargs="+", default=["en", "es", "de", "it"])
+    parser.add_argument("--file", help="Document à traduire (défaut : sample.pdf du corpus)")
+    parser.add_argument("--profile", default="fast")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--tiny", action="store_true",
+                        help="Petit modèle local au lieu des modèles Hugging Face")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    os.environ["TRANSLATOR_TM_ENABLED"] = "0"
+    os.environ["TRANSLATOR_EXTRACT_CACHE_ENABLED"] = "0"
+    if args.tiny:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+        os.environ["TRANSLATOR_MODEL_STORE_ENABLED"] = "0"
+
+    from models.model_cache import model_cache
+    from utils.file_translator import file_translator
+    if args.tiny:
+        from benchmarks.tiny_model import install_tiny_model
+        install_tiny_model(model_cache, args.model_dir)
+    path = args.file
+    if path is None:
+        from benchmarks.make_corpora import ensure_corpora
+        path = ensure_corpora()["sample.pdf"]
+    file_type = path.rsplit(".", 1)[-1]
+
+    def single():
+        file_translator.translate_file(path, file_type, args.source, args.targets[0],
+                                       profile=args.profile)
+
+    def sequential():
+        for target in args.targets:
+            file_translator.translate_file(path, file_type, args.source, target,
+                                           profile=args.profile)
+
+    def fanout():
+        file_translator.translate_file_multi(path, file_type, args.source, args.targets,
+                                             profile=args.profile)
+
+    results = {name: measure(run, args.iterations)
+               for name, run in (("single", single), ("sequential", sequential),
+                                 ("fanout", fanout))}
+    single_seconds = results["single"]["mean_seconds"]
+    report = json.dumps({
+        "file": os.path.basename(path),
+        "targets": args.targets,
+        "routes": {target: [f"{src}-{tgt}" for src, tgt in
+                            model_cache.plan_route(args.source, target)]
+                   for target in args.targets},
+        "cpu_count": os.cpu_count(),
+        "results": results,
+        "speedup_vs_sequential": results["sequential"]["mean_seconds"]
+                                 / results["fanout"]["mean_seconds"],
+        "fanout_vs_n_single": results["fanout"]["mean_seconds"]
+                              / (single_seconds * len(args.targets)),
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
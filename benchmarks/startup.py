@@ -0,0 +1,77 @@
+"""
+Temps de démarrage de l'application Streamlit
+
+app.py est exécuté une fois sans interaction (mode « bare » de Streamlit)
+dans un processus neuf : on mesure la durée du premier rendu et on vérifie
+qu'aucune dépendance lourde n'a été importée. Tout dépassement du budget
+fait échouer l'exécution.
+
+Usage:
+    python -m benchmarks.startup --max-seconds 2.0
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Modules qui ne doivent être chargés qu'à la première utilisation d'un onglet
+HEAVY_MODULES = ("torch", "transformers", "pytesseract", "PyPDF2", "docx",
+                 "speech_recognition", "pydub")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, logging, runpy, sys, time
+logging.disable(logging.CRITICAL)
+start = time.perf_counter()
+runpy.run_path("app.py", run_name="__main__")
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"startup_seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+
+def measure_startup(runs: int) -> dict:
+    """Lance app.py dans des processus neufs et garde le meilleur temps"""
+    results = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, cwd=ROOT_DIR
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr)
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    return {
+        "startup_seconds": min(r["startup_seconds"] for r in results),
+        "heavy_modules": sorted({m for r in results for m in r["heavy_modules"]}),
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, default=2.0,
+                        help="Budget de démarrage")
+    args = parser.parse_args()
+
+    report = measure_startup(args.runs)
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if report["heavy_modules"]:
+        failures.append(f"modules lourds importés au démarrage: {', '.join(report['heavy_modules'])}")
+    if report["startup_seconds"] > args.max_seconds:
+        failures.append(f"démarrage {report['startup_seconds']:.2f}s > {args.max_seconds:.2f}s")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}", file=sys.stderr)
+        sys.exit(1)
+    print("✅ Démarrage dans le budget", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
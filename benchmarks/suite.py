@@ -0,0 +1,216 @@
+"""
+Benchmark hors ligne des quatre modalités de traduction
+
+Texte, fichiers (TXT, PDF, DOCX), image et audio sont traduits à partir des
+corpus synthétiques de benchmarks/corpus, avec un petit modèle Marian
+aléatoire et un moteur de reconnaissance vocale local. Le rapport JSON
+donne phrases/s, tokens/s, latences p50/p95/p99, démarrage à froid et pic
+de RSS ; comparé à une référence, toute régression fait échouer l'exécution.
+
+Usage:
+    python -m benchmarks.suite --save-baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.common import peak_rss_mb, percentiles
+
+DEFAULT_MODEL_DIR = os.path.join(tempfile.gettempdir(), "translator-pro-tiny-marian")
+
+# Transcription renvoyée par le moteur local pour l'audio synthétique
+STUB_TRANSCRIPT = ("Merci de votre message. Nous vous répondrons dans les plus brefs délais. "
+                   "La réunion de lundi est reportée à mercredi.")
+
+THROUGHPUT_KEYS = ("sentences_per_second", "tokens_per_second")
+LATENCY_KEYS = ("p50", "p95", "p99")
+
+
+def _configure_offline():
+    """Aucun accès réseau ni état persistant entre deux exécutions"""
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    os.environ["TRANSLATOR_TM_ENABLED"] = "0"
+    # Sinon chaque itération relirait l'extraction en cache au lieu de la mesurer
+    os.environ["TRANSLATOR_EXTRACT_CACHE_ENABLED"] = "0"
+    # Le petit modèle ne doit pas être figé dans le magasin de l'utilisateur
+    os.environ["TRANSLATOR_MODEL_STORE_ENABLED"] = "0"
+
+
+def build_scenarios(paths: Dict[str, str]) -> Dict[str, Dict]:
+    """Scénarios : fonction à mesurer et texte source (pour les compteurs)"""
+    from PIL import Image
+    from utils.audio_translator import audio_translator
+    from utils.file_translator import file_translator
+    from utils.image_translator import image_translator
+    from utils.speech_recognizers import StubSpeechRecognizer
+    from utils.text_translator import text_translator
+
+    audio_translator.speech_recognizer = StubSpeechRecognizer(text=STUB_TRANSCRIPT)
+
+    def read(name: str) -> bytes:
+        with open(paths[name], "rb") as f:
+            return f.read()
+
+    text = read("sample.txt").decode("utf-8")
+    scenarios = {
+        "text": {
+            "run": lambda: text_translator.translate(text, "fr", "en"),
+            "source": text,
+        },
+    }
+
+    for ext in ("txt", "pdf", "docx"):
+        file_bytes = read(f"sample.{ext}")
+        scenarios[f"file_{ext}"] = {
+            "run": lambda b=file_bytes, e=ext: file_translator.translate_file(b, e, "fr", "en"),
+            "source": lambda b=file_bytes, e=ext: file_translator.extract_text(b, e),
+        }
+
+    # Non-régression du parcours DOCX (tableau sans w:tblGrid) et de la réécriture
+    docx_bytes = read("sample.docx")
+    scenarios["docx_writeback"] = {
+        "run": lambda: file_translator.translate_docx(docx_bytes, "fr", "en"),
+        "source": lambda: file_translator.extract_text(docx_bytes, "docx"),
+    }
+
+    image = Image.open(paths["sample.png"])
+    image.load()
+    scenarios["image"] = {
+        "run": lambda: image_translator.translate_image(image, "fr", "en"),
+        "source": lambda: image_translator.extract_text(image, "fr"),
+    }
+
+    audio_bytes = read("sample.wav")
+    scenarios["audio"] = {
+        "run": lambda: audio_translator.translate_audio(audio_bytes, "wav", "fr", "en"),
+        "source": STUB_TRANSCRIPT,
+    }
+    return scenarios
+
+
+def count_units(text: str) -> Dict[str, int]:
+    """Nombre de phrases et de tokens source d'un texte"""
+    from models.model_cache import model_cache
+    from utils.text_translator import text_translator
+
+    sentences = [s for s in text_translator.split_into_sentences(text) if s.strip()]
+    _, tokenizer = model_cache.load_model("fr", "en")
+    tokens = sum(len(ids) for ids in tokenizer(sentences)["input_ids"]) if sentences else 0
+    return {"sentences": len(sentences), "tokens": tokens}
+
+
+def measure(run: Callable[[], object], iterations: int, units: Dict[str, int]) -> Dict:
+    """Mesure un scénario (une exécution de chauffe, puis iterations)"""
+    run()
+    latencies: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+
+    total = sum(latencies)
+    return {
+        **units,
+        "iterations": iterations,
+        "latency_seconds": percentiles(latencies),
+        "sentences_per_second": units["sentences"] * iterations / total if total else 0.0,
+        "tokens_per_second": units["tokens"] * iterations / total if total else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_suite(iterations: int, model_dir: str, only: List[str] = None) -> Dict:
+    """Exécute tous les scénarios et renvoie le rapport"""
+    _configure_offline()
+    from benchmarks.make_corpora import ensure_corpora
+    from benchmarks.tiny_model import install_tiny_model
+    from models.model_cache import model_cache
+    from utils.text_translator import text_translator
+
+    install_tiny_model(model_cache, model_dir)
+    paths = ensure_corpora()
+
+    # Démarrage à froid : chargement du modèle et première traduction
+    start = time.perf_counter()
+    text_translator.translate("Bonjour tout le monde.", "fr", "en")
+    cold_start = time.perf_counter() - start
+
+    report = {"cold_start_seconds": cold_start, "scenarios": {}, "errors": {}}
+    for name, scenario in build_scenarios(paths).items():
+        if only and name not in only:
+            continue
+        try:
+            source = scenario["source"]
+            units = count_units(source() if callable(source) else source)
+            report["scenarios"][name] = measure(scenario["run"], iterations, units)
+        except Exception as e:
+            # Ex: Tesseract absent ; le scénario est signalé, pas mesuré
+            report["errors"][name] = str(e)
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Liste des régressions par rapport à la référence"""
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = report["scenarios"].get(name)
+        if current is None:
+            regressions.append(f"{name}: scénario absent")
+            continue
+        for key in THROUGHPUT_KEYS:
+            if current[key] < base[key] * (1 - tolerance):
+                regressions.append(f"{name}.{key}: {current[key]:.2f} < {base[key]:.2f}")
+        for key in LATENCY_KEYS:
+            now, before = current["latency_seconds"][key], base["latency_seconds"][key]
+            if now > before * (1 + tolerance):
+                regressions.append(f"{name}.latency.{key}: {now:.4f}s > {before:.4f}s")
+
+    if "cold_start_seconds" in baseline:
+        limit = baseline["cold_start_seconds"] * (1 + tolerance)
+        if report["cold_start_seconds"] > limit:
+            regressions.append(f"cold_start: {report['cold_start_seconds']:.2f}s > {limit:.2f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--only", nargs="+", help="Scénarios à exécuter")
+    parser.add_argument("--output", help="Fichier JSON du rapport")
+    parser.add_argument("--baseline", help="Référence JSON à comparer")
+    parser.add_argument("--save-baseline", help="Enregistrer le rapport comme référence")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Écart relatif toléré avant régression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = run_suite(args.iterations, args.model_dir, args.only)
+    text = json.dumps(report, indent=2)
+    print(text)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Régressions détectées:", file=sys.stderr)
+            for line in regressions:
+                print(f"  - {line}", file=sys.stderr)
+            sys.exit(1)
+        print("✅ Aucune régression", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Petit modèle Marian initialisé aléatoirement, pour des benchmarks hors ligne
+
+Le tokenizer SentencePiece est entraîné sur le corpus fixe et le modèle
+(une couche, d_model=64) est créé avec une graine fixe : aucune ressource
+n'est téléchargée. Les traductions n'ont pas de sens, seuls les coûts de
+tokenization, de generate et de décodage sont représentatifs.
+"""
+import json
+import os
+import tempfile
+
+from benchmarks.common import CORPUS_DIR
+
+VOCAB_SIZE = 400
+SEED = 0
+# Biais de fin de séquence : limite la longueur des sorties aléatoires
+EOS_BIAS = 2.0
+
+
+def build_tiny_model(output_dir: str) -> str:
+    """
+    Construit (une seule fois) le modèle et le tokenizer dans output_dir
+
+    Returns:
+        Chemin utilisable comme nom de modèle par from_pretrained
+    """
+    if os.path.exists(os.path.join(output_dir, "config.json")):
+        return output_dir
+
+    import sentencepiece as spm
+    import torch
+    from transformers import MarianConfig, MarianMTModel, MarianTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, "spm")
+    spm.SentencePieceTrainer.train(
+        input=os.path.join(CORPUS_DIR, "fr.txt"),
+        model_prefix=prefix,
+        vocab_size=VOCAB_SIZE,
+        hard_vocab_limit=False,
+        character_coverage=1.0,
+        model_type="unigram",
+        bos_id=-1,
+        eos_id=-1,
+        unk_id=0,
+    )
+    os.replace(f"{prefix}.model", os.path.join(output_dir, "source.spm"))
+    os.remove(f"{prefix}.vocab")
+
+    # Vocabulaire Marian : </s> = 0, <unk> = 1, pièces, puis <pad> en dernier
+    processor = spm.SentencePieceProcessor(
+        model_file=os.path.join(output_dir, "source.spm")
+    )
+    vocab = {"</s>": 0, "<unk>": 1}
+    for piece_id in range(processor.get_piece_size()):
+        vocab.setdefault(processor.id_to_piece(piece_id), len(vocab))
+    vocab["<pad>"] = len(vocab)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vocab_path = os.path.join(tmp_dir, "vocab.json")
+        with open(vocab_path, "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+        source_spm = os.path.join(output_dir, "source.spm")
+        tokenizer = MarianTokenizer(
+            source_spm=source_spm, target_spm=source_spm, vocab=vocab_path
+        )
+        tokenizer.save_pretrained(output_dir)
+
+    config = MarianConfig(
+        vocab_size=len(vocab),
+        d_model=64,
+        encoder_layers=1,
+        decoder_layers=1,
+        encoder_attention_heads=2,
+        decoder_attention_heads=2,
+        encoder_ffn_dim=128,
+        decoder_ffn_dim=128,
+        max_position_embeddings=512,
+        pad_token_id=vocab["<pad>"],
+        eos_token_id=0,
+        decoder_start_token_id=vocab["<pad>"],
+        forced_eos_token_id=0,
+        num_beams=1,
+    )
+    torch.manual_seed(SEED)
+    model = MarianMTModel(config)
+    with torch.no_grad():
+        model.final_logits_bias[0, 0] = EOS_BIAS
+    model.save_pretrained(output_dir)
+    return output_dir
+
+
+def install_tiny_model(cache, model_dir: str):
+    """Remplace tous les modèles d'un ModelCache par le petit modèle local"""
+    path = build_tiny_model(model_dir)
+    for pair in list(cache.model_mapping):
+        cache.model_mapping[pair] = path
+    cache.clear_cache()
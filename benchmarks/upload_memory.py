@@ -0,0 +1,116 @@
+"""
+Pic de mémoire de l'extraction TXT selon la taille de l'envoi : ancien
+chemin (octets complets puis texte complet) contre lecture par blocs
+
+Des fichiers texte de tailles croissantes sont générés à partir du corpus,
+puis chaque variante est exécutée dans un sous-processus pour mesurer son
+pic de RSS. Seuls l'extraction et le découpage en phrases sont mesurés :
+la traduction est hors du périmètre.
+
+Usage:
+    python -m benchmarks.upload_memory --sizes-mb 8 32 128
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import load_corpus, peak_rss_mb
+
+
+def write_synthetic_txt(path: str, size_mb: float):
+    """Répète le corpus (paragraphes de 10 phrases) jusqu'à la taille voulue"""
+    sentences = load_corpus("fr.txt")
+    paragraph = ("\n".join(sentences[:10]) + "\n\n").encode("utf-8")
+    target = int(size_mb * 1024 * 1024)
+    with open(path, "wb") as f:
+        written = 0
+        while written < target:
+            f.write(paragraph)
+            written += len(paragraph)
+
+
+def run_legacy(path: str) -> int:
+    """Ancien chemin : contenu complet en octets, décodé puis découpé d'un bloc"""
+    from utils.text_translator import text_translator
+
+    with open(path, "rb") as f:
+        data = f.read()
+    # Décodage de l'ancien extract_text_from_txt, reproduit ici : la version
+    # actuelle lit par blocs et ne mesurerait que le nouveau chemin
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        text = data.decode("latin-1")
+    return len(text_translator.split_into_sentences(text))
+
+
+def run_streamed(path: str) -> int:
+    """Nouveau chemin : lecture par blocs de lignes depuis le chemin"""
+    from utils.file_translator import file_translator
+    from utils.text_translator import text_translator
+
+    return sum(len(text_translator.split_into_sentences(part))
+               for part in file_translator.iter_txt_parts(path))
+
+
+VARIANTS = {
+    "legacy": run_legacy,
+    "streamed": run_streamed,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--output", help="Fichier JSON de sortie")
+    parser.add_argument("--worker", choices=list(VARIANTS), help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # Les modèles ne sont jamais chargés : seule l'extraction est mesurée
+        from utils import text_translator  # noqa: F401
+        baseline_rss = peak_rss_mb()
+        start = time.perf_counter()
+        sentences = VARIANTS[args.worker](args.input)
+        print(json.dumps({
+            "variant": args.worker,
+            "wall_seconds": time.perf_counter() - start,
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_over_baseline_mb": peak_rss_mb() - baseline_rss,
+            "sentences": sentences,
+        }))
+        return
+
+    env = dict(os.environ, TRANSLATOR_EXTRACT_CACHE_ENABLED="0")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size_mb in args.sizes_mb:
+            path = os.path.join(tmp_dir, f"synthetic_{size_mb:g}mb.txt")
+            write_synthetic_txt(path, size_mb)
+            entry = {"size_mb": os.path.getsize(path) / (1024 * 1024), "results": {}}
+            for variant in VARIANTS:
+                cmd = [sys.executable, "-m", "benchmarks.upload_memory",
+                       "--worker", variant, "--input", path]
+                proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+                if proc.returncode != 0:
+                    print(f"❌ Variante {variant} ({size_mb:g} Mo) en échec:\n{proc.stderr}",
+                          file=sys.stderr)
+                    continue
+                entry["results"][variant] = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(entry)
+            os.remove(path)
+
+    report = json.dumps({"sizes": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Backends d'inférence CPU pour les modèles MarianMT (torch, int8, ONNX Runtime)
+"""
+from transformers import MarianMTModel
+import torch
+from typing import Dict, Type
+from models.inference_scheduler import inference_scheduler
+from models.model_store import model_store
+import itertools
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "translator-pro", "onnx"
+)
+
+
+class InferenceBackend:
+    """Interface commune : charger un modèle exposant generate()"""
+
+    name = ""
+
+    def load(self, model_name: str, device: str):
+        raise NotImplementedError
+
+    def size_bytes(self, model) -> int:
+        """Taille mémoire des poids et buffers d'un modèle"""
+        return sum(t.numel() * t.element_size()
+                   for t in itertools.chain(model.parameters(), model.buffers()))
+
+
+class TorchBackend(InferenceBackend):
+    """Modèle fp32 en mode eager PyTorch (comportement historique)"""
+
+    name = "torch"
+
+    def load(self, model_name: str, device: str):
+        path = model_store.resolve(model_name)
+        if device == "cpu" and model_store.is_snapshot(path):
+            # Poids projetés en mémoire, partagés entre processus
+            return model_store.load_model(path)
+        return MarianMTModel.from_pretrained(path).to(device)
+
+
+class QuantizedTorchBackend(InferenceBackend):
+    """Quantification dynamique int8 des couches linéaires (CPU uniquement)"""
+
+    name = "int8"
+
+    def load(self, model_name: str, device: str):
+        if device != "cpu":
+            logger.warning("⚠️ Quantification int8 disponible uniquement sur CPU")
+        path = model_store.resolve(model_name)
+        if model_store.is_snapshot(path):
+            # Les couches non quantifiées (embeddings) restent projetées en mémoire
+            model = model_store.load_model(path)
+        else:
+            model = MarianMTModel.from_pretrained(path).eval()
+        # Rapide (quelques secondes) : refait à chaque chargement plutôt que sérialisé.
+        # Sur place : sans inplace, le modèle entier serait copié en mémoire anonyme
+        return torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+
+    def size_bytes(self, model) -> int:
+        # Les poids int8 sont dans des paramètres « packés » hors de parameters()
+        total = 0
+        for value in model.state_dict().values():
+            tensors = value if isinstance(value, (tuple, list)) else (value,)
+            for tensor in tensors:
+                if isinstance(tensor, torch.Tensor):
+                    total += tensor.numel() * tensor.element_size()
+        return total
+
+
+class OnnxBackend(InferenceBackend):
+    """Encodeur/décodeur exportés vers ONNX Runtime, avec cache clé/valeur"""
+
+    name = "onnx"
+
+    def __init__(self, export_dir: str = None):
+        self.export_dir = export_dir or os.environ.get(
+            "TRANSLATOR_ONNX_DIR", DEFAULT_EXPORT_DIR
+        )
+
+    def export_path(self, model_name: str) -> str:
+        """Répertoire de l'export ONNX d'un modèle"""
+        return os.path.join(self.export_dir, model_name.replace("/", "--"))
+
+    def load(self, model_name: str, device: str):
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise Exception(
+                "Backend ONNX indisponible. Installez: pip install optimum[onnxruntime]"
+            )
+
+        path = self.export_path(model_name)
+        # Chaque session se limite à la part de cœurs d'un appel à generate
+        session_options = inference_scheduler.onnx_session_options()
+        if os.path.isdir(path):
+            logger.info(f"📦 Export ONNX trouvé: {path}")
+            return ORTModelForSeq2SeqLM.from_pretrained(path, use_cache=True,
+                                                        session_options=session_options)
+
+        # Export unique, réutilisé aux démarrages suivants
+        logger.info(f"🔧 Export ONNX de {model_name} (une seule fois)")
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            model_store.resolve(model_name), export=True, use_cache=True,
+            session_options=session_options
+        )
+        model.save_pretrained(path)
+        return model
+
+    def size_bytes(self, model) -> int:
+        path = getattr(model, "model_save_dir", None)
+        if not path or not os.path.isdir(path):
+            return 0
+        return sum(os.path.getsize(os.path.join(path, f))
+                   for f in os.listdir(path) if f.endswith((".onnx", ".onnx_data")))
+
+
+BACKENDS: Dict[str, Type[InferenceBackend]] = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def get_backend(name: str) -> InferenceBackend:
+    """Instancie un backend par son nom (torch, int8, onnx)"""
+    if name not in BACKENDS:
+        raise ValueError(f"❌ Backend d'inférence inconnu: {name}")
+    return BACKENDS[name]()
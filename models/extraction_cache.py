@@ -0,0 +1,243 @@
+"""
+Cache adressé par contenu des extractions (PDF/DOCX/TXT, OCR, transcription)
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.metrics import metrics
+from utils.uploads import FileSource, iter_chunks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "translator-pro", "extraction"
+)
+DEFAULT_MAX_MEMORY_MB = 64
+DEFAULT_MAX_DISK_MB = 512
+
+
+class ExtractionCache:
+    """Cache LRU en mémoire doublé d'un niveau disque, clé = hash du contenu + paramètres"""
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_memory_bytes: Optional[int] = None,
+                 max_disk_bytes: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        self.cache_dir = cache_dir or os.environ.get("TRANSLATOR_EXTRACT_CACHE_DIR",
+                                                     DEFAULT_CACHE_DIR)
+        self.max_memory_bytes = max_memory_bytes or int(
+            os.environ.get("TRANSLATOR_EXTRACT_CACHE_MAX_MB", DEFAULT_MAX_MEMORY_MB)
+        ) * 1024 * 1024
+        # 0 désactive le niveau disque
+        if max_disk_bytes is None:
+            max_disk_bytes = int(
+                os.environ.get("TRANSLATOR_EXTRACT_CACHE_DISK_MB", DEFAULT_MAX_DISK_MB)
+            ) * 1024 * 1024
+        self.max_disk_bytes = max_disk_bytes
+        if enabled is None:
+            enabled = os.environ.get("TRANSLATOR_EXTRACT_CACHE_ENABLED", "1") != "0"
+        self.enabled = enabled
+
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(data: FileSource, **params) -> str:
+        """Hash SHA-256 du contenu (lu par blocs) et des paramètres d'extraction"""
+        digest = hashlib.sha256()
+        for block in iter_chunks(data):
+            digest.update(block)
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """Résultat en cache (mémoire puis disque), None si absent"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store_memory(key, value)
+        return value
+
+    def put(self, key: str, value: str):
+        """Enregistre un résultat dans les deux niveaux"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store_memory(key, value)
+        self._write_disk(key, value)
+
+    def get_or_compute(self, data: FileSource, compute: Callable[[], str], **params) -> str:
+        """
+        Renvoie l'extraction en cache, ou la calcule et l'enregistre
+
+        Args:
+            data: Contenu source (octets, chemin ou objet fichier, pixels de l'image...)
+            compute: Extraction à exécuter en cas d'absence
+            params: Paramètres qui influencent le résultat (type, langue, options)
+
+        Returns:
+            Texte extrait
+        """
+        if not self.enabled:
+            return compute()
+
+        key = self.make_key(data, **params)
+        value = self.get(key)
+        if value is not None:
+            logger.info(f"⚡ Extraction {params.get('kind', '')} trouvée dans le cache")
+            return value
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def _store_memory(self, key: str, value: str):
+        """Insertion LRU bornée en octets (appelé sous verrou)"""
+        size = len(value.encode("utf-8"))
+        if size > self.max_memory_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old.encode("utf-8"))
+        self._entries[key] = value
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.max_memory_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= len(evicted.encode("utf-8"))
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.max_disk_bytes:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = f.read()
+            # Date de modification = dernière utilisation (éviction LRU)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"⚠️ Lecture du cache d'extraction impossible: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, value: str):
+        if not self.max_disk_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(value)
+            size = os.path.getsize(tmp_path)
+            # Fichier remplacé (même clé) : sa taille ne doit pas être comptée deux fois
+            try:
+                size -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Écriture du cache d'extraction impossible: {str(e)}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_bytes += size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _scan_disk(self) -> List[Tuple[str, int, float]]:
+        """Fichiers du niveau disque : (chemin, taille, dernière utilisation)"""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict_disk(self):
+        """Supprime les fichiers les moins récemment utilisés (appelé sous verrou)"""
+        files = sorted(self._scan_disk(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        # Marge de 10 % pour ne pas parcourir le répertoire à chaque écriture
+        target = self.max_disk_bytes * 0.9
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._disk_bytes = total
+
+    def stats(self) -> Dict[str, float]:
+        """Compteurs du cache d'extraction"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+            }
+
+    def clear(self):
+        """Vide les deux niveaux du cache"""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+            for path, _, _ in self._scan_disk():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._disk_bytes = 0
+        logger.info("🗑️ Cache d'extraction vidé")
+
+
+# Instance globale
+extraction_cache = ExtractionCache()
+metrics.register_gauges("translator_extraction_cache", extraction_cache.stats)
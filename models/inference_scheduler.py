@@ -0,0 +1,125 @@
+"""
+Ordonnanceur d'inférence : partage des cœurs CPU entre appels à generate
+
+Sans limite, chaque session Streamlit (et chaque étape d'une traduction
+multi-cibles) lance generate avec tous les threads de calcul de PyTorch :
+à plusieurs, les cœurs sont sur-souscrits et chacun attend plus longtemps
+que s'ils passaient l'un après l'autre. L'ordonnanceur limite le nombre de
+generate simultanés, donne à chacun une part fixe des cœurs et met les
+appels en trop en file d'attente.
+"""
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import logging
+import os
+import threading
+import time
+import torch
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+wait_histogram = metrics.histogram(
+    "translator_inference_wait_seconds", "Attente d'un emplacement de calcul avant generate"
+)
+
+
+def available_cores() -> int:
+    """Cœurs utilisables par le processus (affinité CPU comprise)"""
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class InferenceScheduler:
+    """Emplacements de calcul en nombre limité, chacun avec sa part des cœurs"""
+
+    def __init__(self, max_concurrent: Optional[int] = None,
+                 threads_per_call: Optional[int] = None):
+        cores = available_cores()
+        if max_concurrent is None:
+            # Défaut : un appel pour deux cœurs, au plus 4 appels simultanés
+            max_concurrent = int(os.environ.get("TRANSLATOR_INFERENCE_CONCURRENCY", 0)) \
+                or max(1, min(4, cores // 2))
+        if threads_per_call is None:
+            threads_per_call = int(os.environ.get("TRANSLATOR_INFERENCE_THREADS", 0)) \
+                or max(1, cores // max_concurrent)
+        if max_concurrent < 1 or threads_per_call < 1:
+            raise ValueError(f"Ordonnanceur invalide: {max_concurrent} appels, "
+                             f"{threads_per_call} threads")
+        self.cores = cores
+        self.max_concurrent = max_concurrent
+        self.threads_per_call = threads_per_call
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+
+        # Statistiques
+        self.active = 0
+        self.waiting = 0
+        self.calls = 0
+        self.waited_calls = 0
+        self.wait_seconds_total = 0.0
+        logger.info(f"🧮 Inférence: {max_concurrent} generate simultanés, "
+                    f"{threads_per_call} threads chacun ({cores} cœurs)")
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Emplacement de calcul pour un appel à generate
+
+        Attend qu'un emplacement se libère, fixe le nombre de threads de
+        calcul du thread appelant, puis exécute le bloc en mode inférence
+        (ni graphe d'autograd ni suivi de versions des tenseurs).
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+        self._slots.acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+            self.calls += 1
+            if waited > 0.001:
+                self.waited_calls += 1
+            self.wait_seconds_total += waited
+        wait_histogram.observe(waited)
+
+        try:
+            # Réglage propre au thread pour OpenMP : refait si un autre code l'a changé
+            if torch.get_num_threads() != self.threads_per_call:
+                torch.set_num_threads(self.threads_per_call)
+            with torch.inference_mode():
+                yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def onnx_session_options(self):
+        """Options ONNX Runtime limitant une session à la part de cœurs d'un appel"""
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.threads_per_call
+        options.inter_op_num_threads = 1
+        return options
+
+    def stats(self) -> Dict[str, float]:
+        """Emplacements occupés, appels en attente et attente cumulée"""
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "threads_per_call": self.threads_per_call,
+                "active": self.active,
+                "waiting": self.waiting,
+                "calls": self.calls,
+                "waited_calls": self.waited_calls,
+                "wait_seconds_total": self.wait_seconds_total,
+            }
+
+
+# Instance globale
+inference_scheduler = InferenceScheduler()
+metrics.register_gauges("translator_inference", inference_scheduler.stats)
@@ -3,22 +3,104 @@ Gestion du cache des modèles MarianMT pour optimiser les performances
 """
 from transformers import MarianMTModel, MarianTokenizer
 import torch
-from typing import Dict, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from models.backends import InferenceBackend, get_backend
+from models.inference_scheduler import inference_scheduler
+from models.model_store import model_store
+from utils.metrics import metrics
 import logging
+import os
+import threading
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Budget mémoire par défaut : 4 modèles (~300 Mo chacun), sans limite d'octets
+DEFAULT_MAX_MODELS = 4
+
+# Langue pivot pour les paires sans modèle direct
+PIVOT_LANG = "en"
+
+# Phrase du generate de préchauffage (quelques tokens suffisent)
+WARMUP_TEXT = "Bonjour."
+
+
+def _env_int(name: str) -> Optional[int]:
+    """Lit un entier optionnel depuis l'environnement"""
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else None
+
+
+def _env_mapping(name: str) -> Dict[str, str]:
+    """Lit un mapping « fr-en=onnx,en-fr=int8 » depuis l'environnement"""
+    mapping = {}
+    for item in os.environ.get(name, "").split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            mapping[key.strip()] = value.strip()
+    return mapping
+
+
+class _PendingLoad:
+    """Chargement en cours, partagé par les requêtes concurrentes (single-flight)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[Tuple[MarianMTModel, MarianTokenizer]] = None
+        self.error: Optional[BaseException] = None
+
 
 class ModelCache:
     """Cache intelligent pour les modèles de traduction"""
     
-    def __init__(self):
-        self.models: Dict[str, MarianMTModel] = {}
+    def __init__(self, max_models: Optional[int] = None, max_bytes: Optional[int] = None,
+                 default_backend: Optional[str] = None,
+                 backend_mapping: Optional[Dict[str, str]] = None):
+        # Ordre d'insertion = ordre LRU (le plus récent à la fin)
+        self.models: "OrderedDict[str, MarianMTModel]" = OrderedDict()
         self.tokenizers: Dict[str, MarianTokenizer] = {}
+        self.model_sizes: Dict[str, int] = {}
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         logger.info(f"💻 Device utilisé: {self.device}")
         
+        # Budget mémoire (nombre de modèles et/ou octets, 0 ou None = illimité ;
+        # variable absente : DEFAULT_MAX_MODELS modèles)
+        if max_models is None:
+            max_models = _env_int("TRANSLATOR_MODEL_CACHE_MAX_MODELS")
+            if max_models is None:
+                max_models = DEFAULT_MAX_MODELS
+        if max_bytes is None:
+            max_bytes = _env_int("TRANSLATOR_MODEL_CACHE_MAX_BYTES")
+        self.max_models = max_models or None
+        self.max_bytes = max_bytes or None
+        
+        self._lock = threading.Lock()
+        self._loading: Dict[str, _PendingLoad] = {}
+        # Paires épinglées (non évinçables) par des traductions en cours
+        self._pins: Dict[str, int] = {}
+        
+        # Statistiques
+        self.hits = 0
+        self.loads = 0
+        self.shared_loads = 0
+        self.evictions = 0
+        self.load_seconds_total = 0.0
+        self.last_load_seconds = 0.0
+        # Par paire : chargement à froid (origine, durée) et premier generate
+        self.load_times: Dict[str, Dict] = {}
+        self._warmup_thread: Optional[threading.Thread] = None
+        
+        # Backend d'inférence par paire (torch, int8, onnx)
+        self.default_backend = default_backend or os.environ.get("TRANSLATOR_BACKEND", "torch")
+        self.backend_mapping: Dict[str, str] = (
+            backend_mapping if backend_mapping is not None
+            else _env_mapping("TRANSLATOR_BACKENDS")
+        )
+        self._backends: Dict[str, InferenceBackend] = {}
+        
         # Mapping des paires de langues vers les modèles MarianMT
         self.model_mapping = {
             "fr-en": "Helsinki-NLP/opus-mt-fr-en",
@@ -42,38 +124,242 @@ class ModelCache:
             return self.model_mapping[pair]
         raise ValueError(f"❌ Paire de langues non supportée: {pair}")
     
+    def plan_route(self, source_lang: str, target_lang: str) -> List[Tuple[str, str]]:
+        """
+        Planifie la chaîne de modèles pour une paire de langues
+        
+        Args:
+            source_lang: Langue source
+            target_lang: Langue cible
+        
+        Returns:
+            Liste des étapes (source, cible) : directe, ou via l'anglais
+            (ex: es-fr → [(es, en), (en, fr)])
+        """
+        if f"{source_lang}-{target_lang}" in self.model_mapping:
+            return [(source_lang, target_lang)]
+        
+        route = [(source_lang, PIVOT_LANG), (PIVOT_LANG, target_lang)]
+        if PIVOT_LANG not in (source_lang, target_lang) and all(
+            f"{src}-{tgt}" in self.model_mapping for src, tgt in route
+        ):
+            return route
+        
+        raise ValueError(f"❌ Paire de langues non supportée: {source_lang}-{target_lang}")
+    
+    @contextmanager
+    def pinned(self, route: List[Tuple[str, str]]) -> Iterator[None]:
+        """Épingle toutes les paires d'une chaîne pour empêcher leur éviction"""
+        pairs = [f"{src}-{tgt}" for src, tgt in route]
+        with self._lock:
+            for pair in pairs:
+                self._pins[pair] = self._pins.get(pair, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                for pair in pairs:
+                    self._pins[pair] -= 1
+                    if not self._pins[pair]:
+                        del self._pins[pair]
+                self._evict_locked()
+    
+    def get_backend_name(self, source_lang: str, target_lang: str) -> str:
+        """Nom du backend d'inférence configuré pour une paire"""
+        return self.backend_mapping.get(f"{source_lang}-{target_lang}", self.default_backend)
+    
+    def get_model_id(self, source_lang: str, target_lang: str) -> str:
+        """Identifiant du modèle effectivement servi (nom + backend si non fp32)"""
+        model_name = self.get_model_name(source_lang, target_lang)
+        backend = self.get_backend_name(source_lang, target_lang)
+        return model_name if backend == "torch" else f"{model_name}#{backend}"
+    
+    def _get_backend(self, name: str) -> InferenceBackend:
+        """Instance (partagée) d'un backend d'inférence"""
+        if name not in self._backends:
+            self._backends[name] = get_backend(name)
+        return self._backends[name]
+    
     def load_model(self, source_lang: str, target_lang: str) -> Tuple[MarianMTModel, MarianTokenizer]:
         """Charge un modèle depuis le cache ou depuis Hugging Face"""
         pair = f"{source_lang}-{target_lang}"
         
-        # Si le modèle est déjà en cache
-        if pair in self.models:
-            logger.info(f"✅ Modèle {pair} chargé depuis le cache")
-            return self.models[pair], self.tokenizers[pair]
+        with self._lock:
+            # Si le modèle est déjà en cache
+            if pair in self.models:
+                self.models.move_to_end(pair)
+                self.hits += 1
+                logger.info(f"✅ Modèle {pair} chargé depuis le cache")
+                return self.models[pair], self.tokenizers[pair]
+            
+            # Un seul chargement par paire, les autres requêtes l'attendent
+            pending = self._loading.get(pair)
+            is_leader = pending is None
+            if is_leader:
+                pending = _PendingLoad()
+                self._loading[pair] = pending
+        
+        if not is_leader:
+            logger.info(f"⏳ Attente du chargement en cours du modèle {pair}")
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            with self._lock:
+                self.shared_loads += 1
+            return pending.result
         
-        # Sinon, charger le modèle
+        # Sinon, charger le modèle (hors verrou)
         try:
             model_name = self.get_model_name(source_lang, target_lang)
-            logger.info(f"⬇️ Téléchargement du modèle: {model_name}")
+            backend = self._get_backend(self.get_backend_name(source_lang, target_lang))
+            origin = "store" if model_store.enabled and model_store.current_path(model_name) else "hub"
+            if origin == "hub":
+                logger.info(f"⬇️ Téléchargement du modèle: {model_name} (backend {backend.name})")
             
-            tokenizer = MarianTokenizer.from_pretrained(model_name)
-            model = MarianMTModel.from_pretrained(model_name).to(self.device)
+            start = time.perf_counter()
+            with metrics.span("model.load", pair=pair, backend=backend.name, origin=origin):
+                # Instantané local si le magasin est actif (créé au premier chargement)
+                tokenizer = MarianTokenizer.from_pretrained(model_store.resolve(model_name))
+                model = backend.load(model_name, self.device)
+            elapsed = time.perf_counter() - start
             
             # Mettre en cache
-            self.models[pair] = model
-            self.tokenizers[pair] = tokenizer
+            with self._lock:
+                self.models[pair] = model
+                self.tokenizers[pair] = tokenizer
+                self.model_sizes[pair] = backend.size_bytes(model)
+                self.loads += 1
+                self.load_seconds_total += elapsed
+                self.last_load_seconds = elapsed
+                self.load_times[pair] = {"origin": origin, "load_seconds": elapsed}
+                self._evict_locked()
             
-            logger.info(f"✅ Modèle {pair} chargé avec succès")
+            pending.result = (model, tokenizer)
+            logger.info(f"✅ Modèle {pair} chargé avec succès ({elapsed:.1f}s)")
             return model, tokenizer
             
         except Exception as e:
+            pending.error = e
             logger.error(f"❌ Erreur lors du chargement du modèle: {str(e)}")
             raise
+        finally:
+            with self._lock:
+                self._loading.pop(pair, None)
+            pending.event.set()
+    
+    def warmup(self, pairs: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Précharge des paires et exécute un generate factice pour chacune
+        
+        Le premier generate d'un modèle paie des initialisations paresseuses
+        (allocations, noyaux) : après le préchauffage, la première requête
+        a la même latence que les suivantes.
+        
+        Args:
+            pairs: Paires « src-tgt » ; None pour TRANSLATOR_WARMUP_PAIRS
+        
+        Returns:
+            Temps par paire : chargement à froid, premier et second generate
+        """
+        if pairs is None:
+            pairs = [p.strip() for p in os.environ.get("TRANSLATOR_WARMUP_PAIRS", "").split(",")
+                     if p.strip()]
+        if self.max_models is not None and len(pairs) > self.max_models:
+            logger.warning(f"⚠️ Préchauffage limité aux {self.max_models} premières paires "
+                           f"(budget du cache)")
+            pairs = pairs[:self.max_models]
+        
+        report = {}
+        for pair in pairs:
+            try:
+                source_lang, target_lang = pair.split("-")
+                model, tokenizer = self.load_model(source_lang, target_lang)
+                timings = []
+                for _ in range(2):
+                    start = time.perf_counter()
+                    with inference_scheduler.slot():
+                        inputs = tokenizer([WARMUP_TEXT], return_tensors="pt").to(self.device)
+                        model.generate(**inputs, max_new_tokens=8)
+                    timings.append(time.perf_counter() - start)
+            except Exception as e:
+                logger.warning(f"⚠️ Préchauffage de {pair} impossible: {str(e)}")
+                continue
+            
+            with self._lock:
+                entry = self.load_times.setdefault(pair, {})
+                entry["first_generate_seconds"] = timings[0]
+                entry["warm_generate_seconds"] = timings[1]
+                report[pair] = dict(entry)
+            logger.info(f"🔥 Paire {pair} préchauffée: chargement "
+                        f"{entry.get('load_seconds', 0.0):.1f}s ({entry.get('origin', 'cache')}), "
+                        f"generate {timings[0] * 1000:.0f} ms puis {timings[1] * 1000:.0f} ms")
+        return report
+    
+    def start_warmup(self, pairs: Optional[List[str]] = None) -> Optional[threading.Thread]:
+        """Lance le préchauffage dans un thread d'arrière-plan (une seule fois)"""
+        with self._lock:
+            if self._warmup_thread is not None:
+                return self._warmup_thread
+            self._warmup_thread = threading.Thread(
+                target=self.warmup, args=(pairs,), name="model-warmup", daemon=True
+            )
+        self._warmup_thread.start()
+        return self._warmup_thread
+    
+    def _over_budget(self) -> bool:
+        """Indique si le cache dépasse son budget mémoire"""
+        if self.max_models is not None and len(self.models) > self.max_models:
+            return True
+        if self.max_bytes is not None and sum(self.model_sizes.values()) > self.max_bytes:
+            return True
+        return False
+    
+    def _evict_locked(self):
+        """Évince les modèles les moins récemment utilisés (verrou déjà pris)"""
+        evicted = False
+        while self.models and self._over_budget():
+            # Le modèle le plus récent et les modèles épinglés sont conservés
+            newest = next(reversed(self.models))
+            pair = next((p for p in self.models
+                         if p != newest and not self._pins.get(p)), None)
+            if pair is None:
+                break
+            del self.models[pair]
+            self.tokenizers.pop(pair, None)
+            self.model_sizes.pop(pair, None)
+            self.evictions += 1
+            evicted = True
+            logger.info(f"♻️ Modèle {pair} évincé du cache")
+        
+        if evicted and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    
+    def stats(self) -> Dict:
+        """Statistiques du cache (modèles résidents, octets, succès, chargements)"""
+        with self._lock:
+            return {
+                "resident_models": list(self.models),
+                "resident_count": len(self.models),
+                "resident_bytes": sum(self.model_sizes.values()),
+                "pinned_models": list(self._pins),
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "shared_loads": self.shared_loads,
+                "evictions": self.evictions,
+                "last_load_seconds": self.last_load_seconds,
+                "avg_load_seconds": (self.load_seconds_total / self.loads
+                                     if self.loads else 0.0),
+                "load_times": {pair: dict(entry) for pair, entry in self.load_times.items()},
+            }
     
     def clear_cache(self):
         """Vide le cache des modèles"""
-        self.models.clear()
-        self.tokenizers.clear()
+        with self._lock:
+            self.models.clear()
+            self.tokenizers.clear()
+            self.model_sizes.clear()
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
         logger.info("🗑️ Cache vidé")
@@ -81,3 +367,4 @@ class ModelCache:
 
 # Instance globale du cache
 model_cache = ModelCache()
+metrics.register_gauges("translator_model_cache", model_cache.stats)
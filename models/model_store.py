@@ -0,0 +1,287 @@
+"""
+Magasin local des modèles : instantanés versionnés et chargement mmap
+
+Chaque modèle est figé une fois dans <magasin>/<organisation--nom>/<révision>/
+(configuration, tokenizer, poids safetensors) ; le fichier CURRENT désigne
+la révision servie. Les poids sont ensuite projetés en mémoire (mmap en
+copie à l'écriture) : les pages du fichier sont partagées entre processus
+via le cache du système et ne sont lues qu'à l'accès.
+
+Usage:
+    python -m models.model_store                 # toutes les paires
+    python -m models.model_store --pairs fr-en en-fr --keep 2
+"""
+from transformers import GenerationConfig, MarianMTModel, MarianTokenizer
+import torch
+from typing import Dict, List, Optional
+import argparse
+import itertools
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "translator-pro", "models"
+)
+WEIGHTS_FILE = "model.safetensors"
+MANIFEST_FILE = "store.json"
+CURRENT_FILE = "CURRENT"
+
+# Types safetensors -> torch
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Tenseurs d'un fichier safetensors, adossés à une projection mémoire
+
+    Aucune copie : chaque tenseur pointe dans le fichier projeté, qui reste
+    ouvert tant qu'un tenseur le référence.
+
+    Args:
+        path: Fichier .safetensors
+
+    Returns:
+        Dictionnaire nom -> tenseur
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        # ACCESS_COPY : pages partagées tant qu'elles ne sont pas modifiées
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _SAFETENSORS_DTYPES.get(info["dtype"])
+        if dtype is None:
+            raise ValueError(f"Type safetensors non supporté: {info['dtype']} ({name})")
+        begin, end = info["data_offsets"]
+        count = (end - begin) // torch.empty(0, dtype=dtype).element_size()
+        if count:
+            tensor = torch.frombuffer(mapped, dtype=dtype, count=count,
+                                      offset=data_start + begin)
+        else:
+            tensor = torch.empty(0, dtype=dtype)
+        tensors[name] = tensor.reshape(info["shape"])
+    return tensors
+
+
+class ModelStore:
+    """Instantanés locaux des modèles Hugging Face, un répertoire par révision"""
+
+    def __init__(self, store_dir: Optional[str] = None, enabled: Optional[bool] = None,
+                 use_mmap: Optional[bool] = None):
+        self.store_dir = store_dir or os.environ.get("TRANSLATOR_MODEL_STORE_DIR",
+                                                     DEFAULT_STORE_DIR)
+        if enabled is None:
+            enabled = os.environ.get("TRANSLATOR_MODEL_STORE_ENABLED", "1") != "0"
+        self.enabled = enabled
+        if use_mmap is None:
+            use_mmap = os.environ.get("TRANSLATOR_MODEL_STORE_MMAP", "1") != "0"
+        self.use_mmap = use_mmap
+        # Un seul instantané à la fois par modèle
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def model_dir(self, model_name: str) -> str:
+        """Répertoire des révisions d'un modèle"""
+        return os.path.join(self.store_dir, model_name.strip("/").replace("/", "--"))
+
+    def current_path(self, model_name: str) -> Optional[str]:
+        """Révision servie d'un modèle, None s'il n'est pas dans le magasin"""
+        try:
+            with open(os.path.join(self.model_dir(model_name), CURRENT_FILE)) as f:
+                revision = f.read().strip()
+        except OSError:
+            return None
+        path = os.path.join(self.model_dir(model_name), revision)
+        if not os.path.isfile(os.path.join(path, MANIFEST_FILE)):
+            return None
+        return path
+
+    def versions(self, model_name: str) -> List[str]:
+        """Révisions présentes, de la plus ancienne à la plus récente"""
+        root = self.model_dir(model_name)
+        if not os.path.isdir(root):
+            return []
+        revisions = [name for name in os.listdir(root)
+                     if os.path.isfile(os.path.join(root, name, MANIFEST_FILE))]
+        return sorted(revisions, key=lambda name: os.path.getmtime(
+            os.path.join(root, name, MANIFEST_FILE)))
+
+    def snapshot(self, model_name: str, revision: Optional[str] = None) -> str:
+        """
+        Fige un modèle dans le magasin (sans effet s'il y est déjà)
+
+        Args:
+            model_name: Identifiant Hugging Face (ou répertoire local)
+            revision: Révision à figer (branche, tag ou commit) ; None pour
+                la révision servie, ou la dernière disponible
+
+        Returns:
+            Répertoire de l'instantané
+        """
+        with self._lock:
+            lock = self._locks.setdefault(model_name, threading.Lock())
+
+        with lock:
+            current = self.current_path(model_name)
+            if current is not None and revision in (None, os.path.basename(current)):
+                return current
+
+            logger.info(f"📦 Instantané du modèle {model_name} dans le magasin local")
+            start = time.perf_counter()
+            model = MarianMTModel.from_pretrained(model_name, revision=revision)
+            tokenizer = MarianTokenizer.from_pretrained(model_name, revision=revision)
+            # Commit résolu par le Hub ; date pour un modèle local
+            resolved = (getattr(model.config, "_commit_hash", None) or revision
+                        or time.strftime("local-%Y%m%d%H%M%S"))
+
+            root = self.model_dir(model_name)
+            path = os.path.join(root, resolved)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+            try:
+                model.save_pretrained(tmp_path, safe_serialization=True)
+                tokenizer.save_pretrained(tmp_path)
+                with open(os.path.join(tmp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                    json.dump({"model_name": model_name, "revision": resolved,
+                               "created_at": time.time()}, f)
+                shutil.rmtree(path, ignore_errors=True)
+                os.replace(tmp_path, path)
+            except Exception:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                raise
+
+            current_tmp = os.path.join(root, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+            with open(current_tmp, "w") as f:
+                f.write(resolved)
+            os.replace(current_tmp, os.path.join(root, CURRENT_FILE))
+
+            logger.info(f"✅ Modèle {model_name}@{resolved[:12]} figé "
+                        f"({time.perf_counter() - start:.1f}s)")
+            return path
+
+    def resolve(self, model_name: str) -> str:
+        """Chemin à charger : instantané local (créé au besoin), sinon l'identifiant"""
+        if not self.enabled:
+            return model_name
+        try:
+            return self.current_path(model_name) or self.snapshot(model_name)
+        except OSError as e:
+            logger.warning(f"⚠️ Magasin de modèles indisponible ({str(e)}), chargement direct")
+            return model_name
+
+    def prune(self, model_name: str, keep: int = 2) -> List[str]:
+        """Supprime les anciennes révisions (la révision servie est conservée)"""
+        current = self.current_path(model_name)
+        removed = []
+        for revision in self.versions(model_name)[:-keep or None]:
+            path = os.path.join(self.model_dir(model_name), revision)
+            if path == current:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(revision)
+        return removed
+
+    def load_model(self, path: str) -> MarianMTModel:
+        """
+        Charge un modèle du magasin, poids projetés en mémoire
+
+        Le modèle est construit sans allouer ses poids (device meta), puis
+        les tenseurs projetés lui sont affectés tels quels.
+
+        Args:
+            path: Répertoire d'un instantané (ou de tout export safetensors)
+
+        Returns:
+            Modèle en mode évaluation, sur CPU
+
+        Raises:
+            Exception: Si des poids du modèle manquent dans l'instantané
+        """
+        weights = os.path.join(path, WEIGHTS_FILE)
+        if not self.use_mmap or not os.path.isfile(weights):
+            return MarianMTModel.from_pretrained(path).eval()
+
+        config = MarianMTModel.config_class.from_pretrained(path)
+        with torch.device("meta"):
+            model = MarianMTModel(config)
+        loaded = model.load_state_dict(load_safetensors_mmap(weights), strict=False, assign=True)
+        # Seuls manquent les poids liés (recopiés de model.shared) et les positions
+        # sinusoïdales (jamais sérialisées) ; tout autre manque laisserait des
+        # poids aléatoires, donc des traductions sans aucun sens
+        expected = set(model._tied_weights_keys or []) | set(model._keys_to_ignore_on_save or [])
+        missing = [key for key in loaded.missing_keys if key not in expected]
+        if missing:
+            raise Exception(f"Poids manquants dans {weights} ({len(missing)}): "
+                            f"{', '.join(missing[:5])}")
+        # Embeddings et tête de sortie partagent les poids de model.shared
+        model.tie_weights()
+
+        # Tenseurs non sérialisés (positions sinusoïdales) : recalculés comme à l'initialisation
+        for module in model.modules():
+            own = itertools.chain(module.parameters(recurse=False), module.buffers(recurse=False))
+            if any(tensor.is_meta for tensor in own):
+                module.to_empty(device="cpu", recurse=False)
+                init_weight = getattr(module, "_init_weight", None)
+                if init_weight is not None:
+                    module.weight = init_weight(module.weight)
+                else:
+                    model._init_weights(module)
+
+        if os.path.isfile(os.path.join(path, "generation_config.json")):
+            model.generation_config = GenerationConfig.from_pretrained(path)
+        return model.eval()
+
+    def is_snapshot(self, path: str) -> bool:
+        """Indique si un chemin est un instantané du magasin"""
+        return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+# Instance globale
+model_store = ModelStore()
+
+
+def main():
+    from models.model_cache import model_cache
+
+    parser = argparse.ArgumentParser(description="Fige les modèles dans le magasin local")
+    parser.add_argument("--pairs", nargs="+", default=list(model_cache.model_mapping),
+                        help="Paires à figer (défaut : toutes)")
+    parser.add_argument("--revision", help="Révision Hugging Face à figer")
+    parser.add_argument("--keep", type=int, default=2,
+                        help="Nombre de révisions conservées par modèle")
+    args = parser.parse_args()
+
+    for pair in args.pairs:
+        model_name = model_cache.model_mapping[pair]
+        path = model_store.snapshot(model_name, revision=args.revision)
+        removed = model_store.prune(model_name, keep=args.keep)
+        print(f"{pair}: {path}" + (f" (supprimées: {', '.join(removed)})" if removed else ""))
+
+
+if __name__ == "__main__":
+    main()
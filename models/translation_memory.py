@@ -0,0 +1,291 @@
+"""
+Mémoire de traduction persistante (SQLite) au niveau des phrases
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "translator-pro", "translation_memory.sqlite3"
+)
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Date d'utilisation rafraîchie au plus une fois par heure et par entrée :
+# une relecture récente n'écrit rien dans la base
+DEFAULT_TOUCH_INTERVAL = 3600.0
+# Taille contrôlée (COUNT puis éviction) au plus toutes les 1000 lignes écrites,
+# et au moins tous les centièmes de la limite
+DEFAULT_EVICT_EVERY = 1000
+
+# Limite prudente du nombre de paramètres par requête SQLite
+_SQL_CHUNK = 500
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class TranslationMemory:
+    """Cache LRU persistant des phrases déjà traduites, partagé entre processus"""
+
+    def __init__(self, db_path: Optional[str] = None,
+                 max_entries: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        self.db_path = db_path or os.environ.get("TRANSLATOR_TM_PATH", DEFAULT_DB_PATH)
+        self.max_entries = max_entries or int(
+            os.environ.get("TRANSLATOR_TM_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+        )
+        if enabled is None:
+            enabled = os.environ.get("TRANSLATOR_TM_ENABLED", "1") != "0"
+        self.enabled = enabled
+        self.touch_interval = float(
+            os.environ.get("TRANSLATOR_TM_TOUCH_INTERVAL", DEFAULT_TOUCH_INTERVAL)
+        )
+        self.evict_every = max(1, min(DEFAULT_EVICT_EVERY, self.max_entries // 100))
+        # Lignes écrites depuis le dernier contrôle de taille (contrôle dès la première écriture)
+        self._rows_since_evict = self.evict_every
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+        # Une connexion par thread (sqlite3 n'autorise pas le partage par défaut)
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre (une fois par thread) la connexion à la base SQLite"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Le mode WAL permet des lectures concurrentes entre workers Streamlit,
+        # le timeout fait attendre les écrivains au lieu d'échouer
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS translation_memory (
+                key TEXT PRIMARY KEY,
+                pair TEXT NOT NULL,
+                model TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tm_last_used "
+            "ON translation_memory(last_used)"
+        )
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def normalize(sentence: str) -> str:
+        """Normalise une phrase (Unicode NFC, espaces compactés)"""
+        sentence = unicodedata.normalize("NFC", sentence)
+        return _WHITESPACE_RE.sub(" ", sentence).strip()
+
+    def make_key(self, pair: str, model_name: str, sentence: str) -> str:
+        """Clé (paire, modèle, hash de la phrase normalisée)"""
+        digest = hashlib.sha256(self.normalize(sentence).encode("utf-8")).hexdigest()
+        return f"{pair}|{model_name}|{digest}"
+
+    def get_many(self, pair: str, model_name: str,
+                 sentences: List[str]) -> Dict[int, str]:
+        """
+        Recherche des phrases dans la mémoire
+
+        Args:
+            pair: Paire de langues (ex: fr-en)
+            model_name: Nom du modèle utilisé
+            sentences: Phrases à rechercher
+
+        Returns:
+            Dictionnaire {index de la phrase: traduction} pour les phrases trouvées
+        """
+        if not self.enabled or not sentences:
+            return {}
+
+        keys = [self.make_key(pair, model_name, s) for s in sentences]
+        found: Dict[str, str] = {}
+
+        try:
+            conn = self._connect()
+            now = time.time()
+            stale_keys = []
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), _SQL_CHUNK):
+                chunk = unique_keys[start:start + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, translation, last_used FROM translation_memory "
+                    f"WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, translation, last_used in rows:
+                    found[key] = translation
+                    if now - last_used >= self.touch_interval:
+                        stale_keys.append(key)
+
+            # Mise à jour de la date d'utilisation (LRU), seulement si elle est ancienne
+            if stale_keys:
+                for start in range(0, len(stale_keys), _SQL_CHUNK):
+                    chunk = stale_keys[start:start + _SQL_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    conn.execute(
+                        f"UPDATE translation_memory SET last_used = ? "
+                        f"WHERE key IN ({placeholders})", [now, *chunk]
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Mémoire de traduction indisponible: {str(e)}")
+            found = {}
+
+        results = {i: found[key] for i, key in enumerate(keys) if key in found}
+        with self._stats_lock:
+            self.hits += len(results)
+            self.misses += len(keys) - len(results)
+        return results
+
+    def contains_many(self, pair: str, model_name: str,
+                      sentences: List[str]) -> Set[int]:
+        """
+        Indique quelles phrases sont dans la mémoire, sans les lire
+
+        Contrairement à get_many, ni les compteurs (hits, misses) ni la date
+        d'utilisation ne sont modifiés : la recherche qui sert la traduction
+        reste la seule comptée.
+
+        Args:
+            pair: Paire de langues (ex: fr-en)
+            model_name: Nom du modèle utilisé
+            sentences: Phrases à rechercher
+
+        Returns:
+            Indices des phrases présentes
+        """
+        if not self.enabled or not sentences:
+            return set()
+
+        keys = [self.make_key(pair, model_name, s) for s in sentences]
+        present: Set[str] = set()
+        try:
+            conn = self._connect()
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), _SQL_CHUNK):
+                chunk = unique_keys[start:start + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                present.update(key for (key,) in conn.execute(
+                    f"SELECT key FROM translation_memory WHERE key IN ({placeholders})",
+                    chunk
+                ))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Mémoire de traduction indisponible: {str(e)}")
+            return set()
+
+        return {i for i, key in enumerate(keys) if key in present}
+
+    def put_many(self, pair: str, model_name: str,
+                 items: List[Tuple[str, str]]) -> None:
+        """
+        Enregistre des traductions et applique la limite de taille
+
+        Args:
+            pair: Paire de langues
+            model_name: Nom du modèle utilisé
+            items: Liste de couples (phrase source, traduction)
+        """
+        if not self.enabled or not items:
+            return
+
+        now = time.time()
+        rows = [(self.make_key(pair, model_name, src), pair, model_name, tgt, now)
+                for src, tgt in items]
+        with self._stats_lock:
+            self._rows_since_evict += len(rows)
+            check_size = self._rows_since_evict >= self.evict_every
+            if check_size:
+                self._rows_since_evict = 0
+
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO translation_memory "
+                    "(key, pair, model, translation, last_used) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                evicted = self._evict(conn) if check_size else 0
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Écriture mémoire de traduction impossible: {str(e)}")
+            return
+
+        if evicted:
+            with self._stats_lock:
+                self.evictions += evicted
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """
+        Supprime les entrées les moins récemment utilisées au-delà de la limite
+
+        Appelé toutes les evict_every lignes écrites : la base peut dépasser
+        la limite d'autant entre deux contrôles.
+        """
+        (count,) = conn.execute("SELECT COUNT(*) FROM translation_memory").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+
+        conn.execute(
+            "DELETE FROM translation_memory WHERE key IN ("
+            "SELECT key FROM translation_memory ORDER BY last_used ASC LIMIT ?)",
+            (excess,)
+        )
+        return excess
+
+    def stats(self) -> Dict[str, float]:
+        """Compteurs de la mémoire de traduction"""
+        with self._stats_lock:
+            total = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+        entries = 0
+        if self.enabled:
+            try:
+                (entries,) = self._connect().execute(
+                    "SELECT COUNT(*) FROM translation_memory"
+                ).fetchone()
+            except sqlite3.Error:
+                pass
+        stats["entries"] = entries
+        return stats
+
+    def clear(self):
+        """Vide la mémoire de traduction"""
+        if self.enabled:
+            self._connect().execute("DELETE FROM translation_memory")
+        logger.info("🗑️ Mémoire de traduction vidée")
+
+
+# Instance globale
+translation_memory = TranslationMemory()
+metrics.register_gauges("translator_memory", translation_memory.stats)
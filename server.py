@@ -0,0 +1,351 @@
+"""
+TRANSLATOR PRO - API HTTP asynchrone
+
+Expose la traduction de texte, fichiers, images et audio. Les requêtes
+concurrentes d'une même paire de langues sont regroupées quelques
+millisecondes par un DynamicBatcher et traduites ensemble, hors de la
+boucle d'événements, dans un exécuteur dédié à l'inférence.
+
+Usage:
+    python server.py --port 8080 --max-wait-ms 10 --max-batch-tokens 4096
+
+Endpoints:
+    POST /translate/text   JSON {"text", "source_lang", "target_lang", "profile"?}
+    POST /translate/file   multipart (file, source_lang, target_lang, profile?)
+    POST /translate/image  multipart (file, source_lang, target_lang, profile?)
+    POST /translate/audio  multipart (file, source_lang, target_lang, profile?)
+    GET  /health, /metrics, /metrics.json
+"""
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from models.inference_scheduler import inference_scheduler
+from models.model_cache import model_cache
+from utils.metrics import metrics
+from utils.text_translator import DEFAULT_MAX_BATCH_TOKENS, text_translator
+
+logger = logging.getLogger("translator.server")
+
+DEFAULT_MAX_WAIT_MS = 10.0
+DEFAULT_MAX_BATCH_SEGMENTS = 64
+DEFAULT_MAX_UPLOAD_MB = 50
+
+# Estimation du nombre de tokens sans tokenizer (le modèle n'est peut-être pas chargé)
+CHARS_PER_TOKEN = 4
+
+batch_requests_histogram = metrics.histogram(
+    "translator_server_batch_requests", "Requêtes regroupées par lot dynamique",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+batch_segments_histogram = metrics.histogram(
+    "translator_server_batch_segments", "Segments par lot dynamique",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+
+
+def estimate_tokens(segment: str) -> int:
+    return len(segment) // CHARS_PER_TOKEN + 1
+
+
+class _PendingBatch:
+    """Requêtes en attente pour une paire de langues"""
+
+    __slots__ = ("items", "tokens", "segments", "timer", "created")
+
+    def __init__(self):
+        self.items: List[Tuple[List[str], asyncio.Future]] = []
+        self.tokens = 0
+        self.segments = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.created = time.perf_counter()
+
+
+class DynamicBatcher:
+    """Regroupe les requêtes concurrentes d'une même paire en un seul appel au modèle"""
+
+    def __init__(self, executor: ThreadPoolExecutor,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+                 max_batch_segments: int = DEFAULT_MAX_BATCH_SEGMENTS):
+        self.executor = executor
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_segments = max_batch_segments
+        self._pending: Dict[Tuple[str, str, str], _PendingBatch] = {}
+
+    async def translate(self, segments: List[str], source_lang: str,
+                        target_lang: str, profile: str) -> List[str]:
+        """
+        Traduit les segments d'une requête au sein d'un lot partagé
+
+        Args:
+            segments: Segments à traduire (les segments vides sont conservés)
+            source_lang: Langue source
+            target_lang: Langue cible
+            profile: Profil de décodage (seules les requêtes du même profil sont regroupées)
+
+        Returns:
+            Segments traduits, dans l'ordre d'origine
+        """
+        if not any(seg.strip() for seg in segments):
+            return list(segments)
+
+        loop = asyncio.get_running_loop()
+        key = (source_lang, target_lang, profile)
+        future = loop.create_future()
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch()
+            batch.timer = loop.call_later(self.max_wait, self._flush, key)
+
+        batch.items.append((segments, future))
+        batch.tokens += sum(estimate_tokens(seg) for seg in segments if seg.strip())
+        batch.segments += len(segments)
+
+        # Budget atteint : inutile d'attendre la fin de la fenêtre
+        if batch.tokens >= self.max_batch_tokens or batch.segments >= self.max_batch_segments:
+            self._flush(key)
+
+        return await future
+
+    def _flush(self, key: Tuple[str, str, str]):
+        """Envoie le lot en attente à l'exécuteur d'inférence"""
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        metrics.record_stage("server.queue", time.perf_counter() - batch.created)
+        asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key: Tuple[str, str, str], batch: _PendingBatch):
+        source_lang, target_lang, profile = key
+        segments = [seg for item_segments, _ in batch.items for seg in item_segments]
+        pair = f"{source_lang}-{target_lang}"
+        batch_requests_histogram.observe(len(batch.items), pair=pair)
+        batch_segments_histogram.observe(len(segments), pair=pair)
+
+        loop = asyncio.get_running_loop()
+        try:
+            translated = await loop.run_in_executor(
+                self.executor, lambda: text_translator.translate_segments(
+                    segments, source_lang, target_lang,
+                    batch_size=self.max_batch_segments,
+                    max_batch_tokens=self.max_batch_tokens, profile=profile
+                )
+            )
+        except Exception as e:
+            logger.error(f"❌ Erreur du lot {pair}: {str(e)}")
+            for _, future in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Redistribution des traductions à chaque requête
+        start = 0
+        for item_segments, future in batch.items:
+            end = start + len(item_segments)
+            if not future.done():
+                future.set_result(translated[start:end])
+            start = end
+
+
+def _languages(params) -> Tuple[str, str, str]:
+    """Langues et profil de décodage de la requête, validés avant d'entrer dans un lot"""
+    source_lang = params.get("source_lang")
+    target_lang = params.get("target_lang")
+    if not source_lang or not target_lang:
+        raise web.HTTPBadRequest(text="source_lang et target_lang sont requis")
+    if source_lang == target_lang:
+        raise web.HTTPBadRequest(text="Les langues source et cible doivent être différentes")
+    try:
+        model_cache.plan_route(source_lang, target_lang)
+        profile, _ = text_translator.get_profile(params.get("profile"))
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    return source_lang, target_lang, profile
+
+
+async def _read_upload(request: web.Request) -> Tuple[BinaryIO, str, Dict[str, str]]:
+    """Fichier (temporaire, écrit par aiohttp) et champs d'un formulaire multipart"""
+    form = await request.post()
+    upload = form.get("file")
+    if upload is None or not hasattr(upload, "file"):
+        raise web.HTTPBadRequest(text="Champ 'file' manquant")
+    fields = {k: v for k, v in form.items() if isinstance(v, str)}
+    extension = os.path.splitext(upload.filename or "")[1].lstrip(".").lower()
+    return upload.file, fields.get("format", extension), fields
+
+
+async def _translate_text(request: web.Request, text: str, source_lang: str,
+                          target_lang: str, profile: str) -> str:
+    # Le regroupement des phrases mesure les tokens : hors de la boucle d'événements
+    paragraphs = await _run_io(request, functools.partial(text_translator.pack_text,
+                                                          profile=profile),
+                               text, source_lang, target_lang)
+    translated = await request.app["batcher"].translate(
+        [segment for para in paragraphs for segment in para],
+        source_lang, target_lang, profile
+    )
+    return "\n".join(text_translator.join_paragraphs(paragraphs, translated))
+
+
+async def _run_io(request: web.Request, func, *args):
+    """Extraction (OCR, PDF, audio) hors de la boucle et hors de l'exécuteur d'inférence"""
+    return await asyncio.get_running_loop().run_in_executor(
+        request.app["io_executor"], func, *args
+    )
+
+
+async def handle_text(request: web.Request) -> web.Response:
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="JSON invalide")
+    source_lang, target_lang, profile = _languages(payload)
+    text = payload.get("text") or ""
+    translation = await _translate_text(request, text, source_lang, target_lang, profile)
+    return web.json_response({"translation": translation, "source_lang": source_lang,
+                              "target_lang": target_lang, "profile": profile})
+
+
+async def handle_file(request: web.Request) -> web.Response:
+    from utils.file_translator import file_translator
+
+    upload, file_type, fields = await _read_upload(request)
+    source_lang, target_lang, profile = _languages(fields)
+    try:
+        original = await _run_io(request, file_translator.extract_text, upload, file_type)
+    except Exception as e:
+        raise web.HTTPBadRequest(text=str(e))
+    translation = await _translate_text(request, original, source_lang, target_lang, profile)
+    return web.json_response({"original": original, "translation": translation})
+
+
+async def handle_image(request: web.Request) -> web.Response:
+    from PIL import Image
+    from utils.image_translator import image_translator
+
+    upload, _, fields = await _read_upload(request)
+    source_lang, target_lang, profile = _languages(fields)
+
+    def extract() -> str:
+        image = Image.open(upload)
+        pages = image_translator.extract_text_batch(
+            image_translator.split_frames(image), source_lang
+        )
+        return "\n\n".join(page for page in pages if page.strip())
+
+    try:
+        original = await _run_io(request, extract)
+    except Exception as e:
+        raise web.HTTPBadRequest(text=str(e))
+    translation = await _translate_text(request, original, source_lang, target_lang, profile)
+    return web.json_response({"original": original, "translation": translation})
+
+
+async def handle_audio(request: web.Request) -> web.Response:
+    from utils.audio_translator import audio_translator
+
+    upload, audio_format, fields = await _read_upload(request)
+    source_lang, target_lang, profile = _languages(fields)
+    try:
+        original = await _run_io(request, audio_translator.transcribe_audio,
+                                 upload, audio_format, source_lang)
+    except Exception as e:
+        raise web.HTTPBadRequest(text=str(e))
+    translation = await _translate_text(request, original, source_lang, target_lang, profile)
+    return web.json_response({"original": original, "translation": translation})
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok", "model_cache": model_cache.stats(),
+                              "inference": inference_scheduler.stats()})
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+
+async def handle_metrics_json(request: web.Request) -> web.Response:
+    return web.json_response(metrics.to_json())
+
+
+def create_app(max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+               max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+               max_batch_segments: int = DEFAULT_MAX_BATCH_SEGMENTS,
+               max_upload_mb: int = DEFAULT_MAX_UPLOAD_MB) -> web.Application:
+    """
+    Construit l'application aiohttp
+
+    Args:
+        max_wait_ms: Attente maximale d'un lot avant envoi au modèle
+        max_batch_tokens: Budget de tokens (estimé) déclenchant l'envoi immédiat
+        max_batch_segments: Nombre de segments déclenchant l'envoi immédiat
+        max_upload_mb: Taille maximale des fichiers envoyés
+    """
+    app = web.Application(client_max_size=max_upload_mb * 1024 * 1024)
+
+    # Un seul thread d'inférence : le parallélisme vient des lots, pas des appels concurrents
+    inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+    app["io_executor"] = ThreadPoolExecutor(thread_name_prefix="extract")
+    app["batcher"] = DynamicBatcher(inference_executor, max_wait_ms,
+                                    max_batch_tokens, max_batch_segments)
+
+    async def warmup(app: web.Application):
+        # Paires de TRANSLATOR_WARMUP_PAIRS chargées en arrière-plan dès le démarrage
+        model_cache.start_warmup()
+
+    async def shutdown(app: web.Application):
+        inference_executor.shutdown(wait=False, cancel_futures=True)
+        app["io_executor"].shutdown(wait=False, cancel_futures=True)
+
+    app.on_startup.append(warmup)
+    app.on_cleanup.append(shutdown)
+    app.add_routes([
+        web.post("/translate/text", handle_text),
+        web.post("/translate/file", handle_file),
+        web.post("/translate/image", handle_image),
+        web.post("/translate/audio", handle_audio),
+        web.get("/health", handle_health),
+        web.get("/metrics", handle_metrics),
+        web.get("/metrics.json", handle_metrics_json),
+    ])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP de traduction")
+    parser.add_argument("--host", default=os.environ.get("TRANSLATOR_SERVER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int,
+                        default=int(os.environ.get("TRANSLATOR_SERVER_PORT", 8080)))
+    parser.add_argument("--max-wait-ms", type=float,
+                        default=float(os.environ.get("TRANSLATOR_SERVER_MAX_WAIT_MS",
+                                                     DEFAULT_MAX_WAIT_MS)))
+    parser.add_argument("--max-batch-tokens", type=int,
+                        default=int(os.environ.get("TRANSLATOR_SERVER_MAX_BATCH_TOKENS",
+                                                   DEFAULT_MAX_BATCH_TOKENS)))
+    parser.add_argument("--max-batch-segments", type=int,
+                        default=int(os.environ.get("TRANSLATOR_SERVER_MAX_BATCH_SEGMENTS",
+                                                   DEFAULT_MAX_BATCH_SEGMENTS)))
+    parser.add_argument("--max-upload-mb", type=int,
+                        default=int(os.environ.get("TRANSLATOR_SERVER_MAX_UPLOAD_MB",
+                                                   DEFAULT_MAX_UPLOAD_MB)))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    app = create_app(args.max_wait_ms, args.max_batch_tokens,
+                     args.max_batch_segments, args.max_upload_mb)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,62 @@ Module de transcription audio et traduction
 """
 import speech_recognition as sr
 from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
 import io
-import tempfile
 import os
+import time
+import wave
+from models.extraction_cache import extraction_cache
+from utils.metrics import metrics
+from utils.speech_recognizers import GoogleSpeechRecognizer, SpeechRecognizer
 from utils.text_translator import text_translator
+from utils.uploads import FileSource, open_source
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Découpage : extraits de 50 s au plus (limite du service vers 60 s)
+DEFAULT_MAX_CHUNK_MS = 50_000
+MIN_SILENCE_MS = 500
+KEEP_SILENCE_MS = 200
+# Extrait plus court : fusionné avec son voisin plutôt qu'envoyé seul, quitte
+# à dépasser la durée visée d'au plus MERGE_OVERSHOOT_MS (sous la limite du service)
+MIN_CHUNK_MS = 1_000
+MERGE_OVERSHOOT_MS = 5_000
+# Seuil de silence relatif au volume moyen de l'enregistrement
+SILENCE_THRESH_OFFSET_DB = 16
+
+# Format attendu par la reconnaissance : mono, 16 kHz, PCM 16 bits
+TARGET_CHANNELS = 1
+TARGET_FRAME_RATE = 16000
+TARGET_SAMPLE_WIDTH = 2
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1.0
+
 
 class AudioTranslator:
     """Transcription audio vers texte et traduction"""
     
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
+    def __init__(self, recognizer: Optional[SpeechRecognizer] = None,
+                 max_concurrency: Optional[int] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+                 max_chunk_ms: int = DEFAULT_MAX_CHUNK_MS):
+        self.speech_recognizer = recognizer or GoogleSpeechRecognizer()
         self.translator = text_translator
         
+        # Reconnaissance concurrente des extraits, avec réessais
+        self.max_concurrency = max_concurrency or int(
+            os.environ.get("TRANSLATOR_ASR_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+        )
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_chunk_ms = max_chunk_ms
+        
         # Mapping des codes de langue pour Google Speech
         self.speech_lang_map = {
             "fr": "fr-FR",
@@ -29,80 +69,220 @@ class AudioTranslator:
             "it": "it-IT",
         }
     
-    def convert_to_wav(self, audio_bytes: bytes, audio_format: str) -> bytes:
+    def convert_to_wav(self, source: FileSource, audio_format: str) -> bytes:
         """
         Convertit un fichier audio en WAV pour la reconnaissance vocale
         
         Args:
-            audio_bytes: Données audio
+            source: Données audio (octets, chemin ou objet fichier)
             audio_format: Format d'origine (mp3, ogg, wav, etc.)
         
         Returns:
             Données WAV
         """
+        audio = self.load_audio(source, audio_format)
+        
+        # Exporter en WAV
+        wav_io = io.BytesIO()
+        audio.export(wav_io, format="wav")
+        return wav_io.getvalue()
+    
+    def _read_pcm_wav(self, source: FileSource) -> Optional[AudioSegment]:
+        """Lit directement un WAV déjà en mono 16 kHz 16 bits (sans ré-encodage)"""
         try:
-            # Charger l'audio
-            audio = AudioSegment.from_file(
-                io.BytesIO(audio_bytes), 
-                format=audio_format
-            )
-            
-            # Convertir en WAV mono 16kHz (optimal pour Speech Recognition)
-            audio = audio.set_channels(1).set_frame_rate(16000)
-            
-            # Exporter en WAV
-            wav_io = io.BytesIO()
-            audio.export(wav_io, format="wav")
-            wav_io.seek(0)
-            
-            return wav_io.read()
+            # Seules les trames PCM sont lues, sans copie préalable du fichier
+            with open_source(source) as f, wave.open(f) as wav_file:
+                if (wav_file.getnchannels() != TARGET_CHANNELS
+                        or wav_file.getframerate() != TARGET_FRAME_RATE
+                        or wav_file.getsampwidth() != TARGET_SAMPLE_WIDTH):
+                    return None
+                frames = wav_file.readframes(wav_file.getnframes())
+        except (wave.Error, EOFError):
+            # WAV compressé ou en-tête non standard : décodage par pydub
+            return None
+        
+        return AudioSegment(
+            data=frames,
+            sample_width=TARGET_SAMPLE_WIDTH,
+            frame_rate=TARGET_FRAME_RATE,
+            channels=TARGET_CHANNELS
+        )
+    
+    def load_audio(self, source: FileSource, audio_format: str) -> AudioSegment:
+        """
+        Décode l'audio en PCM mono 16 kHz 16 bits, entièrement en mémoire
+        
+        Les conversions ne sont appliquées que si nécessaires (chacune copie
+        tout le signal) ; un WAV déjà au bon format n'est pas ré-encodé.
+        """
+        try:
+            if audio_format.lower() == 'wav':
+                audio = self._read_pcm_wav(source)
+                if audio is not None:
+                    return audio
             
+            logger.info(f"🔄 Conversion {audio_format} → PCM mono 16 kHz")
+            with open_source(source) as f:
+                audio = AudioSegment.from_file(f, format=audio_format)
+            if audio.channels != TARGET_CHANNELS:
+                audio = audio.set_channels(TARGET_CHANNELS)
+            if audio.frame_rate != TARGET_FRAME_RATE:
+                audio = audio.set_frame_rate(TARGET_FRAME_RATE)
+            if audio.sample_width != TARGET_SAMPLE_WIDTH:
+                audio = audio.set_sample_width(TARGET_SAMPLE_WIDTH)
+            return audio
         except Exception as e:
             raise Exception(f"Erreur lors de la conversion audio: {str(e)}")
     
-    def transcribe_audio(self, audio_bytes: bytes, audio_format: str, 
-                        source_lang: str) -> str:
+    def to_audio_data(self, audio: AudioSegment, start_ms: int, end_ms: int) -> sr.AudioData:
+        """Extrait [start_ms, end_ms) en AudioData, sans copier les échantillons"""
+        frame_width = audio.sample_width * audio.channels
+        start = int(start_ms * audio.frame_rate / 1000) * frame_width
+        end = int(end_ms * audio.frame_rate / 1000) * frame_width
+        pcm = memoryview(audio.raw_data)[start:end]
+        return sr.AudioData(pcm, audio.frame_rate, audio.sample_width)
+    
+    def split_on_silence(self, audio: AudioSegment) -> List[Tuple[int, int]]:
+        """
+        Découpe l'audio sur les silences en extraits de durée bornée
+        
+        Args:
+            audio: Enregistrement complet
+        
+        Returns:
+            Bornes (début, fin) en ms des extraits, dans l'ordre, chacun
+            d'au plus max_chunk_ms (MERGE_OVERSHOOT_MS de plus pour un
+            extrait qui a absorbé un voisin trop court)
+        """
+        if len(audio) <= self.max_chunk_ms:
+            return [(0, len(audio))]
+        
+        speech = detect_nonsilent(
+            audio,
+            min_silence_len=MIN_SILENCE_MS,
+            silence_thresh=audio.dBFS - SILENCE_THRESH_OFFSET_DB,
+            seek_step=10
+        )
+        if not speech:
+            return []
+        
+        # Marge pour le silence conservé de part et d'autre de chaque extrait
+        max_ms = max(self.max_chunk_ms - 2 * KEEP_SILENCE_MS, MIN_CHUNK_MS)
+        
+        # Regrouper les passages parlés tant que l'extrait reste court
+        spans = []
+        start, end = speech[0]
+        for span_start, span_end in speech[1:]:
+            if span_end - start <= max_ms:
+                end = span_end
+            else:
+                spans.append((start, end))
+                start, end = span_start, span_end
+        spans.append((start, end))
+        
+        # Un passage sans silence plus long que la limite est coupé net, en
+        # parts égales (pas de reliquat minuscule en fin de passage)
+        pieces = []
+        for start, end in spans:
+            parts = -(-(end - start) // max_ms)
+            bounds = [start + (end - start) * i // parts for i in range(parts + 1)]
+            pieces.extend(zip(bounds, bounds[1:]))
+        
+        # Extrait trop court : fusionné avec le précédent (ou le suivant)
+        merged = [pieces[0]]
+        for start, end in pieces[1:]:
+            prev_start, prev_end = merged[-1]
+            short = end - start < MIN_CHUNK_MS or prev_end - prev_start < MIN_CHUNK_MS
+            if short and end - prev_start <= max_ms + MERGE_OVERSHOOT_MS:
+                merged[-1] = (prev_start, end)
+            else:
+                merged.append((start, end))
+        
+        # Silence conservé autour des extraits, sans empiéter sur les voisins
+        chunks = []
+        for index, (start, end) in enumerate(merged):
+            before = merged[index - 1][1] if index else 0
+            after = merged[index + 1][0] if index + 1 < len(merged) else len(audio)
+            chunks.append((max(before, start - KEEP_SILENCE_MS),
+                           min(after, end + KEEP_SILENCE_MS)))
+        return chunks
+    
+    def recognize_chunk(self, audio: sr.AudioData, speech_lang: str) -> str:
+        """Transcrit un extrait, avec réessais et attente exponentielle"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with metrics.span("asr.chunk", lang=speech_lang):
+                    return self.speech_recognizer.recognize(audio, speech_lang)
+            except sr.UnknownValueError:
+                # Extrait sans parole exploitable : ignoré
+                return ""
+            except sr.RequestError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt)
+                logger.warning(f"⚠️ Service vocal indisponible ({str(e)}), nouvel essai dans {delay:.1f}s")
+                time.sleep(delay)
+    
+    def transcribe_audio(self, source: FileSource, audio_format: str, 
+                        source_lang: str,
+                        progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
         """
         Transcrit un fichier audio en texte
         
+        Les enregistrements longs sont découpés sur les silences et les
+        extraits sont transcrits en parallèle, puis réassemblés dans l'ordre.
+        
         Args:
-            audio_bytes: Données audio
+            source: Données audio (octets, chemin ou objet fichier)
             audio_format: Format du fichier (mp3, wav, ogg)
             source_lang: Code langue (fr, en, ar, etc.)
+            progress_callback: Reçoit (extraits transcrits, extraits au total) ;
+                une exception levée par la fonction interrompt la transcription
         
         Returns:
             Texte transcrit
         """
+        # Obtenir le code langue
+        speech_lang = self.speech_lang_map.get(source_lang, "en-US")
+        
+        # Même enregistrement, même langue et même moteur : transcription réutilisée
+        cache_key = extraction_cache.make_key(
+            source, kind="asr", format=audio_format.lower(), speech_lang=speech_lang,
+            recognizer=type(self.speech_recognizer).__name__, max_chunk_ms=self.max_chunk_ms
+        )
+        cached = extraction_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Convertir en WAV si nécessaire
-            if audio_format.lower() != 'wav':
-                logger.info(f"🔄 Conversion {audio_format} → WAV")
-                audio_bytes = self.convert_to_wav(audio_bytes, audio_format)
-            
-            # Créer un fichier temporaire
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                tmp_file.write(audio_bytes)
-                tmp_path = tmp_file.name
+            # Décodage en mémoire, sans fichier temporaire
+            with metrics.span("audio.decode", format=audio_format.lower()):
+                audio = self.load_audio(source, audio_format)
+            with metrics.span("audio.split"):
+                spans = self.split_on_silence(audio)
+            chunks = [self.to_audio_data(audio, start, end) for start, end in spans]
             
+            # Reconnaissance vocale
+            logger.info(f"🎤 Transcription en cours ({speech_lang}, {len(chunks)} extraits)...")
+            executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
             try:
-                # Charger l'audio avec SpeechRecognition
-                with sr.AudioFile(tmp_path) as source:
-                    audio = self.recognizer.record(source)
-                
-                # Obtenir le code langue
-                speech_lang = self.speech_lang_map.get(source_lang, "en-US")
-                
-                # Reconnaissance vocale
-                logger.info(f"🎤 Transcription en cours ({speech_lang})...")
-                text = self.recognizer.recognize_google(audio, language=speech_lang)
-                
-                logger.info(f"✅ Transcription réussie: {len(text)} caractères")
-                return text
-                
+                futures = [executor.submit(self.recognize_chunk, chunk, speech_lang)
+                           for chunk in chunks]
+                for done, _ in enumerate(as_completed(futures), 1):
+                    if progress_callback:
+                        progress_callback(done, len(futures))
+                parts = [future.result() for future in futures]
             finally:
-                # Supprimer le fichier temporaire
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+                # Interruption : les extraits pas encore envoyés sont abandonnés
+                executor.shutdown(wait=False, cancel_futures=True)
+            
+            text = " ".join(part.strip() for part in parts if part and part.strip())
+            if not text:
+                raise sr.UnknownValueError()
+            
+            logger.info(f"✅ Transcription réussie: {len(text)} caractères")
+            extraction_cache.put(cache_key, text)
+            return text
             
         except sr.UnknownValueError:
             raise Exception("⚠️ Impossible de comprendre l'audio")
@@ -112,16 +292,18 @@ class AudioTranslator:
             logger.error(f"❌ Erreur transcription: {str(e)}")
             raise
     
-    def translate_audio(self, audio_bytes: bytes, audio_format: str, 
-                       source_lang: str, target_lang: str) -> str:
+    def translate_audio(self, source: FileSource, audio_format: str, 
+                       source_lang: str, target_lang: str,
+                       profile: Optional[str] = None) -> str:
         """
         Transcrit et traduit un fichier audio
         
         Args:
-            audio_bytes: Données audio
+            source: Données audio (octets, chemin ou objet fichier)
             audio_format: Format du fichier
             source_lang: Langue source
             target_lang: Langue cible
+            profile: Profil de décodage (fast, balanced, quality)
         
         Returns:
             Texte traduit
@@ -129,7 +311,7 @@ class AudioTranslator:
         try:
             # Transcription
             transcribed_text = self.transcribe_audio(
-                audio_bytes, audio_format, source_lang
+                source, audio_format, source_lang
             )
             
             if not transcribed_text.strip():
@@ -137,7 +319,7 @@ class AudioTranslator:
             
             # Traduction
             translated_text = self.translator.translate(
-                transcribed_text, source_lang, target_lang
+                transcribed_text, source_lang, target_lang, profile=profile
             )
             
             return translated_text
@@ -146,6 +328,38 @@ class AudioTranslator:
             logger.error(f"❌ Erreur traduction audio: {str(e)}")
             raise
 
+    def translate_audio_multi(self, source: FileSource, audio_format: str,
+                              source_lang: str, target_langs: List[str],
+                              profile: Optional[str] = None) -> Dict[str, str]:
+        """
+        Transcrit un fichier audio une seule fois et le traduit vers plusieurs langues
+        
+        Args:
+            source: Données audio (octets, chemin ou objet fichier)
+            audio_format: Format du fichier
+            source_lang: Langue source
+            target_langs: Langues cibles
+            profile: Profil de décodage (fast, balanced, quality)
+        
+        Returns:
+            Dictionnaire langue cible -> texte traduit
+        """
+        try:
+            transcribed_text = self.transcribe_audio(
+                source, audio_format, source_lang
+            )
+            
+            if not transcribed_text.strip():
+                return {target: "⚠️ Aucun texte transcrit" for target in target_langs}
+            
+            return self.translator.translate_multi(
+                transcribed_text, source_lang, target_langs, profile=profile
+            )
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur traduction audio: {str(e)}")
+            raise
+
 
 # Instance globale
 audio_translator = AudioTranslator()
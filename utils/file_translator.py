@@ -1,15 +1,37 @@
 """
 Module de traitement et traduction de fichiers (TXT, PDF, DOCX)
+
+Les fichiers sont acceptés en octets, chemin ou objet fichier : les PDF
+volumineux sont projetés en mémoire (mmap) et les TXT décodés ligne à ligne.
 """
-from typing import Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import io
+import queue
+import threading
 from PyPDF2 import PdfReader
 from docx import Document
-from utils.text_translator import text_translator
+from docx.oxml.simpletypes import ST_Merge
+from docx.table import Table, _Cell
+from models.extraction_cache import extraction_cache
+from utils.metrics import metrics
+from utils.text_translator import TranslationJob, text_translator
+from utils.uploads import FileSource, iter_text_lines, map_source, open_source, source_size
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Nombre de pages extraites d'avance par le producteur
+DEFAULT_PDF_QUEUE_SIZE = 4
+
+# Taille (en caractères) des parties d'un TXT traduites successivement
+TXT_PART_CHARS = 64 * 1024
+
+_END_OF_PAGES = object()
+
+# Textes d'un paragraphe Word (y compris liens), hors zones de texte imbriquées
+_DOCX_TEXT_XPATH = ".//w:t[not(ancestor::w:txbxContent)]"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
 
 class FileTranslator:
     """Traducteur de fichiers multiples formats"""
@@ -17,53 +39,282 @@ class FileTranslator:
     def __init__(self):
         self.translator = text_translator
     
-    def extract_text_from_txt(self, file_bytes: bytes) -> str:
-        """Extrait le texte d'un fichier TXT"""
+    def extract_text_from_txt(self, source: FileSource) -> str:
+        """Extrait le texte d'un fichier TXT (UTF-8, sinon latin-1)"""
         try:
-            text = file_bytes.decode('utf-8')
-            return text
-        except UnicodeDecodeError:
-            # Essayer avec d'autres encodages
+            with metrics.span("txt.decode"):
+                return "".join(iter_text_lines(source))
+        except Exception as e:
+            raise Exception(f"Impossible de décoder le fichier TXT: {str(e)}")
+    
+    def iter_txt_parts(self, source: FileSource,
+                       max_chars: int = TXT_PART_CHARS) -> Iterator[str]:
+        """Parties d'un TXT faites de lignes entières, décodées à la volée"""
+        lines: List[str] = []
+        size = 0
+        with metrics.span("txt.decode"):
+            for line in iter_text_lines(source):
+                lines.append(line)
+                size += len(line)
+                if size >= max_chars:
+                    yield "".join(lines)
+                    lines, size = [], 0
+            if lines:
+                yield "".join(lines)
+    
+    def iter_pdf_pages(self, source: FileSource,
+                       page_range: Optional[Tuple[int, int]] = None,
+                       queue_size: int = DEFAULT_PDF_QUEUE_SIZE,
+                       page_count_callback: Optional[Callable[[int], None]] = None
+                       ) -> Iterator[str]:
+        """
+        Extrait les pages d'un PDF à la demande, dans un thread producteur
+        
+        L'analyse PyPDF2 de la page suivante se fait pendant la traduction
+        de la page courante ; la file bornée limite la mémoire à quelques pages.
+        
+        Args:
+            source: Fichier PDF (octets, chemin ou objet fichier)
+            page_range: Pages à extraire (première, dernière), numérotées à
+                partir de 1 et incluses ; None pour tout le document
+            queue_size: Nombre maximal de pages extraites en attente
+            page_count_callback: Reçoit le nombre de pages à extraire, avant la
+                première page
+        
+        Yields:
+            Texte de chaque page, dans l'ordre
+        """
+        pages: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        
+        def put(item) -> bool:
+            # Abandon si le consommateur a arrêté la lecture
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
             try:
-                text = file_bytes.decode('latin-1')
-                return text
-            except:
-                raise Exception("Impossible de décoder le fichier TXT")
+                # Fichier sur disque projeté en mémoire : pas de copie dans le tas
+                with map_source(source) as stream:
+                    reader = PdfReader(stream)
+                    # Les pages sont analysées uniquement à l'accès
+                    first, last = 1, len(reader.pages)
+                    if page_range:
+                        first = max(page_range[0], 1)
+                        last = min(page_range[1] or last, last)
+                    if page_count_callback:
+                        page_count_callback(max(last - first + 1, 0))
+                    for index in range(first - 1, last):
+                        with metrics.span("pdf.page"):
+                            page_text = reader.pages[index].extract_text() or ""
+                        if not put(page_text):
+                            return
+                put(_END_OF_PAGES)
+            except Exception as e:
+                put(e)
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _END_OF_PAGES:
+                    break
+                if isinstance(item, Exception):
+                    raise Exception(f"Erreur lors de la lecture du PDF: {str(item)}")
+                yield item
+        finally:
+            stop.set()
     
-    def extract_text_from_pdf(self, file_bytes: bytes) -> str:
+    def extract_text_from_pdf(self, source: FileSource,
+                              page_range: Optional[Tuple[int, int]] = None) -> str:
         """Extrait le texte d'un fichier PDF"""
+        return "\n\n".join(self.iter_pdf_pages(source, page_range)).strip()
+    
+    def _iter_block_paragraphs(self, container) -> Iterator:
+        """Paragraphes d'un conteneur Word dans l'ordre, cellules de tableaux comprises"""
+        for block in container.iter_inner_content():
+            if isinstance(block, Table):
+                # Parcours direct des w:tr/w:tc : row.cells exige un w:tblGrid,
+                # absent des tableaux produits par certains outils
+                for tr in block._tbl.tr_lst:
+                    for tc in tr.tc_lst:
+                        # Suite d'une fusion verticale : le contenu est dans la première cellule
+                        if tc.vMerge == ST_Merge.CONTINUE:
+                            continue
+                        yield from self._iter_block_paragraphs(_Cell(tc, block))
+            else:
+                yield block
+    
+    def iter_docx_paragraphs(self, doc) -> Iterator:
+        """Paragraphes du corps, des tableaux, des en-têtes et des pieds de page"""
+        yield from self._iter_block_paragraphs(doc)
+        for section in doc.sections:
+            for part in (section.header, section.footer,
+                         section.first_page_header, section.first_page_footer,
+                         section.even_page_header, section.even_page_footer):
+                # Un en-tête lié à la section précédente n'a pas de contenu propre
+                if not part.is_linked_to_previous:
+                    yield from self._iter_block_paragraphs(part)
+    
+    def extract_text_from_docx(self, source: FileSource) -> str:
+        """Extrait le texte d'un fichier DOCX (corps, tableaux, en-têtes et pieds de page)"""
         try:
-            pdf_file = io.BytesIO(file_bytes)
-            reader = PdfReader(pdf_file)
-            
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n\n"
+            with metrics.span("docx.extract"), open_source(source) as f:
+                doc = Document(f)
+                text = "\n".join(para.text for para in self.iter_docx_paragraphs(doc))
             
             return text.strip()
         except Exception as e:
-            raise Exception(f"Erreur lors de la lecture du PDF: {str(e)}")
+            raise Exception(f"Erreur lors de la lecture du DOCX: {str(e)}")
     
-    def extract_text_from_docx(self, file_bytes: bytes) -> str:
-        """Extrait le texte d'un fichier DOCX"""
+    def set_paragraph_text(self, paragraph, text: str):
+        """
+        Remplace le texte d'un paragraphe en conservant sa structure
+        
+        Le texte va dans le premier élément texte (mise en forme du premier
+        run), les suivants sont vidés : styles, liens et images sont conservés.
+        """
+        elements = paragraph._p.xpath(_DOCX_TEXT_XPATH)
+        if not elements:
+            return
+        elements[0].text = text
+        elements[0].set(_XML_SPACE, "preserve")
+        for element in elements[1:]:
+            element.text = ""
+    
+    def _read_docx(self, source: FileSource) -> Tuple[object, List, List[str]]:
+        """Document, paragraphes non vides et leur texte (une ligne par paragraphe)"""
+        with metrics.span("docx.extract"), open_source(source) as f:
+            doc = Document(f)
+            paragraphs = [para for para in self.iter_docx_paragraphs(doc)
+                          if para.text.strip()]
+            # Les sauts de ligne internes deviennent des espaces
+            lines = [" ".join(para.text.split()) for para in paragraphs]
+        return doc, paragraphs, lines
+    
+    def _write_docx(self, doc, paragraphs: List, translated_lines: List[str]) -> bytes:
+        """Réécrit chaque paragraphe avec sa traduction et sérialise le document"""
+        with metrics.span("docx.write"):
+            for para, line in zip(paragraphs, translated_lines):
+                self.set_paragraph_text(para, line)
+            return self._save_docx(doc)
+    
+    def _save_docx(self, doc) -> bytes:
+        output = io.BytesIO()
+        doc.save(output)
+        return output.getvalue()
+    
+    def translate_docx(self, source: FileSource, source_lang: str, target_lang: str,
+                       profile: Optional[str] = None,
+                       progress_callback: Optional[Callable[[int, int], None]] = None
+                       ) -> Tuple[str, str, bytes]:
+        """
+        Traduit un DOCX en conservant sa structure
+        
+        Tous les paragraphes (corps, cellules, en-têtes, pieds de page) forment
+        un seul travail traduit par lots, puis chaque traduction est réécrite
+        à sa place dans le document.
+        
+        Args:
+            source: Fichier DOCX (octets, chemin ou objet fichier)
+            source_lang: Langue source
+            target_lang: Langue cible
+            profile: Profil de décodage (fast, balanced, quality)
+            progress_callback: Reçoit (segments traduits, segments au total)
+        
+        Returns:
+            Tuple (texte_original, texte_traduit, DOCX traduit)
+        """
         try:
-            docx_file = io.BytesIO(file_bytes)
-            doc = Document(docx_file)
+            doc, paragraphs, lines = self._read_docx(source)
             
-            text = ""
-            for para in doc.paragraphs:
-                text += para.text + "\n"
+            if not lines:
+                return "", "⚠️ Aucun texte trouvé dans le fichier", self._save_docx(doc)
+            
+            # Fenêtres successives d'un même travail : progression et annulation
+            # entre deux fenêtres, déduplication sur tout le document
+            job = TranslationJob()
+            translated_lines = []
+            for window in self.translator.translate_stream(
+                "\n".join(lines), source_lang, target_lang, profile=profile, job=job,
+                progress_callback=progress_callback
+            ):
+                translated_lines.extend(window)
+            job.report()
+            
+            output = self._write_docx(doc, paragraphs, translated_lines)
+            
+            logger.info(f"✅ DOCX traduit : {len(paragraphs)} paragraphes")
+            return "\n".join(lines), "\n".join(translated_lines), output
             
-            return text.strip()
         except Exception as e:
-            raise Exception(f"Erreur lors de la lecture du DOCX: {str(e)}")
+            logger.error(f"❌ Erreur traduction DOCX: {str(e)}")
+            raise Exception(f"Erreur lors de la traduction du DOCX: {str(e)}")
+    
+    def translate_docx_multi(self, source: FileSource, source_lang: str,
+                             target_langs: List[str], profile: Optional[str] = None,
+                             progress_callback: Optional[Callable[[int, int], None]] = None
+                             ) -> Tuple[str, Dict[str, Tuple[str, bytes]]]:
+        """
+        Traduit un DOCX vers plusieurs langues cibles
+        
+        Le texte est extrait et traduit en un seul travail multi-cibles, puis
+        chaque traduction est réécrite dans sa propre copie du document.
+        
+        Args:
+            source: Fichier DOCX (octets, chemin ou objet fichier)
+            source_lang: Langue source
+            target_langs: Langues cibles
+            profile: Profil de décodage (fast, balanced, quality)
+            progress_callback: Reçoit (segments traduits, segments au total)
+        
+        Returns:
+            Tuple (texte_original, langue cible -> (texte_traduit, DOCX traduit))
+        """
+        try:
+            doc, paragraphs, lines = self._read_docx(source)
+            
+            if not lines:
+                output = self._save_docx(doc)
+                return "", {target: ("⚠️ Aucun texte trouvé dans le fichier", output)
+                            for target in target_langs}
+            
+            translations = self.translator.translate_multi_lines(
+                "\n".join(lines), source_lang, target_langs, profile=profile,
+                progress_callback=progress_callback
+            )
+            
+            results = {}
+            for index, (target, translated_lines) in enumerate(translations.items()):
+                if index > 0:
+                    # Chaque langue réécrit un document relu depuis la source
+                    doc, paragraphs, _ = self._read_docx(source)
+                output = self._write_docx(doc, paragraphs, translated_lines)
+                results[target] = ("\n".join(translated_lines), output)
+            
+            logger.info(f"✅ DOCX traduit : {len(paragraphs)} paragraphes, "
+                        f"{len(results)} langues")
+            return "\n".join(lines), results
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur traduction DOCX: {str(e)}")
+            raise Exception(f"Erreur lors de la traduction du DOCX: {str(e)}")
     
-    def extract_text(self, file_bytes: bytes, file_type: str) -> str:
+    def extract_text(self, source: FileSource, file_type: str) -> str:
         """
         Extrait le texte selon le type de fichier
         
+        Le résultat est mis en cache (hash du contenu + type) : une nouvelle
+        traduction du même fichier ne refait pas l'extraction.
+        
         Args:
-            file_bytes: Contenu du fichier en bytes
+            source: Contenu du fichier (octets, chemin ou objet fichier)
             file_type: Extension du fichier (txt, pdf, docx)
         
         Returns:
@@ -80,32 +331,58 @@ class FileTranslator:
         if file_type not in extractors:
             raise ValueError(f"Type de fichier non supporté: {file_type}")
         
-        return extractors[file_type](file_bytes)
+        return extraction_cache.get_or_compute(
+            source, lambda: extractors[file_type](source),
+            kind="file", file_type=file_type, page_range=None
+        )
     
-    def translate_file(self, file_bytes: bytes, file_type: str, 
-                      source_lang: str, target_lang: str) -> Tuple[str, str]:
+    def _iter_pdf_pages_cached(self, source: FileSource,
+                               page_range: Optional[Tuple[int, int]],
+                               page_count_callback: Optional[Callable[[int], None]] = None
+                               ) -> Iterator[str]:
+        """Pages d'un PDF, ou texte complet en une partie s'il est déjà en cache"""
+        params = {"kind": "file", "file_type": "pdf",
+                  "page_range": tuple(page_range) if page_range else None}
+        key = extraction_cache.make_key(source, **params)
+        cached = extraction_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        pages = []
+        for page in self.iter_pdf_pages(source, page_range,
+                                        page_count_callback=page_count_callback):
+            pages.append(page)
+            yield page
+        # Enregistré seulement si le document a été lu jusqu'au bout
+        extraction_cache.put(key, "\n\n".join(pages).strip())
+    
+    def translate_file(self, source: FileSource, file_type: str, 
+                      source_lang: str, target_lang: str,
+                      profile: Optional[str] = None) -> Tuple[str, str]:
         """
         Extrait et traduit le contenu d'un fichier
         
         Args:
-            file_bytes: Contenu du fichier
+            source: Contenu du fichier (octets, chemin ou objet fichier)
             file_type: Type du fichier
             source_lang: Langue source
             target_lang: Langue cible
+            profile: Profil de décodage (fast, balanced, quality)
         
         Returns:
             Tuple (texte_original, texte_traduit)
         """
         try:
             # Extraction
-            original_text = self.extract_text(file_bytes, file_type)
+            original_text = self.extract_text(source, file_type)
             
             if not original_text.strip():
                 return "", "⚠️ Aucun texte trouvé dans le fichier"
             
             # Traduction
             translated_text = self.translator.translate(
-                original_text, source_lang, target_lang
+                original_text, source_lang, target_lang, profile=profile
             )
             
             logger.info(f"✅ Fichier {file_type.upper()} traduit avec succès")
@@ -114,6 +391,132 @@ class FileTranslator:
         except Exception as e:
             logger.error(f"❌ Erreur traduction fichier: {str(e)}")
             raise
+    
+    def translate_file_multi(self, source: FileSource, file_type: str,
+                             source_lang: str, target_langs: List[str],
+                             page_range: Optional[Tuple[int, int]] = None,
+                             profile: Optional[str] = None,
+                             progress_callback: Optional[Callable[[int, int], None]] = None
+                             ) -> Tuple[str, Dict[str, str]]:
+        """
+        Extrait le contenu d'un fichier une fois et le traduit vers plusieurs langues
+        
+        Args:
+            source: Contenu du fichier (octets, chemin ou objet fichier)
+            file_type: Type du fichier
+            source_lang: Langue source
+            target_langs: Langues cibles
+            page_range: Pages à traduire (PDF uniquement), bornes incluses
+            profile: Profil de décodage (fast, balanced, quality)
+            progress_callback: Reçoit (segments traduits, segments au total)
+        
+        Returns:
+            Tuple (texte_original, langue cible -> texte traduit)
+        """
+        try:
+            if file_type.lower().strip('.') == 'pdf':
+                original_text = "\n\n".join(
+                    self._iter_pdf_pages_cached(source, page_range)).strip()
+            else:
+                original_text = self.extract_text(source, file_type)
+            
+            if not original_text.strip():
+                return "", {target: "⚠️ Aucun texte trouvé dans le fichier"
+                            for target in target_langs}
+            
+            translations = self.translator.translate_multi(
+                original_text, source_lang, target_langs, profile=profile,
+                progress_callback=progress_callback
+            )
+            
+            logger.info(f"✅ Fichier {file_type.upper()} traduit en {len(translations)} langues")
+            return original_text, translations
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur traduction fichier: {str(e)}")
+            raise
+    
+    def translate_file_stream(self, source: FileSource, file_type: str,
+                              source_lang: str, target_lang: str,
+                              page_range: Optional[Tuple[int, int]] = None,
+                              profile: Optional[str] = None,
+                              progress_callback: Optional[Callable[[float, float], None]] = None
+                              ) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Extrait et traduit un fichier progressivement
+        
+        Les PDF sont traités page par page : l'extraction des pages suivantes
+        se poursuit pendant la traduction. Les TXT sont lus et traduits par
+        parties de lignes entières, sans charger tout le fichier.
+        
+        Args:
+            source: Contenu du fichier (octets, chemin ou objet fichier)
+            file_type: Type du fichier
+            source_lang: Langue source
+            target_lang: Langue cible
+            page_range: Pages à traduire (PDF uniquement), bornes incluses
+            profile: Profil de décodage (fast, balanced, quality)
+            progress_callback: Reçoit (fait, total) après chaque fenêtre traduite,
+                en pages pour les PDF et en octets pour les TXT
+        
+        Yields:
+            Tuples (nouveau texte original, nouvelles lignes traduites)
+        """
+        # Un seul travail pour tout le document : en-têtes et pieds de page
+        # répétés sur chaque page ne sont traduits qu'une fois
+        job = TranslationJob()
+        file_type = file_type.lower().strip('.')
+        # Avancement : pages (PDF), octets (TXT), sinon une seule partie
+        progress = {"done": 0.0, "total": 1.0}
+        if file_type == 'pdf':
+            parts = self._iter_pdf_pages_cached(
+                source, page_range,
+                page_count_callback=lambda count: progress.update(total=float(max(count, 1)))
+            )
+        elif file_type == 'txt':
+            parts = self.iter_txt_parts(source)
+            progress["total"] = float(max(source_size(source), 1))
+        else:
+            parts = iter([self.extract_text(source, file_type)])
+        
+        def report_part(weight: float) -> Optional[Callable[[int, int], None]]:
+            # Avancement de la partie en cours, au prorata des segments traduits
+            if progress_callback is None:
+                return None
+            base = progress["done"]
+            return lambda done, total: progress_callback(
+                min(base + weight * done / max(total, 1), progress["total"]),
+                progress["total"]
+            )
+        
+        route = self.translator.cache.plan_route(source_lang, target_lang)
+        with self.translator.cache.pinned(route):
+            for index, part in enumerate(parts):
+                weight = float(len(part.encode("utf-8"))) if file_type == 'txt' else 1.0
+                if file_type == 'txt':
+                    # Parties contiguës : la fin de ligne finale ne crée pas de ligne vide
+                    original, separator = part, []
+                    part = part[:-1] if part.endswith("\n") else part
+                    if not part.strip():
+                        progress["done"] += weight
+                        yield original, [""] * (part.count("\n") + 1)
+                        continue
+                else:
+                    # Une ligne vide sépare les pages, comme à l'extraction
+                    original = part if index == 0 else "\n\n" + part
+                    separator = [""] if index > 0 else []
+                for lines in self.translator.translate_stream(
+                    part, source_lang, target_lang, profile=profile, job=job,
+                    progress_callback=report_part(weight)
+                ):
+                    yield original, separator + lines
+                    original, separator = "", []
+                progress["done"] += weight
+                if original:
+                    yield original, []
+        if progress_callback:
+            progress_callback(progress["total"], progress["total"])
+        job.report()
 
 
 # Instance globale
@@ -1,29 +1,21 @@
 """
 Module OCR et traduction d'images
 """
-from PIL import Image
+from PIL import Image, ImageSequence
 import pytesseract
 import logging
+import multiprocessing
 import os
-import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+from models.extraction_cache import extraction_cache
+from models.inference_scheduler import available_cores
+from utils.metrics import metrics
+from utils.ocr_workers import TESSERACT_CONFIG, configure_tesseract, init_ocr_worker, ocr_worker
 from utils.text_translator import text_translator
 
-# =============================
-# CONFIGURATION TESSERACT (AUTO)
-# =============================
-# التحقق من نظام التشغيل وضبط مسار Tesseract
-if os.name == "nt":  # Windows
-    tesseract_path = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-    if os.path.exists(tesseract_path):
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
-elif sys.platform == "linux":  # Linux (Streamlit Cloud)
-    # Tesseract مثبت عبر packages.txt
-    tesseract_path = "/usr/bin/tesseract"
-    if os.path.exists(tesseract_path):
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
-
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 
 class ImageTranslator:
@@ -42,6 +34,48 @@ class ImageTranslator:
             "it": "ita",
         }
 
+        # Pool de processus OCR, créé à la première utilisation
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.max_workers = available_cores()
+        self._tesseract_configured = False
+
+    def _ensure_tesseract(self):
+        """Configure Tesseract une seule fois, au premier OCR"""
+        if not self._tesseract_configured:
+            configure_tesseract()
+            self._tesseract_configured = True
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Pool de processus OCR (un par cœur utilisable, affinité CPU comprise)"""
+        if self._pool is None:
+            # Pas de fork d'un processus multithread (Streamlit, torch) : un verrou
+            # hérité dans un état pris bloquerait le processus enfant
+            context = multiprocessing.get_context("forkserver"
+                                                  if os.name == "posix" else "spawn")
+            if context.get_start_method() == "forkserver":
+                context.set_forkserver_preload(["utils.ocr_workers"])
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=context,
+                initializer=init_ocr_worker
+            )
+        return self._pool
+
+    def _reset_pool(self):
+        """Abandonne un pool cassé (processus tué) : le prochain appel en recrée un"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def prepare_image(self, image: Image.Image) -> Image.Image:
+        """Convertit l'image dans un mode accepté par Tesseract"""
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        return image
+
+    def split_frames(self, image: Image.Image) -> List[Image.Image]:
+        """Sépare les pages d'une image multi-pages (TIFF)"""
+        return [self.prepare_image(frame.copy()) for frame in ImageSequence.Iterator(image)]
+
     def clean_text(self, text: str) -> str:
         """Nettoyage sans casser les paragraphes"""
         if not text:
@@ -49,25 +83,41 @@ class ImageTranslator:
         lines = [line.strip() for line in text.splitlines() if line.strip()]
         return "\n".join(lines)
 
+    def ocr_cache_key(self, image: Image.Image, tess_lang: str) -> str:
+        """Clé du cache d'extraction : pixels de l'image et options Tesseract"""
+        return extraction_cache.make_key(
+            image.tobytes(), kind="ocr", lang=tess_lang, config=TESSERACT_CONFIG,
+            mode=image.mode, size=image.size
+        )
+
     def extract_text(self, image: Image.Image, source_lang: str) -> str:
         """OCR Image avec gestion d'erreurs améliorée"""
         try:
             # التأكد من أن الصورة في الوضع الصحيح
-            if image.mode not in ("RGB", "L"):
-                image = image.convert("RGB")
+            image = self.prepare_image(image)
 
             # الحصول على لغة Tesseract
             tess_lang = self.tesseract_lang_map.get(source_lang, "eng")
 
+            # Même image, même langue : le résultat de l'OCR est réutilisé
+            key = self.ocr_cache_key(image, tess_lang)
+            text = extraction_cache.get(key)
+            if text is not None:
+                return text
+
+            self._ensure_tesseract()
+
             # استخراج النص
-            text = pytesseract.image_to_string(
-                image,
-                lang=tess_lang,
-                config="--psm 6 --oem 3"
-            )
+            with metrics.span("ocr", lang=tess_lang):
+                text = pytesseract.image_to_string(
+                    image,
+                    lang=tess_lang,
+                    config=TESSERACT_CONFIG
+                )
 
             # تنظيف النص
             text = self.clean_text(text)
+            extraction_cache.put(key, text)
 
             logger.info(f"✅ OCR réussi : {len(text)} caractères extraits")
             return text
@@ -80,7 +130,122 @@ class ImageTranslator:
             logger.error(f"❌ Erreur OCR: {str(e)}")
             raise Exception(f"Erreur lors de l'extraction du texte: {str(e)}")
 
-    def translate_image(self, image: Image.Image, source_lang: str, target_lang: str) -> str:
+    def extract_text_batch(self, images: List[Image.Image], source_lang: str,
+                           progress_callback: Optional[Callable[[int, int], None]] = None
+                           ) -> List[str]:
+        """
+        OCR de plusieurs images (et de toutes les pages des TIFF) en parallèle
+
+        Args:
+            images: Images à traiter, dans l'ordre des pages
+            source_lang: Langue du texte
+            progress_callback: Appelé avec (pages traitées, total) après chaque page
+
+        Returns:
+            Texte de chaque page, dans l'ordre
+        """
+        pages = [frame for image in images for frame in self.split_frames(image)]
+        tess_lang = self.tesseract_lang_map.get(source_lang, "eng")
+        texts = [""] * len(pages)
+
+        # Pages déjà reconnues : pas de nouvel OCR
+        keys = [self.ocr_cache_key(page, tess_lang) for page in pages]
+        missing = []
+        for index, key in enumerate(keys):
+            cached = extraction_cache.get(key)
+            if cached is None:
+                missing.append(index)
+            else:
+                texts[index] = cached
+        done = len(pages) - len(missing)
+        if progress_callback and done:
+            progress_callback(done, len(pages))
+
+        try:
+            if missing:
+                with metrics.span("ocr.batch", lang=tess_lang):
+                    remaining = set(missing)
+                    # Un processus tué casse tout le pool : nouveau pool, un seul nouvel essai
+                    for attempt in range(2):
+                        try:
+                            pool = self._get_pool()
+                            futures = {pool.submit(ocr_worker, pages[index], tess_lang): index
+                                       for index in sorted(remaining)}
+
+                            try:
+                                for future in as_completed(futures):
+                                    index = futures[future]
+                                    texts[index] = self.clean_text(future.result())
+                                    extraction_cache.put(keys[index], texts[index])
+                                    remaining.discard(index)
+                                    done += 1
+                                    if progress_callback:
+                                        progress_callback(done, len(pages))
+                            except BaseException:
+                                # Travail annulé (levée du callback) ou en échec :
+                                # les pages pas encore commencées ne sont pas traitées
+                                for future in futures:
+                                    future.cancel()
+                                raise
+                            break
+                        except BrokenProcessPool:
+                            self._reset_pool()
+                            if attempt:
+                                raise
+                            logger.warning(f"⚠️ Pool OCR cassé, nouvel essai pour "
+                                           f"{len(remaining)} pages")
+
+            logger.info(f"✅ OCR réussi : {len(pages)} pages traitées")
+            return texts
+
+        except pytesseract.TesseractNotFoundError:
+            error_msg = "Tesseract non installé. Veuillez vérifier le fichier packages.txt"
+            logger.error(f"❌ {error_msg}")
+            raise Exception(error_msg)
+        except Exception as e:
+            logger.error(f"❌ Erreur OCR: {str(e)}")
+            raise Exception(f"Erreur lors de l'extraction du texte: {str(e)}")
+
+    def translate_images(self, images: List[Image.Image], source_lang: str, target_lang: str,
+                         progress_callback: Optional[Callable[[int, int], None]] = None,
+                         profile: Optional[str] = None) -> str:
+        """OCR de plusieurs pages puis traduction en un seul travail par lots"""
+        try:
+            pages = self.extract_text_batch(images, source_lang, progress_callback)
+            extracted_text = "\n\n".join(page for page in pages if page.strip())
+
+            if len(extracted_text.strip()) < 2:
+                return "⚠️ Aucun texte détecté dans les images. Assurez-vous que les images contiennent du texte lisible."
+
+            return self.translator.translate(extracted_text, source_lang, target_lang,
+                                             profile=profile)
+
+        except Exception as e:
+            logger.error(f"❌ Erreur traduction images: {str(e)}")
+            raise
+
+    def translate_images_multi(self, images: List[Image.Image], source_lang: str,
+                               target_langs: List[str],
+                               progress_callback: Optional[Callable[[int, int], None]] = None,
+                               profile: Optional[str] = None) -> Dict[str, str]:
+        """OCR de plusieurs pages une seule fois, puis traduction vers chaque langue cible"""
+        try:
+            pages = self.extract_text_batch(images, source_lang, progress_callback)
+            extracted_text = "\n\n".join(page for page in pages if page.strip())
+
+            if len(extracted_text.strip()) < 2:
+                return {target: "⚠️ Aucun texte détecté dans les images. Assurez-vous que les images contiennent du texte lisible."
+                        for target in target_langs}
+
+            return self.translator.translate_multi(extracted_text, source_lang, target_langs,
+                                                   profile=profile)
+
+        except Exception as e:
+            logger.error(f"❌ Erreur traduction images: {str(e)}")
+            raise
+
+    def translate_image(self, image: Image.Image, source_lang: str, target_lang: str,
+                        profile: Optional[str] = None) -> str:
         """OCR + Traduction avec gestion d'erreurs"""
         try:
             # استخراج النص من الصورة
@@ -93,9 +258,10 @@ class ImageTranslator:
             translated = self.translator.translate(
                 extracted_text,
                 source_lang,
-                target_lang
+                target_lang,
+                profile=profile
             )
-            
+
             return translated
 
         except Exception as e:
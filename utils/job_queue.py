@@ -0,0 +1,248 @@
+"""
+File de travaux en arrière-plan : progression, ETA et annulation
+
+Les traductions s'exécutent dans des threads de travail, hors du script
+Streamlit : une interaction qui relance le script n'interrompt plus le
+travail en cours. Chaque voie de priorité a ses propres threads, si bien
+qu'un gros document d'une session ne retarde pas les textes courts des
+autres sessions.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Voies de priorité : textes courts, documents / images / audio
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+def _default_batch_workers() -> int:
+    """Threads de la voie batch : un par emplacement d'inférence (un pour deux cœurs)"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    # Au moins 2 : le document d'une session ne bloque pas ceux des autres,
+    # l'ordonnanceur d'inférence limite toujours les generate simultanés
+    return max(2, min(4, cores // 2))
+
+
+DEFAULT_LANE_WORKERS = {INTERACTIVE: 2, BATCH: _default_batch_workers()}
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+job_seconds_histogram = metrics.histogram(
+    "translator_job_seconds", "Durée d'exécution des travaux, par voie et issue"
+)
+job_wait_histogram = metrics.histogram(
+    "translator_job_wait_seconds", "Attente des travaux dans la file, par voie"
+)
+
+
+class JobCancelled(Exception):
+    """Levée dans le travail lorsque l'utilisateur l'a annulé"""
+
+
+class Job:
+    """Travail soumis à la file : état, progression et résultat"""
+
+    def __init__(self, name: str, lane: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.lane = lane
+        self.status = QUEUED
+        self.done = 0.0
+        self.total = 0.0
+        self.message = ""
+        # Résultat partiel publié par le travail (affichage progressif)
+        self.partial: Any = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def progress(self, done: float, total: float, message: Optional[str] = None,
+                 partial: Any = None):
+        """
+        Publie l'avancement ; point d'annulation du travail
+
+        Args:
+            done: Unités traitées (segments, pages, octets...)
+            total: Unités à traiter
+            message: Étape en cours
+            partial: Résultat partiel à afficher
+
+        Raises:
+            JobCancelled: Si l'annulation a été demandée
+        """
+        self.check_cancelled()
+        self.done, self.total = done, total
+        if message is not None:
+            self.message = message
+        if partial is not None:
+            self.partial = partial
+
+    def check_cancelled(self):
+        """Lève JobCancelled si l'annulation a été demandée"""
+        if self._cancel.is_set():
+            raise JobCancelled("Travail annulé")
+
+    def cancel(self):
+        """Demande l'annulation : immédiate en file, au prochain point d'étape sinon"""
+        with self._lock:
+            if self.status in FINISHED_STATUSES:
+                return
+            self._cancel.set()
+            if self.status == QUEUED:
+                self._finish(CANCELLED)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def fraction(self) -> float:
+        """Avancement entre 0 et 1"""
+        if self.status == DONE:
+            return 1.0
+        if self.total <= 0:
+            return 0.0
+        return min(max(self.done / self.total, 0.0), 1.0)
+
+    @property
+    def elapsed(self) -> float:
+        """Durée d'exécution (secondes), attente exclue"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Temps restant estimé au rythme observé, None tant qu'il est inconnu"""
+        if self.status != RUNNING or self.fraction <= 0:
+            return None
+        return self.elapsed * (1 - self.fraction) / self.fraction
+
+    def _start(self) -> bool:
+        with self._lock:
+            if self.status != QUEUED:
+                return False
+            self.status = RUNNING
+            self.started_at = time.time()
+            return True
+
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+
+
+class JobQueue:
+    """Threads de travail par voie de priorité, démarrés à la première soumission"""
+
+    def __init__(self, lane_workers: Optional[Dict[str, int]] = None):
+        if lane_workers is None:
+            lane_workers = {
+                lane: int(os.environ.get(f"TRANSLATOR_JOBS_{lane.upper()}_WORKERS", workers))
+                for lane, workers in DEFAULT_LANE_WORKERS.items()
+            }
+        self.lane_workers = lane_workers
+        self._queues: Dict[str, "queue.Queue[tuple]"] = {
+            lane: queue.Queue() for lane in lane_workers
+        }
+        self._running: Dict[str, int] = {lane: 0 for lane in lane_workers}
+        self._started = False
+        self._lock = threading.Lock()
+        self.completed = 0
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._started:
+                return
+            for lane, workers in self.lane_workers.items():
+                for index in range(workers):
+                    threading.Thread(target=self._work, args=(lane,),
+                                     name=f"job-{lane}-{index}", daemon=True).start()
+            self._started = True
+            logger.info("🧵 File de travaux démarrée: " + ", ".join(
+                f"{lane}={workers}" for lane, workers in self.lane_workers.items()))
+
+    def submit(self, fn: Callable[[Job], Any], name: str, lane: str = BATCH) -> Job:
+        """
+        Ajoute un travail à la file
+
+        Args:
+            fn: Fonction exécutée dans un thread de travail ; reçoit le Job pour
+                publier sa progression et renvoie le résultat
+            name: Libellé du travail
+            lane: Voie de priorité (interactive, batch)
+
+        Returns:
+            Le Job, à conserver pour suivre la progression
+        """
+        if lane not in self._queues:
+            raise ValueError(f"Voie inconnue: {lane} (disponibles: {', '.join(self._queues)})")
+        self._ensure_workers()
+        job = Job(name, lane)
+        self._queues[lane].put((job, fn))
+        logger.info(f"📥 Travail {job.id} ({name}) en file {lane}")
+        return job
+
+    def _work(self, lane: str):
+        while True:
+            job, fn = self._queues[lane].get()
+            if not job._start():
+                # Annulé avant de démarrer
+                continue
+            job_wait_histogram.observe(job.started_at - job.submitted_at, lane=lane)
+            with self._lock:
+                self._running[lane] += 1
+            try:
+                job._finish(DONE, result=fn(job))
+            except Exception as e:
+                # JobCancelled peut arriver enveloppée par les traducteurs
+                if isinstance(e, JobCancelled) or job.cancel_requested:
+                    job._finish(CANCELLED)
+                    logger.info(f"⏹️ Travail {job.id} ({job.name}) annulé")
+                    continue
+                job._finish(FAILED, error=str(e))
+                logger.error(f"❌ Travail {job.id} ({job.name}) en échec: {str(e)}")
+            finally:
+                with self._lock:
+                    self._running[lane] -= 1
+                    self.completed += 1
+                job_seconds_histogram.observe(job.elapsed, lane=lane, status=job.status)
+
+    def stats(self) -> Dict[str, float]:
+        """Travaux en attente et en cours, par voie"""
+        with self._lock:
+            result: Dict[str, float] = {"completed": self.completed}
+            for lane, jobs in self._queues.items():
+                result[f"{lane}_queued"] = jobs.qsize()
+                result[f"{lane}_running"] = self._running[lane]
+            return result
+
+
+# Instance globale
+job_queue = JobQueue()
+metrics.register_gauges("translator_jobs", job_queue.stats)
@@ -0,0 +1,313 @@
+"""
+Instrumentation légère : durées par étape, compteurs, histogrammes et jauges
+
+Les métriques sont exportables au format texte Prometheus (/metrics sur
+TRANSLATOR_METRICS_PORT) et en journaux JSON structurés
+(TRANSLATOR_METRICS_JSON_LOGS=1). Désactivées (TRANSLATOR_METRICS=0), les
+sondes ne coûtent qu'un test booléen.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+json_logger = logging.getLogger("translator.metrics")
+
+# Bornes (secondes) des histogrammes de durée
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in items)
+    return "{" + body + "}"
+
+
+class Counter:
+    """Compteur monotone, par jeu d'étiquettes"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Valeur instantanée, par jeu d'étiquettes"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """Histogramme cumulatif (compatible Prometheus)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            # [compteurs par borne..., +Inf, somme]
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[LabelKey, Dict]:
+        with self._lock:
+            result = {}
+            for key, series in self._series.items():
+                counts, total = series[:-1], series[-1]
+                cumulative, running = [], 0
+                for count in counts:
+                    running += count
+                    cumulative.append(running)
+                result[key] = {"buckets": cumulative, "count": running, "sum": total}
+            return result
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        samples = []
+        for key, data in self.snapshot().items():
+            bounds = [str(b) for b in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, data["buckets"]):
+                samples.append((f"{self.name}_bucket", key + (("le", bound),), count))
+            samples.append((f"{self.name}_count", key, data["count"]))
+            samples.append((f"{self.name}_sum", key, data["sum"]))
+        return samples
+
+
+class _NoopSpan:
+    """Sonde inactive (métriques désactivées)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """Mesure la durée d'une étape et l'enregistre à la sortie"""
+
+    __slots__ = ("registry", "stage", "labels", "start")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str, labels: Dict):
+        self.registry = registry
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.registry.record_stage(self.stage, elapsed, exc_type is not None, self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Registre en mémoire des métriques du processus"""
+
+    def __init__(self, enabled: Optional[bool] = None, json_logs: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.environ.get("TRANSLATOR_METRICS", "1") != "0"
+        if json_logs is None:
+            json_logs = os.environ.get("TRANSLATOR_METRICS_JSON_LOGS", "0") == "1"
+        self.enabled = enabled
+        self.json_logs = json_logs
+
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, object]]]] = []
+        self._lock = threading.Lock()
+
+        self.stage_seconds = self.histogram(
+            "translator_stage_seconds", "Durée de chaque étape du pipeline"
+        )
+        self.stage_errors = self.counter(
+            "translator_stage_errors_total", "Étapes terminées par une exception"
+        )
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, help_text, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def register_gauges(self, prefix: str, collect: Callable[[], Dict[str, object]]):
+        """Jauges calculées à l'export (ex: statistiques du cache de modèles)"""
+        self._collectors.append((prefix, collect))
+
+    def span(self, stage: str, **labels):
+        """
+        Chronomètre une étape : with metrics.span("generate", pair="fr-en"): ...
+
+        Args:
+            stage: Nom de l'étape (pdf.page, tokenize, generate, ocr, asr...)
+            labels: Étiquettes additionnelles
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, stage, labels)
+
+    def record_stage(self, stage: str, seconds: float, failed: bool = False,
+                     labels: Optional[Dict] = None):
+        """Enregistre la durée d'une étape mesurée ailleurs"""
+        if not self.enabled:
+            return
+        labels = labels or {}
+        self.stage_seconds.observe(seconds, stage=stage, **labels)
+        if failed:
+            self.stage_errors.inc(stage=stage, **labels)
+        if self.json_logs:
+            json_logger.info(json.dumps({
+                "event": "stage", "stage": stage, "seconds": round(seconds, 6),
+                "failed": failed, **{k: str(v) for k, v in labels.items()},
+            }, ensure_ascii=False))
+
+    def _collected(self) -> List[Tuple[str, float]]:
+        values = []
+        for prefix, collect in self._collectors:
+            try:
+                stats = collect()
+            except Exception as e:
+                logger.warning(f"⚠️ Collecte des métriques {prefix} impossible: {str(e)}")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values.append((f"{prefix}_{key}", value))
+        return values
+
+    def to_prometheus(self) -> str:
+        """Export au format texte Prometheus"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in samples:
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        for name, value in self._collected():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> Dict:
+        """Export en dictionnaire sérialisable en JSON"""
+        result: Dict[str, object] = {}
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            if isinstance(metric, Histogram):
+                result[metric.name] = [
+                    {"labels": dict(key), **data}
+                    for key, data in metric.snapshot().items()
+                ]
+            else:
+                result[metric.name] = [
+                    {"labels": dict(key), "value": value}
+                    for _, key, value in metric.samples()
+                ]
+        result.update(self._collected())
+        return result
+
+    def log_snapshot(self):
+        """Écrit l'état complet du registre dans un journal JSON"""
+        json_logger.info(json.dumps({"event": "metrics", **self.to_json()},
+                                    ensure_ascii=False))
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Expose /metrics (Prometheus) et /metrics.json dans un thread dédié"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = registry.to_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(registry.to_json()).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"📈 Métriques exposées sur http://{host}:{port}/metrics")
+        return server
+
+
+# Instance globale
+metrics = MetricsRegistry()
+
+# Point d'export HTTP optionnel, démarré une seule fois par processus
+if os.environ.get("TRANSLATOR_METRICS_PORT"):
+    try:
+        metrics.serve(int(os.environ["TRANSLATOR_METRICS_PORT"]))
+    except OSError as e:
+        logger.warning(f"⚠️ Export des métriques impossible: {str(e)}")
@@ -0,0 +1,38 @@
+"""
+Processus OCR : fonctions exécutées dans le pool de image_translator
+
+Module volontairement léger (ni torch ni transformers) : les processus du
+pool démarrent via un forkserver et n'importent que Tesseract et Pillow.
+"""
+from PIL import Image
+import pytesseract
+import os
+import sys
+
+# Options Tesseract communes (mode page uniforme, moteur par défaut)
+TESSERACT_CONFIG = "--psm 6 --oem 3"
+
+
+def configure_tesseract():
+    """Détecte le chemin de Tesseract (appelé à la première utilisation)"""
+    # التحقق من نظام التشغيل وضبط مسار Tesseract
+    if os.name == "nt":  # Windows
+        tesseract_path = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+        if os.path.exists(tesseract_path):
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    elif sys.platform == "linux":  # Linux (Streamlit Cloud)
+        # Tesseract مثبت عبر packages.txt
+        tesseract_path = "/usr/bin/tesseract"
+        if os.path.exists(tesseract_path):
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+
+
+def init_ocr_worker():
+    """Initialise un processus OCR : Tesseract limité à un seul thread"""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    configure_tesseract()
+
+
+def ocr_worker(image: Image.Image, tess_lang: str) -> str:
+    """OCR d'une page dans un processus du pool"""
+    return pytesseract.image_to_string(image, lang=tess_lang, config=TESSERACT_CONFIG)
@@ -0,0 +1,56 @@
+"""
+Moteurs de reconnaissance vocale interchangeables (service distant ou local)
+"""
+import speech_recognition as sr
+from typing import Callable, Optional
+import time
+
+
+class SpeechRecognizer:
+    """Interface commune : transcrire un extrait audio dans une langue"""
+
+    def recognize(self, audio: sr.AudioData, language: str) -> str:
+        """
+        Transcrit un extrait audio
+
+        Args:
+            audio: Extrait audio (PCM)
+            language: Code langue du service (fr-FR, en-US, etc.)
+
+        Returns:
+            Texte transcrit
+
+        Raises:
+            sr.UnknownValueError: Parole incompréhensible
+            sr.RequestError: Erreur du service (peut être réessayée)
+        """
+        raise NotImplementedError
+
+
+class GoogleSpeechRecognizer(SpeechRecognizer):
+    """Reconnaissance via l'API Google Web Speech (comportement historique)"""
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio: sr.AudioData, language: str) -> str:
+        return self.recognizer.recognize_google(audio, language=language)
+
+
+class StubSpeechRecognizer(SpeechRecognizer):
+    """Reconnaisseur local pour les tests et benchmarks (aucun appel réseau)"""
+
+    def __init__(self, text: str = "Bonjour tout le monde.", latency: float = 0.0,
+                 transcribe: Optional[Callable[[sr.AudioData, str], str]] = None):
+        self.text = text
+        self.latency = latency
+        self.transcribe = transcribe
+        self.calls = 0
+
+    def recognize(self, audio: sr.AudioData, language: str) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.transcribe is not None:
+            return self.transcribe(audio, language)
+        return self.text
@@ -1,47 +1,601 @@
 """
 Module de traduction de texte avec conservation de la structure
 """
+import os
 import re
-from typing import List
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from models.inference_scheduler import inference_scheduler
 from models.model_cache import model_cache
+from models.translation_memory import translation_memory
+from utils.metrics import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Taille des lots envoyés à model.generate
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_MAX_BATCH_TOKENS = 4096
+
+# Fenêtre maximale du mode flux, en nombre de lots
+STREAM_MAX_WINDOW_BATCHES = 8
+
+# Traduction vers plusieurs langues : étapes (paires) traduites en parallèle,
+# par défaut une pour deux cœurs (generate utilise lui-même plusieurs threads)
+DEFAULT_MULTI_TARGET_WORKERS = int(os.environ.get(
+    "TRANSLATOR_MULTI_TARGET_WORKERS", max(1, min(4, (os.cpu_count() or 1) // 2))
+))
+
+# Taille visée (en tokens) des segments obtenus en regroupant les phrases courtes
+DEFAULT_PACK_TOKENS = int(os.environ.get("TRANSLATOR_PACK_TOKENS", 96))
+
+# Profils de décodage : longueur générée plafonnée à ratio x tokens source + marge
+DECODING_PROFILES: Dict[str, Dict] = {
+    "fast": {"num_beams": 1, "length_ratio": 1.5, "length_margin": 8},
+    "balanced": {"num_beams": 2, "length_ratio": 2.0, "length_margin": 10},
+    "quality": {"num_beams": 4, "length_ratio": 3.0, "length_margin": 16},
+}
+# Défaut : quality, soit les 4 faisceaux de la configuration des modèles opus-mt
+DEFAULT_PROFILE = os.environ.get("TRANSLATOR_DECODING_PROFILE", "quality")
+
+_SENTENCE_SPLIT_RE = re.compile(r'([.!?]+\s*)')
+_SENTENCE_END_RE = re.compile(r'[.!?]+\s*')
+_CLAUSE_SPLIT_RE = re.compile(r'(?<=[,;:])\s+')
+
+# Segments recopiés sans traduction : nombres, numéros de page (« 12 », « - 3 - »,
+# « Page 3 sur 10 », « 4/12 », « p. 7 »). Le nombre se termine par un chiffre :
+# le \W* final ne peut pas reprendre ses espaces et points (pas de retour
+# arrière quadratique), et seuls les segments courts sont testés.
+_PASSTHROUGH_RE = re.compile(
+    r'^\W*(?:(?:page|p\.|pg\.?)\s*)?\d(?:[\d.,\s]*\d)?'
+    r'(?:\s*(?:/|sur|of|de|von)\s*\d+)?\W*$',
+    re.IGNORECASE
+)
+PASSTHROUGH_MAX_CHARS = 64
+
+segments_counter = metrics.counter(
+    "translator_segments_total", "Segments traduits, par paire et origine (model/memory)"
+)
+dedup_counter = metrics.counter(
+    "translator_dedup_segments_total",
+    "Segments par issue de la déduplication (unique/duplicate/skipped)"
+)
+dedup_ratio_histogram = metrics.histogram(
+    "translator_dedup_ratio", "Part des segments d'un travail épargnés au modèle",
+    buckets=(0.0, 0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0)
+)
+batch_size_histogram = metrics.histogram(
+    "translator_generate_batch_size", "Nombre de segments par appel à generate",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+
+class TranslationJob:
+    """Traductions déjà produites au sein d'un même travail (texte ou document)"""
+    
+    def __init__(self):
+        self.translations: Dict[str, str] = {}
+        self.total = 0
+        self.duplicates = 0
+        self.skipped = 0
+    
+    @property
+    def dedup_ratio(self) -> float:
+        """Part des segments non envoyés au modèle (doublons et numéros)"""
+        return (self.duplicates + self.skipped) / self.total if self.total else 0.0
+    
+    def report(self):
+        """Journalise et enregistre le taux de déduplication du travail"""
+        if not self.total:
+            return
+        dedup_ratio_histogram.observe(self.dedup_ratio)
+        logger.info(f"♻️ Déduplication: {self.duplicates} doublons, {self.skipped} numéros "
+                    f"sur {self.total} segments ({self.dedup_ratio:.0%})")
+
 
 class TextTranslator:
     """Traducteur de texte avec conservation de la structure"""
     
     def __init__(self):
         self.cache = model_cache
+        self.memory = translation_memory
+        self.scheduler = inference_scheduler
+    
+    def _split_paragraph(self, para: str) -> List[str]:
+        """Découpe un paragraphe en phrases (., !, ?)"""
+        sentences = []
+        current_sentence = ""
+        for part in _SENTENCE_SPLIT_RE.split(para):
+            current_sentence += part
+            if _SENTENCE_END_RE.match(part):
+                sentences.append(current_sentence.strip())
+                current_sentence = ""
+        
+        if current_sentence.strip():
+            sentences.append(current_sentence.strip())
+        return sentences
     
     def split_into_sentences(self, text: str) -> List[str]:
         """Découpe le texte en phrases en conservant la structure"""
-        # Séparation par sauts de ligne
-        paragraphs = text.split('\n')
         sentences = []
         
-        for para in paragraphs:
+        # Séparation par sauts de ligne
+        for para in text.split('\n'):
             if para.strip():
-                # Découpage par phrases (., !, ?)
-                sent_list = re.split(r'([.!?]+\s*)', para)
-                current_sentence = ""
-                
-                for i, part in enumerate(sent_list):
-                    current_sentence += part
-                    if re.match(r'[.!?]+\s*', part):
-                        sentences.append(current_sentence.strip())
-                        current_sentence = ""
-                
-                if current_sentence.strip():
-                    sentences.append(current_sentence.strip())
+                sentences.extend(self._split_paragraph(para))
             else:
                 sentences.append("")  # Conserver les lignes vides
         
         return sentences
     
+    def count_tokens(self, tokenizer, texts: List[str]) -> List[int]:
+        """Nombre de tokens de chaque texte (sans tokens spéciaux)"""
+        if not texts:
+            return []
+        encoded = tokenizer(texts, add_special_tokens=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+    
+    def _greedy_pack(self, pieces: List[str], counts: List[int],
+                     limit: int) -> List[Tuple[str, int]]:
+        """Concatène les morceaux consécutifs tant que le budget de tokens le permet"""
+        packed: List[Tuple[str, int]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for piece, count in zip(pieces, counts):
+            if current and current_tokens + count > limit:
+                packed.append((" ".join(current), current_tokens))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += count
+        if current:
+            packed.append((" ".join(current), current_tokens))
+        return packed
+    
+    def _split_long_sentence(self, sentence: str, tokenizer, pack_tokens: int,
+                             max_tokens: int) -> List[Tuple[str, int]]:
+        """Redécoupe une phrase trop longue aux virgules, points-virgules et deux-points"""
+        clauses = [c.strip() for c in _CLAUSE_SPLIT_RE.split(sentence) if c.strip()]
+        pieces: List[str] = []
+        counts: List[int] = []
+        for clause, count in zip(clauses, self.count_tokens(tokenizer, clauses)):
+            if count > max_tokens:
+                # Proposition sans ponctuation interne : découpage aux espaces
+                words = clause.split()
+                for chunk, chunk_tokens in self._greedy_pack(
+                        words, self.count_tokens(tokenizer, words), pack_tokens):
+                    pieces.append(chunk)
+                    counts.append(chunk_tokens)
+            else:
+                pieces.append(clause)
+                counts.append(count)
+        return self._greedy_pack(pieces, counts, pack_tokens)
+    
+    def pack_text(self, text: str, source_lang: str, target_lang: str,
+                  max_length: int = 512,
+                  pack_tokens: Optional[int] = DEFAULT_PACK_TOKENS,
+                  profile: Optional[str] = None,
+                  job: Optional[TranslationJob] = None) -> List[List[str]]:
+        """
+        Découpe le texte en segments à traduire, paragraphe par paragraphe
+        
+        Les phrases courtes consécutives d'un même paragraphe sont regroupées
+        jusqu'à pack_tokens tokens (mesurés avec le tokenizer de la paire),
+        et les phrases plus longues que max_length sont redécoupées au lieu
+        d'être tronquées.
+        
+        La déduplication et la mémoire de traduction travaillent sur les
+        segments : une phrase regroupée avec ses voisines ne serait reconnue
+        que si tout le groupe se répétait. Les phrases déjà connues (répétées
+        dans le texte, traduites plus tôt dans le travail, présentes dans la
+        mémoire pour le premier modèle, numéros de page) restent donc seules ;
+        seules les phrases à envoyer au modèle sont regroupées.
+        
+        Args:
+            text: Texte à découper
+            source_lang: Langue source
+            target_lang: Langue cible
+            max_length: Longueur maximale d'un segment, en tokens
+            pack_tokens: Taille visée des segments regroupés (0 : une phrase par segment)
+            profile: Profil de décodage (clé de la mémoire de traduction)
+            job: Travail en cours (phrases déjà traduites)
+        
+        Returns:
+            Segments de chaque ligne du texte (liste vide pour une ligne vide)
+        """
+        paragraphs = [self._split_paragraph(para) if para.strip() else []
+                      for para in text.split('\n')]
+        if not pack_tokens:
+            return paragraphs
+        
+        # Le premier modèle de la chaîne fixe le découpage (pivot compris)
+        route = self.cache.plan_route(source_lang, target_lang)
+        _, tokenizer = self.cache.load_model(*route[0])
+        
+        sentences = [s for para in paragraphs for s in para]
+        counts = iter(self.count_tokens(tokenizer, sentences))
+        standalone = iter(self._known_sentences(sentences, route[0], profile, job))
+        # Réserve pour le token de fin de séquence
+        max_tokens = max_length - 1
+        pack_tokens = min(pack_tokens, max_tokens)
+        
+        packed_paragraphs = []
+        for para in paragraphs:
+            packed: List[str] = []
+            pieces: List[str] = []
+            piece_counts: List[int] = []
+            for sentence in para:
+                count = next(counts)
+                if next(standalone) and count <= max_tokens:
+                    # Phrase connue : segment à part, reconnu tel quel ensuite
+                    packed.extend(segment for segment, _ in
+                                  self._greedy_pack(pieces, piece_counts, pack_tokens))
+                    packed.append(sentence)
+                    pieces, piece_counts = [], []
+                elif count > max_tokens:
+                    for chunk, chunk_tokens in self._split_long_sentence(
+                            sentence, tokenizer, pack_tokens, max_tokens):
+                        pieces.append(chunk)
+                        piece_counts.append(chunk_tokens)
+                else:
+                    pieces.append(sentence)
+                    piece_counts.append(count)
+            packed.extend(segment for segment, _ in
+                          self._greedy_pack(pieces, piece_counts, pack_tokens))
+            packed_paragraphs.append(packed)
+        
+        logger.debug(f"📦 {len(sentences)} phrases regroupées en "
+                     f"{sum(len(p) for p in packed_paragraphs)} segments")
+        return packed_paragraphs
+    
+    def _known_sentences(self, sentences: List[str], first_hop: Tuple[str, str],
+                         profile: Optional[str],
+                         job: Optional[TranslationJob]) -> List[bool]:
+        """Phrases à ne pas regrouper : répétées, déjà traduites, en mémoire ou numéros"""
+        keys = [self.memory.normalize(sentence) for sentence in sentences]
+        occurrences = Counter(keys)
+        known = [
+            occurrences[key] > 1
+            or (job is not None and key in job.translations)
+            or (len(sentence) <= PASSTHROUGH_MAX_CHARS and bool(_PASSTHROUGH_RE.match(sentence)))
+            for sentence, key in zip(sentences, keys)
+        ]
+        
+        # Mémoire de traduction du premier modèle de la chaîne
+        candidates = [i for i, is_known in enumerate(known) if not is_known]
+        if candidates:
+            profile_name, _ = self.get_profile(profile)
+            model_name = f"{self.cache.get_model_id(*first_hop)}@{profile_name}"
+            # Présence seulement : la lecture (comptée) reste celle de _translate_hop
+            with metrics.span("memory.lookup", pair="-".join(first_hop)):
+                cached = self.memory.contains_many("-".join(first_hop), model_name,
+                                                   [sentences[i] for i in candidates])
+            for j in cached:
+                known[candidates[j]] = True
+        return known
+    
+    def _sentence_pairs(self, source: str, translation: str) -> List[Tuple[str, str]]:
+        """
+        Phrases d'un segment regroupé alignées avec celles de sa traduction
+        
+        L'alignement n'est retenu que si la traduction compte autant de
+        phrases que la source ; sinon (ou pour une seule phrase) : liste vide.
+        Même nombre ne veut pas dire mêmes frontières (le modèle fusionne une
+        phrase et en coupe une autre) : ces couples restent propres au
+        travail et n'entrent jamais dans la mémoire de traduction.
+        """
+        sources = self._split_paragraph(source)
+        if len(sources) < 2:
+            return []
+        translations = self._split_paragraph(translation)
+        if len(translations) != len(sources):
+            return []
+        return list(zip(sources, translations))
+    
+    def join_paragraphs(self, paragraphs: List[List[str]],
+                        translated: List[str]) -> List[str]:
+        """Reconstitue une ligne par paragraphe à partir des segments traduits"""
+        lines = []
+        start = 0
+        for para in paragraphs:
+            lines.append(" ".join(translated[start:start + len(para)]))
+            start += len(para)
+        return lines
+    
+    def get_profile(self, profile: Optional[str] = None) -> Tuple[str, Dict]:
+        """Nom et paramètres d'un profil de décodage (profil par défaut si None)"""
+        name = profile or DEFAULT_PROFILE
+        if name not in DECODING_PROFILES:
+            raise ValueError(f"Profil de décodage inconnu: {name} "
+                             f"(disponibles: {', '.join(DECODING_PROFILES)})")
+        return name, DECODING_PROFILES[name]
+    
+    def generation_kwargs(self, profile: Dict, source_tokens: int,
+                          max_length: int) -> Dict:
+        """Paramètres de generate pour un lot dont le plus long segment fait source_tokens"""
+        max_new_tokens = int(source_tokens * profile["length_ratio"]) + profile["length_margin"]
+        return {
+            "num_beams": profile["num_beams"],
+            "max_new_tokens": min(max_new_tokens, max_length),
+        }
+    
+    def make_batches(self, lengths: List[int], batch_size: int,
+                     max_batch_tokens: Optional[int] = None) -> List[List[int]]:
+        """
+        Regroupe les segments par longueur pour limiter le padding
+
+        Args:
+            lengths: Longueur (en tokens) de chaque segment
+            batch_size: Nombre maximal de segments par lot
+            max_batch_tokens: Budget de tokens par lot (lot x plus long segment)
+
+        Returns:
+            Liste de lots d'indices, triés par longueur croissante
+        """
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batches: List[List[int]] = []
+        current: List[int] = []
+
+        for idx in order:
+            longest = max(lengths[idx], 1)
+            # Les indices sont triés : le segment courant est le plus long du lot
+            too_many = len(current) >= batch_size
+            too_big = (max_batch_tokens is not None and current
+                       and (len(current) + 1) * longest > max_batch_tokens)
+            if too_many or too_big:
+                batches.append(current)
+                current = []
+            current.append(idx)
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def translate_segments(self, segments: List[str], source_lang: str,
+                           target_lang: str, max_length: int = 512,
+                           batch_size: int = DEFAULT_BATCH_SIZE,
+                           max_batch_tokens: Optional[int] = DEFAULT_MAX_BATCH_TOKENS,
+                           profile: Optional[str] = None,
+                           job: Optional[TranslationJob] = None) -> List[str]:
+        """
+        Traduit une liste de segments par lots de longueurs homogènes
+        
+        Les paires sans modèle direct passent par l'anglais : chaque étape
+        traite tout le document en un passage, et les modèles de la chaîne
+        restent épinglés dans le cache jusqu'à la fin. Chaque segment
+        distinct (après normalisation) n'est traduit qu'une fois par
+        travail ; les nombres et numéros de page sont recopiés tels quels.
+
+        Args:
+            segments: Segments à traduire (les segments vides sont conservés)
+            source_lang: Langue source
+            target_lang: Langue cible
+            max_length: Longueur maximale des segments
+            batch_size: Nombre maximal de segments par appel à generate
+            max_batch_tokens: Budget de tokens par appel à generate
+            profile: Profil de décodage (fast, balanced, quality)
+            job: Travail en cours (déduplication entre appels successifs)
+
+        Returns:
+            Segments traduits, dans l'ordre d'origine
+        """
+        profile_name, profile_params = self.get_profile(profile)
+        route = self.cache.plan_route(source_lang, target_lang)
+        if job is None:
+            job = TranslationJob()
+
+        results, unique = self._deduplicate(segments, job)
+        if not unique:
+            return results
+
+        if len(route) > 1:
+            logger.info("🔀 Traduction pivot: " + " → ".join(
+                [route[0][0]] + [tgt for _, tgt in route]))
+
+        translated = [segments[positions[0]] for positions in unique.values()]
+        with self.cache.pinned(route):
+            for hop_source, hop_target in route:
+                translated = self._translate_hop(
+                    translated, hop_source, hop_target, max_length,
+                    batch_size, max_batch_tokens, profile_name, profile_params
+                )
+
+        for (key, positions), translation in zip(unique.items(), translated):
+            job.translations[key] = translation
+            # Phrases d'un segment regroupé : reconnues seules dans la suite du travail
+            for sentence, sentence_translation in self._sentence_pairs(
+                    segments[positions[0]], translation):
+                job.translations.setdefault(self.memory.normalize(sentence),
+                                            sentence_translation)
+            for i in positions:
+                results[i] = translation
+        return results
+
+    def _deduplicate(self, segments: List[str],
+                     job: TranslationJob) -> Tuple[List[str], Dict[str, List[int]]]:
+        """
+        Repère les segments à envoyer au modèle
+
+        Returns:
+            Tuple (résultats pré-remplis : vides, numéros et segments déjà
+            traduits dans le travail ; segment normalisé -> positions des
+            segments restant à traduire)
+        """
+        results = list(segments)
+        unique: Dict[str, List[int]] = {}
+        skipped = duplicates = 0
+        for i, segment in enumerate(segments):
+            if not segment or not segment.strip():
+                continue
+            if len(segment) <= PASSTHROUGH_MAX_CHARS and _PASSTHROUGH_RE.match(segment):
+                skipped += 1
+                continue
+            key = self.memory.normalize(segment)
+            if key in job.translations:
+                results[i] = job.translations[key]
+                duplicates += 1
+            elif key in unique:
+                unique[key].append(i)
+                duplicates += 1
+            else:
+                unique[key] = [i]
+
+        job.total += len(unique) + duplicates + skipped
+        job.duplicates += duplicates
+        job.skipped += skipped
+        dedup_counter.inc(len(unique), outcome="unique")
+        if duplicates:
+            dedup_counter.inc(duplicates, outcome="duplicate")
+        if skipped:
+            dedup_counter.inc(skipped, outcome="skipped")
+        return results, unique
+
+    def _translate_hop(self, segments: List[str], source_lang: str,
+                       target_lang: str, max_length: int, batch_size: int,
+                       max_batch_tokens: Optional[int], profile_name: str,
+                       profile: Dict) -> List[str]:
+        """Traduit les segments avec un seul modèle (mémoire de traduction + lots)"""
+        results = list(segments)
+        pending = [i for i, seg in enumerate(segments) if seg and seg.strip()]
+        if not pending:
+            return results
+
+        # Mémoire de traduction : les phrases connues évitent le modèle
+        pair = f"{source_lang}-{target_lang}"
+        # Le profil change la traduction : il fait partie de la clé de la mémoire
+        model_name = f"{self.cache.get_model_id(source_lang, target_lang)}@{profile_name}"
+        with metrics.span("memory.lookup", pair=pair):
+            cached = self.memory.get_many(pair, model_name,
+                                          [segments[i] for i in pending])
+        for j, translated_text in cached.items():
+            results[pending[j]] = translated_text
+        pending = [i for j, i in enumerate(pending) if j not in cached]
+        if cached:
+            segments_counter.inc(len(cached), pair=pair, origin="memory")
+        if not pending:
+            return results
+
+        model, tokenizer = self.cache.load_model(source_lang, target_lang)
+
+        # Tokenization unique, le padding est fait lot par lot
+        with metrics.span("tokenize", pair=pair):
+            encoded = tokenizer([segments[i] for i in pending],
+                                truncation=True, max_length=max_length)
+        input_ids = encoded["input_ids"]
+        attention_mask = encoded["attention_mask"]
+        lengths = [len(ids) for ids in input_ids]
+
+        for batch in self.make_batches(lengths, batch_size, max_batch_tokens):
+            with metrics.span("tokenize", pair=pair):
+                inputs = tokenizer.pad(
+                    {"input_ids": [input_ids[j] for j in batch],
+                     "attention_mask": [attention_mask[j] for j in batch]},
+                    padding=True, return_tensors="pt"
+                ).to(self.cache.device)
+
+            # Attente d'un emplacement de calcul hors de la mesure de generate
+            with self.scheduler.slot():
+                with metrics.span("generate", pair=pair, profile=profile_name):
+                    translated = model.generate(**inputs, **self.generation_kwargs(
+                        profile, max(lengths[j] for j in batch), max_length
+                    ))
+            with metrics.span("decode", pair=pair):
+                decoded = tokenizer.batch_decode(translated, skip_special_tokens=True)
+            batch_size_histogram.observe(len(batch), pair=pair)
+
+            for j, translated_text in zip(batch, decoded):
+                results[pending[j]] = translated_text
+
+        segments_counter.inc(len(pending), pair=pair, origin="model")
+        with metrics.span("memory.store", pair=pair):
+            self.memory.put_many(pair, model_name,
+                                 [(segments[i], results[i]) for i in pending])
+        return results
+
+    def translate_stream(self, text: str, source_lang: str, target_lang: str,
+                         max_length: int = 512, batch_size: int = DEFAULT_BATCH_SIZE,
+                         max_batch_tokens: Optional[int] = DEFAULT_MAX_BATCH_TOKENS,
+                         pack_tokens: Optional[int] = DEFAULT_PACK_TOKENS,
+                         profile: Optional[str] = None,
+                         job: Optional[TranslationJob] = None,
+                         progress_callback: Optional[Callable[[int, int], None]] = None
+                         ) -> Iterator[List[str]]:
+        """
+        Traduit le texte par fenêtres successives, dans l'ordre
+        
+        La première fenêtre contient un seul lot pour afficher un résultat
+        au plus vite, les suivantes grandissent pour mieux regrouper les
+        segments par longueur. Une fenêtre contient toujours des lignes
+        entières.
+        
+        Args:
+            text: Texte à traduire
+            source_lang: Langue source
+            target_lang: Langue cible
+            max_length: Longueur maximale des segments
+            batch_size: Nombre maximal de segments par appel au modèle
+            max_batch_tokens: Budget de tokens par appel au modèle
+            pack_tokens: Taille visée des segments regroupés (0 : une phrase par segment)
+            profile: Profil de décodage (fast, balanced, quality)
+            job: Travail englobant (ex: document page par page) ; sinon un travail
+                par texte, dont le taux de déduplication est journalisé à la fin
+            progress_callback: Appelée après chaque fenêtre avec (segments
+                traduits, segments au total)
+        
+        Yields:
+            Lignes traduites (à joindre par des sauts de ligne)
+        """
+        if not text or not text.strip():
+            return
+        
+        owns_job = job is None
+        if owns_job:
+            job = TranslationJob()
+        
+        try:
+            route = self.cache.plan_route(source_lang, target_lang)
+            
+            with self.cache.pinned(route):
+                with metrics.span("split"):
+                    paragraphs = self.pack_text(text, source_lang, target_lang,
+                                                max_length, pack_tokens,
+                                                profile=profile, job=job)
+                total = sum(len(para) for para in paragraphs)
+                done = 0
+                start = 0
+                window = batch_size
+                while start < len(paragraphs):
+                    end, count = start, 0
+                    while end < len(paragraphs) and (count < window or end == start):
+                        count += len(paragraphs[end])
+                        end += 1
+                    chunk = paragraphs[start:end]
+                    translated = self.translate_segments(
+                        [segment for para in chunk for segment in para],
+                        source_lang, target_lang,
+                        max_length=max_length, batch_size=batch_size,
+                        max_batch_tokens=max_batch_tokens, profile=profile, job=job
+                    )
+                    done += len(translated)
+                    if progress_callback:
+                        progress_callback(done, total)
+                    yield self.join_paragraphs(chunk, translated)
+                    start = end
+                    window = min(window * 2, batch_size * STREAM_MAX_WINDOW_BATCHES)
+            
+            if owns_job:
+                job.report()
+            logger.info(f"✅ Traduction {source_lang}→{target_lang} réussie")
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur de traduction: {str(e)}")
+            raise Exception(f"Erreur lors de la traduction: {str(e)}")
+    
     def translate(self, text: str, source_lang: str, target_lang: str, 
-                  max_length: int = 512) -> str:
+                  max_length: int = 512, batch_size: int = DEFAULT_BATCH_SIZE,
+                  max_batch_tokens: Optional[int] = DEFAULT_MAX_BATCH_TOKENS,
+                  pack_tokens: Optional[int] = DEFAULT_PACK_TOKENS,
+                  profile: Optional[str] = None) -> str:
         """
         Traduit le texte en conservant la structure originale
         
@@ -50,46 +604,240 @@ class TextTranslator:
             source_lang: Langue source (fr, en, ar, etc.)
             target_lang: Langue cible
             max_length: Longueur maximale des segments
+            batch_size: Nombre maximal de segments par appel au modèle
+            max_batch_tokens: Budget de tokens par appel au modèle
+            pack_tokens: Taille visée des segments regroupés (0 : une phrase par segment)
+            profile: Profil de décodage (fast, balanced, quality)
         
         Returns:
             Texte traduit avec structure préservée
         """
+        # Reconstituer le texte avec la structure originale
+        return '\n'.join(
+            line
+            for lines in self.translate_stream(
+                text, source_lang, target_lang, max_length=max_length,
+                batch_size=batch_size, max_batch_tokens=max_batch_tokens,
+                pack_tokens=pack_tokens, profile=profile
+            )
+            for line in lines
+        )
+
+    def translate_multi_lines(self, text: str, source_lang: str, target_langs: List[str],
+                              max_length: int = 512, batch_size: int = DEFAULT_BATCH_SIZE,
+                              max_batch_tokens: Optional[int] = DEFAULT_MAX_BATCH_TOKENS,
+                              pack_tokens: Optional[int] = DEFAULT_PACK_TOKENS,
+                              profile: Optional[str] = None,
+                              max_workers: Optional[int] = None,
+                              progress_callback: Optional[Callable[[int, int], None]] = None
+                              ) -> Dict[str, List[str]]:
+        """
+        Traduit le texte vers plusieurs langues cibles en un seul travail
+        
+        Le découpage et la déduplication sont faits une fois. Chaque étape
+        distincte des chaînes n'est traduite qu'une fois : avec le pivot,
+        le passage vers l'anglais est partagé par toutes les cibles (et sert
+        directement de résultat si l'anglais est demandé). Les étapes sont
+        traduites par fenêtres, en parallèle sur plusieurs paires ; la
+        fenêtre d'une étape suivante part dès que la précédente est prête.
+        Si les modèles dépassent le budget du cache, les cibles sont traitées
+        par vagues d'au plus max_models modèles épinglés.
+        
+        Args:
+            text: Texte à traduire
+            source_lang: Langue source
+            target_langs: Langues cibles (les doublons sont ignorés)
+            max_length: Longueur maximale des segments
+            batch_size: Nombre maximal de segments par appel au modèle
+            max_batch_tokens: Budget de tokens par appel au modèle
+            pack_tokens: Taille visée des segments regroupés (0 : une phrase par segment)
+            profile: Profil de décodage (fast, balanced, quality)
+            max_workers: Étapes traduites en parallèle (défaut :
+                TRANSLATOR_MULTI_TARGET_WORKERS)
+            progress_callback: Appelée après chaque fenêtre avec (segments
+                traduits, segments au total), toutes étapes confondues ; une
+                exception levée par la fonction interrompt la traduction
+        
+        Returns:
+            Dictionnaire langue cible -> lignes traduites
+        """
+        targets = list(dict.fromkeys(target_langs))
+        if not targets:
+            raise ValueError("Aucune langue cible")
         if not text or not text.strip():
-            return ""
+            return {target: [] for target in targets}
+        
+        profile_name, profile_params = self.get_profile(profile)
+        job = TranslationJob()
         
         try:
-            # Charger le modèle
-            model, tokenizer = self.cache.load_model(source_lang, target_lang)
-            
-            # Découper en phrases
-            sentences = self.split_into_sentences(text)
-            translated_sentences = []
+            routes = {target: tuple(self.cache.plan_route(source_lang, target))
+                      for target in targets}
             
-            for sentence in sentences:
-                if not sentence or not sentence.strip():
-                    translated_sentences.append(sentence)
+            # Découpage une fois par premier modèle (qui fixe le comptage des tokens)
+            groups: Dict[Tuple[str, str], Dict] = {}
+            for route in routes.values():
+                if route[0] in groups:
                     continue
+                with metrics.span("split"):
+                    paragraphs = self.pack_text(text, source_lang, route[0][1],
+                                                max_length, pack_tokens,
+                                                profile=profile, job=job)
+                segments = [segment for para in paragraphs for segment in para]
+                results, unique = self._deduplicate(segments, job)
+                groups[route[0]] = {
+                    "paragraphs": paragraphs, "results": results, "unique": unique,
+                    "sources": [segments[positions[0]] for positions in unique.values()],
+                }
+            
+            # Arbre des étapes : préfixe de chaîne -> préfixes qui le prolongent
+            prefixes = list(dict.fromkeys(route[:depth] for route in routes.values()
+                                          for depth in range(1, len(route) + 1)))
+            children: Dict[Tuple, List[Tuple]] = {prefix: [] for prefix in prefixes}
+            for prefix in prefixes:
+                if len(prefix) > 1:
+                    children[prefix[:-1]].append(prefix)
+            
+            pairs = list(dict.fromkeys(prefix[-1] for prefix in prefixes))
+            workers = max(1, min(max_workers or DEFAULT_MULTI_TARGET_WORKERS, len(pairs)))
+            window = batch_size * STREAM_MAX_WINDOW_BATCHES
+            total = sum(len(groups[prefix[0]]["sources"]) for prefix in prefixes)
+            outputs: Dict[Tuple, Dict[int, List[str]]] = {prefix: {} for prefix in prefixes}
+            stages = self._plan_stages(list(routes.values()))
+            logger.info(f"🌐 Traduction {source_lang}→{', '.join(targets)}: "
+                        f"{len(pairs)} modèles, {workers} en parallèle"
+                        + (f", en {len(stages)} vagues" if len(stages) > 1 else ""))
+            
+            def run_hop(hop: Tuple[str, str], segments: List[str]) -> List[str]:
+                return self._translate_hop(
+                    segments, hop[0], hop[1], max_length, batch_size,
+                    max_batch_tokens, profile_name, profile_params
+                )
+            
+            done = 0
+            computed = set()
+            for stage_routes in stages:
+                # Étapes de la vague qu'une vague précédente n'a pas déjà traduites
+                stage = [prefix for prefix in dict.fromkeys(
+                    route[:depth] for route in stage_routes
+                    for depth in range(1, len(route) + 1)) if prefix not in computed]
+                stage_set = set(stage)
                 
-                # Tokenization et traduction
-                inputs = tokenizer(sentence, return_tensors="pt", 
-                                 padding=True, truncation=True, 
-                                 max_length=max_length).to(self.cache.device)
-                
-                translated = model.generate(**inputs, max_length=max_length)
-                translated_text = tokenizer.decode(translated[0], 
-                                                  skip_special_tokens=True)
-                
-                translated_sentences.append(translated_text)
+                # Les paires de la vague restent épinglées jusqu'à sa fin : une
+                # fenêtre suivante ne recharge pas un modèle évincé entre-temps
+                with self.cache.pinned(list(dict.fromkeys(prefix[-1] for prefix in stage))):
+                    executor = ThreadPoolExecutor(max_workers=workers,
+                                                  thread_name_prefix="multi-target")
+                    try:
+                        pending = {}
+                        for prefix in stage:
+                            if len(prefix) == 1:
+                                sources = groups[prefix[0]]["sources"]
+                                windows = [sources[start:start + window]
+                                           for start in range(0, len(sources), window)]
+                            elif prefix[:-1] in computed:
+                                # Étape précédente traduite par une vague antérieure
+                                windows = [segments for _, segments
+                                           in sorted(outputs[prefix[:-1]].items())]
+                            else:
+                                continue
+                            for index, segments in enumerate(windows):
+                                future = executor.submit(run_hop, prefix[-1], segments)
+                                pending[future] = (prefix, index)
+                        
+                        while pending:
+                            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in finished:
+                                prefix, index = pending.pop(future)
+                                translated = future.result()
+                                outputs[prefix][index] = translated
+                                # Étape suivante de la même fenêtre, sans attendre les autres
+                                for child in children[prefix]:
+                                    if child in stage_set:
+                                        future = executor.submit(run_hop, child[-1], translated)
+                                        pending[future] = (child, index)
+                                done += len(translated)
+                                if progress_callback:
+                                    progress_callback(done, total)
+                    finally:
+                        # Interruption : les fenêtres pas encore commencées sont abandonnées
+                        executor.shutdown(wait=False, cancel_futures=True)
+                computed.update(stage)
             
-            # Reconstituer le texte avec la structure originale
-            result = '\n'.join(translated_sentences)
+            translations = {}
+            for target, route in routes.items():
+                group = groups[route[0]]
+                translated = [segment for _, window_output in sorted(outputs[route].items())
+                              for segment in window_output]
+                results = list(group["results"])
+                for positions, translation in zip(group["unique"].values(), translated):
+                    for i in positions:
+                        results[i] = translation
+                translations[target] = self.join_paragraphs(group["paragraphs"], results)
             
-            logger.info(f"✅ Traduction {source_lang}→{target_lang} réussie")
-            return result
+            job.report()
+            logger.info(f"✅ Traduction {source_lang}→{', '.join(targets)} réussie")
+            return translations
             
         except Exception as e:
             logger.error(f"❌ Erreur de traduction: {str(e)}")
             raise Exception(f"Erreur lors de la traduction: {str(e)}")
+    
+    def _plan_stages(self, routes: List[Tuple]) -> List[List[Tuple]]:
+        """
+        Répartit les chaînes en vagues dont les paires tiennent dans le cache
+        
+        Les paires d'une vague sont épinglées ensemble : au plus max_models
+        par vague. Une étape traduite par une vague précédente (le passage
+        par le pivot, par exemple) n'y est pas recomptée. Une chaîne plus
+        longue que le budget forme sa propre vague, avec un avertissement.
+        """
+        budget = self.cache.max_models
+        if budget is None:
+            return [routes]
+        stages: List[List[Tuple]] = []
+        planned: set = set()
+        stage_prefixes: set = set()
+        for route in routes:
+            prefixes = {route[:depth] for depth in range(1, len(route) + 1)}
+            needed = {prefix for prefix in prefixes if prefix not in planned}
+            if stages and len({prefix[-1] for prefix in stage_prefixes | needed}) <= budget:
+                stages[-1].append(route)
+                stage_prefixes |= needed
+            else:
+                planned |= stage_prefixes
+                needed = {prefix for prefix in prefixes if prefix not in planned}
+                stages.append([route])
+                stage_prefixes = needed
+                needed_pairs = len({prefix[-1] for prefix in needed})
+                if needed_pairs > budget:
+                    logger.warning(f"⚠️ Chaîne de {needed_pairs} modèles épinglée "
+                                   f"au-delà du budget du cache ({budget})")
+        return stages
+    
+    def translate_multi(self, text: str, source_lang: str, target_langs: List[str],
+                        max_length: int = 512, batch_size: int = DEFAULT_BATCH_SIZE,
+                        max_batch_tokens: Optional[int] = DEFAULT_MAX_BATCH_TOKENS,
+                        pack_tokens: Optional[int] = DEFAULT_PACK_TOKENS,
+                        profile: Optional[str] = None,
+                        max_workers: Optional[int] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None
+                        ) -> Dict[str, str]:
+        """
+        Traduit le texte vers plusieurs langues cibles (voir translate_multi_lines)
+        
+        Returns:
+            Dictionnaire langue cible -> texte traduit avec structure préservée
+        """
+        return {
+            target: '\n'.join(lines)
+            for target, lines in self.translate_multi_lines(
+                text, source_lang, target_langs, max_length=max_length,
+                batch_size=batch_size, max_batch_tokens=max_batch_tokens,
+                pack_tokens=pack_tokens, profile=profile, max_workers=max_workers,
+                progress_callback=progress_callback
+            ).items()
+        }
 
 
 # Instance globale
@@ -0,0 +1,134 @@
+"""
+Entrées de fichiers à mémoire bornée : octets, chemins ou objets fichier
+
+Les gros envois sont copiés par blocs dans un fichier temporaire au-delà
+d'un seuil, puis projetés en mémoire (mmap) pour les analyseurs qui lisent
+un flux (PyPDF2) : les pages du fichier restent dans le cache du système
+au lieu d'être copiées dans le tas de chaque session.
+"""
+import codecs
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
+# Octets, chemin ou objet fichier binaire positionnable
+FileSource = Union[bytes, bytearray, memoryview, str, os.PathLike, BinaryIO]
+
+DEFAULT_SPOOL_THRESHOLD_MB = 8
+CHUNK_SIZE = 1024 * 1024
+
+
+def spool_upload(upload: BinaryIO, threshold: Optional[int] = None) -> tempfile.SpooledTemporaryFile:
+    """
+    Copie un envoi par blocs : en mémoire sous le seuil, sur disque au-delà
+
+    Args:
+        upload: Fichier envoyé (ex: UploadedFile de Streamlit)
+        threshold: Taille (octets) au-delà de laquelle le contenu passe sur disque
+
+    Returns:
+        Fichier temporaire positionné au début (à fermer par l'appelant)
+    """
+    if threshold is None:
+        threshold = int(os.environ.get("TRANSLATOR_SPOOL_THRESHOLD_MB",
+                                       DEFAULT_SPOOL_THRESHOLD_MB)) * 1024 * 1024
+    spooled = tempfile.SpooledTemporaryFile(max_size=threshold)
+    if hasattr(upload, "seek"):
+        upload.seek(0)
+    shutil.copyfileobj(upload, spooled, CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+
+@contextmanager
+def open_source(source: FileSource) -> Iterator[BinaryIO]:
+    """Flux binaire positionné au début ; seuls les fichiers ouverts ici sont refermés"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # BytesIO partage le tampon d'un bytes tant qu'il n'est pas modifié
+        yield io.BytesIO(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield f
+    else:
+        source.seek(0)
+        yield source
+
+
+@contextmanager
+def map_source(source: FileSource) -> Iterator[BinaryIO]:
+    """Vue en lecture seule : mmap pour un fichier sur disque, flux en mémoire sinon"""
+    with open_source(source) as f:
+        raw = f
+        if isinstance(raw, tempfile.SpooledTemporaryFile):
+            # fileno() forcerait l'écriture sur disque d'un contenu resté en mémoire
+            raw = raw._file
+        try:
+            fileno = raw.fileno()
+            size = os.fstat(fileno).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            yield f
+            return
+        if size == 0:
+            yield f
+            return
+
+        mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def source_size(source: FileSource) -> int:
+    """Taille du contenu en octets, sans le lire"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source).nbytes
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    position = source.tell()
+    try:
+        return source.seek(0, io.SEEK_END)
+    finally:
+        source.seek(position)
+
+
+def iter_chunks(source: FileSource, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Contenu par blocs (hachage, copie)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+        return
+    with open_source(source) as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            yield block
+
+
+def detect_text_encoding(source: FileSource) -> str:
+    """UTF-8 si tout le contenu est valide, latin-1 sinon (décodage par blocs)"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for block in iter_chunks(source):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def iter_text_lines(source: FileSource, encoding: Optional[str] = None) -> Iterator[str]:
+    """Lignes d'un fichier texte, décodées à la volée (fins de ligne conservées)"""
+    encoding = encoding or detect_text_encoding(source)
+    with open_source(source) as f:
+        wrapper = io.TextIOWrapper(f, encoding=encoding, newline=None)
+        try:
+            # Pas de « yield from » : il fermerait le wrapper, donc le flux, à l'abandon
+            for line in wrapper:
+                yield line
+        finally:
+            # Ne pas fermer un flux qui appartient à l'appelant
+            wrapper.detach()